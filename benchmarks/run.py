@@ -0,0 +1,388 @@
+"""
+Headless benchmarks of panther's hot paths.
+
+usage:
+    python benchmarks/run.py                                   # print results
+    python benchmarks/run.py --output results.json             # save results
+    python benchmarks/run.py --runs 5 --compare benchmarks/baseline.json   # exit with 1 if anything got slower
+
+Every benchmark runs <repeats> times and the fastest run is kept (like timeit), with garbage collection disabled, so
+results are comparable between runs on the same machine. With --runs the whole suite is run that many times and each
+benchmark's median is kept, so a moment when the machine is busy doesn't decide the result. Regenerate the baseline on
+the machine you compare on, with the same --runs as comparisons use:
+    python benchmarks/run.py --runs 5 --output benchmarks/baseline.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("KIVY_NO_ARGS", "1")  # the arguments are ours, not kivy's
+os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+
+import numpy as np
+import panther
+from panther import defaults, graphics, key, pointer
+from panther.camera import Camera
+from panther.collision import Colliders
+from panther.headless import HeadlessApp
+from panther.particles import Emitter
+from panther.utils import batch
+from panther.utils.entities import EntityStore
+
+EXAMPLE_IMAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "examples", "smiley.png")
+
+benchmarks = {}  # name: tuple<int(operations per run), function(n)>
+
+
+def benchmark(name, n):
+    """
+    register a benchmark, which does <n> operations each time it's called
+    :param name: string
+    :param n: int
+    :return: decorator
+    """
+    def decorator(f):
+        benchmarks[name] = (n, f)
+        return f
+
+    return decorator
+
+
+@benchmark("graphics.rectangle", 10000)
+def bench_rectangle(n):
+    for i in range(n):
+        graphics.rectangle(i, i, 10, 10)
+
+
+@benchmark("graphics.rectangles", 100000)
+def bench_rectangles(n):
+    xs = np.arange(n, dtype=np.float32)
+    graphics.rectangles(xs, xs, 10, 10)
+
+
+@benchmark("graphics.ellipse", 10000)
+def bench_ellipse(n):
+    for i in range(n):
+        graphics.ellipse(i, i, 10, 20)
+
+
+@benchmark("graphics.regular_polygon", 10000)
+def bench_regular_polygon(n):
+    for i in range(n):
+        graphics.regular_polygon(10, 9, i, i)
+
+
+@benchmark("graphics.polygon", 10000)
+def bench_polygon(n):
+    for i in range(n):
+        graphics.polygon((i, i), (i + 13, i + 6), (i + 7, i - 2), (i + 10, i - 11))
+
+
+@benchmark("graphics.text", 10000)
+def bench_text(n):
+    for i in range(n):
+        graphics.text(i, i, "score")
+
+
+@benchmark("graphics.glyph_text (changing)", 10000)
+def bench_glyph_text(n):
+    for i in range(n):
+        graphics.glyph_text(i % 500, i % 400, f"score {i}")
+
+
+@benchmark("graphics.image", 10000)
+def bench_image(n):
+    for i in range(n):
+        graphics.image(i, i, 10, 10, EXAMPLE_IMAGE)
+
+
+@benchmark("events.trigger+default_event_parse", 10000)
+def bench_events(n):
+    for i in range(n):
+        panther.events.trigger('mousepos', (i, i))
+
+    defaults.default_event_parse(0)
+
+
+@benchmark("pointer.clicks (1000 pointers)", 1000)
+def bench_clicks(n):
+    for _ in range(n):
+        for _ in pointer.clicks(remove_expired=False):
+            pass
+
+
+@benchmark("key.down", 100000)
+def bench_key_down(n, names=("a", "w", "spacebar", "escape", "left", "right", "up", "down", "shift", "enter")):
+    for i in range(n // len(names)):
+        for name in names:
+            key.down(name)
+
+
+@benchmark("utils.batch.move_on_angle", 100000)
+def bench_batch_move_on_angle(n):
+    xs = np.zeros(n)
+    ys = np.zeros(n)
+    batch.move_on_angle(np.arange(n) % 360, xs, ys, 5)
+
+
+@benchmark("utils.entities step+draw (50k)", 50000)
+def bench_entities(n):
+    store = _entities.get(n)
+    if store is None:
+        store = _entities[n] = EntityStore(n)
+        store.create_many(n, x=np.arange(n) % 500, y=np.arange(n) % 400, vx=1, vy=-1, width=2, height=2)
+
+    store.step(1 / 60)
+    graphics.entities(store)
+
+
+_entities = {}  # n: EntityStore, reused between runs
+
+
+@benchmark("collision.collisions (20k circles)", 20000)
+def bench_collisions(n):
+    colliders = _colliders.get(n)
+    if colliders is None:
+        xs, ys = np.random.default_rng(0).uniform(0, 2000, (2, n))
+        colliders = _colliders[n] = (Colliders(n), xs, ys)
+        colliders[0].add_circles(xs, ys, 4)
+
+    colliders, xs, ys = colliders
+    xs += 0.5
+    colliders.move(np.arange(n), xs, ys)
+    colliders.collisions()
+
+
+_colliders = {}  # n: tuple<Colliders, xs, ys>, reused between runs
+
+
+@benchmark("particles update+draw (10k)", 10000)
+def bench_particles(n):
+    emitter = _emitters.get(n)
+    if emitter is None:
+        emitter = _emitters[n] = Emitter(250, 200, rate=n, lifetime=2, max_particles=n, seed=0)
+        emitter.update(1)
+
+    emitter.update(1 / 60)
+    emitter.draw()
+
+
+_emitters = {}  # n: Emitter, reused between runs
+
+
+@benchmark("camera culled rectangle (1 in 100 visible)", 100000)
+def bench_camera_culling(n):
+    with Camera(250, 200, zoom=10):
+        for i in range(n):
+            graphics.rectangle(i % 1000 - 500, i // 1000 % 100 * 8 - 200, 4, 4)
+
+
+_KEY_STATE = ('_keys', '_presses', '_releases', '_down', '_pressed', '_released')
+
+
+def setup():
+    """
+    put panther into a known state: 1000 pointers, 10 keys down
+    :return: dict, the state it replaced, for teardown()
+    """
+    saved = dict(
+        events=list(panther.events.events),
+        pointers=dict(pointer._pointers),
+        by_type={type: dict(pointers) for type, pointers in pointer._by_type.items()},
+        pointer_loc=pointer._pointer_loc,
+        snapshot=pointer.snapshot,
+        changed=pointer._changed,
+        slots=dict(key._slots),
+        overflow=key._overflow,
+        keys={name: bytes(getattr(key, name)) for name in _KEY_STATE}
+    )
+
+    panther.events.events.clear()  # e.g. window_config_update events queued on import
+
+    for uid in range(1000):
+        pointer.touch_down(SimpleNamespace(uid=uid, x=uid, y=uid, device="mouse" if uid % 2 else "touch"))
+
+    for code, name in ((97, "a"), (119, "w"), (32, "spacebar"), (276, "left"), (273, "up")):
+        key._update_key_down(None, (code, name), name, [])
+
+    key._swap()
+    pointer._swap()
+
+    return saved
+
+
+def teardown(saved):
+    """
+    put back the state setup() replaced, so running the benchmarks (e.g. from the tests) doesn't leave pointers and
+    keys behind
+    :param saved: dict, from setup()
+    :return: None
+    """
+    panther.events.events.clear()
+    panther.events.events.extend(saved['events'])
+
+    pointer._pointers.clear()
+    pointer._pointers.update(saved['pointers'])
+    for type, pointers in pointer._by_type.items():
+        pointers.clear()
+        pointers.update(saved['by_type'][type])
+    pointer._pointer_loc = saved['pointer_loc']
+    pointer.snapshot = saved['snapshot']
+    pointer._changed = saved['changed']
+    pointer._remove_expired.clear()
+
+    key._slots.clear()
+    key._slots.update(saved['slots'])
+    key._overflow = saved['overflow']
+    for name, state in saved['keys'].items():
+        getattr(key, name)[:] = state
+
+
+def run(names=None, repeats=7, scale=1.0, runs=1):
+    """
+    run the benchmarks
+    :param names: list<string>, benchmarks to run, None for all of them
+    :param repeats: int, times to run each benchmark, the fastest is kept
+    :param scale: float, multiplies the number of operations per run, use < 1 for a quick smoke test
+    :param runs: int, times to run every benchmark (each <repeats> times), the median is kept
+    :return: dict<string, dict<string, number> >
+    """
+    every_run = []
+
+    with HeadlessApp() as app:
+        saved = setup()
+        try:
+            for _ in range(runs):
+                results = {}
+                _run(app, names, repeats, scale, results)
+                every_run.append(results)
+        finally:
+            teardown(saved)
+
+    return median(every_run)
+
+
+def median(every_run):
+    """
+    :param every_run: list<dict>, results from several runs of the same benchmarks
+    :return: dict, the result of each benchmark with the median ops_per_second (the slower of the middle two for an
+    even number of runs)
+    """
+    return {
+        name: sorted((results[name] for results in every_run), key=lambda result: result['ops_per_second'])[
+            (len(every_run) - 1) // 2
+        ]
+        for name in every_run[0]
+    }
+
+
+def _run(app, names, repeats, scale, results):
+    """
+    run the benchmarks in <app>, adding their results to <results>
+    :return: None
+    """
+    for name, (n, f) in benchmarks.items():
+        if names and name not in names:
+            continue
+
+        n = max(1, int(n * scale))
+        f(max(1, n // 10))  # warm up caches (textures, labels, index tables) before timing
+        app.commands.clear()
+
+        times = []
+        for _ in range(repeats):
+            gc.collect()
+            gc.disable()
+            try:
+                start = time.perf_counter()
+                f(n)
+                times.append(time.perf_counter() - start)
+            finally:
+                gc.enable()
+
+            app.commands.clear()
+
+        best = min(times)
+        results[name] = dict(
+            n=n,
+            seconds=best,
+            ops_per_second=n / best
+        )
+
+
+def compare(results, baseline, tolerance):
+    """
+    print each result relative to <baseline>
+    :param results: dict, from run()
+    :param baseline: dict, from run()
+    :param tolerance: float, fraction slower than the baseline that's still not a regression
+    :return: list<string>, names of benchmarks which regressed
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"{name:40} {result['ops_per_second']:>14,.0f} ops/s   (not in baseline)")
+            continue
+
+        ratio = result['ops_per_second'] / baseline[name]['ops_per_second']
+        regressed = ratio < 1 - tolerance
+        if regressed:
+            regressions.append(name)
+
+        print(
+            f"{name:40} {result['ops_per_second']:>14,.0f} ops/s   {ratio:6.2f}x baseline"
+            f"{'   REGRESSION' if regressed else ''}"
+        )
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run panther's headless benchmarks")
+    parser.add_argument("names", nargs="*", help="benchmarks to run, all of them by default")
+    parser.add_argument("--repeats", type=int, default=7)
+    parser.add_argument("--runs", type=int, default=1, help="times to run the whole suite, the median is kept")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplies the number of operations per run")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare the results with")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="slowdown allowed before it's a regression")
+    args = parser.parse_args(argv)
+
+    results = run(args.names, args.repeats, args.scale, args.runs)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(dict(
+                meta=dict(
+                    python=platform.python_version(),
+                    implementation=platform.python_implementation(),
+                    machine=platform.machine(),
+                    system=platform.system(),
+                    numpy=np.__version__,
+                    repeats=args.repeats,
+                    runs=args.runs
+                ),
+                results=results
+            ), f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+
+        if compare(results, baseline, args.tolerance):
+            return 1
+    else:
+        for name, result in results.items():
+            print(f"{name:40} {result['ops_per_second']:>14,.0f} ops/s")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
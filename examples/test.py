@@ -59,7 +59,7 @@ def draw():
 
     for point in pointer.clicks(remove_expired=False):
         print(point, end=", ")
-        graphics.line(points=point.points)
+        graphics.trail(point)
 
     mouse_x, mouse_y = pointer.pointer_loc()
 
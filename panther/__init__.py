@@ -2,9 +2,12 @@
 import this to begin
 """
 import os
+import time
 import queue
 import copy
+import itertools
 import threading
+from collections import deque
 from panther import defaults
 from kivy.config import Config
 from kivy.clock import Clock
@@ -18,56 +21,144 @@ except KeyError:
 
 
 class Event:
-    def __init__(self, name, handler, args, kwargs):
+    """
+    An event waiting to be handled, with the handlers subscribed to it when it was triggered
+    """
+    __slots__ = ('name', 'handlers', 'args', 'kwargs', 'key')
+
+    def __init__(self, name, handlers, args, kwargs, key=None):
         self.name = name
-        self.handler = handler
+        self.handlers = handlers
         self.args = args
         self.kwargs = kwargs
+        self.key = key  # set if the event is coalesced, see EventManager.coalesce()
 
     def auto_handle(self):
         """
-        Just execute the handler with raw args and kwargs
-        :return: any
+        Just execute the handlers with raw args and kwargs
+        :return: any, what the last handler returned
         """
-        return self.handler(*self.args, **self.kwargs)
+        result = None
+        for handler in self.handlers:
+            result = handler(*self.args, **self.kwargs)
+
+        return result
 
     def __repr__(self):
-        return f'<Event (name: {self.name}, handler: {self.handler.__name__}, args: {self.args}, kwargs: {self.kwargs})'
+        handlers = ", ".join(handler.__name__ for handler in self.handlers)
+        return f'<Event (name: {self.name}, handlers: ({handlers}), args: {self.args}, kwargs: {self.kwargs})'
+
+
+def _coalesce_touch(touch):
+    return touch.uid
 
 
 class EventManager:
-    events = queue.Queue()
+    events = deque()  # appending and popping from either end of a deque is thread-safe, without a lock
+
+    # how coalesced events with the same name are told apart, by default they're all merged into one
+    coalesce_keys = dict(
+        touchdrag=_coalesce_touch  # merge drags per touch, the touch object is updated in place by kivy anyway
+    )
 
+    # event name: tuple<function>, the subscribers of each event in the order they're called. This is rebuilt from
+    # _subscribers whenever they change, so dispatching an event is just one lookup
     event_handlers = dict(
         #run=defaults.default_run,
-        load=None,  # executed when the canvas first loads
-        update=None,  # executed once every tick
-        draw=None,  # executed once every tick, after update
-        quit=None,  # executed just before the app quits
+        load=(),  # executed when the canvas first loads
+        update=(),  # executed once every tick
+        draw=(),  # executed once every tick, after update
+        quit=(),  # executed just before the app quits
         # pointer
-        mousepos=None,
+        mousepos=(),
 
         # touch
-        touchdown=None,  # executes when a touch or click event occurs
-        touchup=None,  # executes when a touch or click is released
-        touchdrag=None,  # executes when a drag occurs
+        touchdown=(),  # executes when a touch or click event occurs
+        touchup=(),  # executes when a touch or click is released
+        touchdrag=(),  # executes when a drag occurs
+
+        # regions (see panther.pointer.regions), passed (region id, touch)
+        regiondown=(),  # executes when a touch or click occurs on a region
+        regionup=(),  # executes when a touch or click is released on a region
+        regiondrag=(),  # executes when a drag occurs over a region
 
         # keyboard
-        keydown=None,
-        keyup=None,
+        keydown=(),
+        keyup=(),
+
+        # assets (see panther.assets)
+        asset_progress=(),  # executes each time a background image has loaded, passed (images loaded, images to load)
+        assets_ready=(),  # executes once every image asked for has loaded
 
         # window
-        resize=None,
+        resize=(),
 
         # window config
-        window_config_update=defaults.default_window_config_update
+        window_config_update=(defaults.default_window_config_update,)
     )
 
+    # event name: list<tuple<int(priority), int(order subscribed), function> >
+    _subscribers = dict(
+        window_config_update=[(0, 0, defaults.default_window_config_update)]
+    )
+    _order = itertools.count(1)  # subscribers with the same priority are called in the order they subscribed
+
+    _coalescing = dict()  # event name: function(*args, **kwargs) -> hashable or None, see coalesce()
+    _pending = dict()  # tuple<event name, key>: the queued Event for coalesced events
+
     def __init__(self):
         self.kivy_trigger = Clock.create_trigger(self.trigger)
 
-    def add(self, event_name, f, **options):
-        self.event_handlers[event_name] = lambda *args, **kwargs: f(*args, **kwargs)
+    def add(self, event_name, f, priority=0, **options):
+        """
+        subscribe <f> to an event, an event can have any number of subscribers
+        :param event_name: string
+        :param f: function, called with the event's args and kwargs
+        :param priority: int, subscribers with a higher priority are called first
+        :return: None
+        """
+        self._subscribers.setdefault(event_name, []).append((-priority, next(self._order), f))
+        self._compile(event_name)
+
+    def off(self, event_name, f):
+        """
+        unsubscribe <f> from an event
+        :param event_name: string
+        :param f: function, as passed to add() or decorated by on()
+        :return: bool, whether <f> was subscribed
+        """
+        subscribers = self._subscribers.get(event_name, [])
+        for subscriber in subscribers:
+            if subscriber[2] is f:
+                subscribers.remove(subscriber)
+                self._compile(event_name)
+                return True
+
+        return False
+
+    def coalesce(self, event_name, enabled=True, key=None):
+        """
+        only keep the latest queued <event_name> event, instead of handling every one of them, e.g. a fast mouse can
+        trigger lots of 'mousepos' events per frame, which don't need handling once a newer one has arrived. The kept
+        event is handled in the place of the newest one, after any other events triggered before it
+        :param event_name: string
+        :param enabled: bool, False to queue every event again
+        :param key: function(*args, **kwargs) -> hashable, events with different keys are kept separately (e.g. the
+        uid of a touch). Defaults to EventManager.coalesce_keys[event_name] for built-in events
+        :return: None
+        """
+        if enabled:
+            self._coalescing[event_name] = key or self.coalesce_keys.get(event_name)
+        else:
+            self._coalescing.pop(event_name, None)
+
+    def _compile(self, event_name):
+        """
+        rebuild the dispatch tuple of an event from its subscribers
+        :param event_name: string
+        :return: None
+        """
+        self.event_handlers[event_name] = tuple(f for _, _, f in sorted(self._subscribers[event_name]))
 
     def trigger(self, event, *args, **kwargs):
         """
@@ -78,18 +169,24 @@ class EventManager:
         :return: None
         """
         try:
-            exe = self.event_handlers[event]
+            handlers = self.event_handlers[event]
         except KeyError:
             print(f"PANTHER WARNING: {event} is not a valid event handler")
             return
 
-        if exe is not None:  # if there's a registered event handler
-            self.events.put(Event(
-                event,
-                self.event_handlers[event],
-                args,
-                kwargs
-            ))
+        if not handlers:  # if there aren't any registered event handlers
+            return
+
+        if event in self._coalescing:
+            key_func = self._coalescing[event]
+            key = (event, key_func(*args, **kwargs) if key_func else None)
+
+            # the newer event replaces the queued one, and takes its place at the back of the queue so it's still
+            # handled after the events triggered before it. The older one is skipped by drain()
+            pending = self._pending[key] = Event(event, handlers, args, kwargs, key)
+            self.events.append(pending)
+        else:
+            self.events.append(Event(event, handlers, args, kwargs))
 
     def execute(self, event, *args, **kwargs):
         """
@@ -100,18 +197,17 @@ class EventManager:
         :return: None
         """
         try:
-            exe = self.event_handlers[event]
+            handlers = self.event_handlers[event]
         except KeyError:
             print(f"PANTHER WARNING: {event} is not a valid event handler")
             return
 
-        if exe is not None:  # if there's a registered event handler
-            exe(*args, **kwargs)
+        for handler in handlers:
+            handler(*args, **kwargs)
 
     # @function decorators for events
     def subscribe(self, event, **options):
         def decorator(f):
-            ev = event
             self.add(event, f, **options)
             return f
 
@@ -119,12 +215,39 @@ class EventManager:
 
     on = subscribe
 
+    def drain(self, max_events=None, time_budget=None):
+        """
+        get the queued events, oldest first. Events left over when a budget runs out stay queued for the next call
+        :param max_events: int, maximum number of events to get, None for no limit
+        :param time_budget: float, seconds after which to stop getting events (at least one is always got), None for
+        no limit
+        :return: generator<Event>
+        """
+        events = self.events
+        pending = self._pending
+        deadline = None if time_budget is None else time.perf_counter() + time_budget
+        drained = 0
+
+        while events:
+            if max_events is not None and drained >= max_events:
+                return
+            if deadline is not None and drained and time.perf_counter() >= deadline:
+                return
+
+            event = events.popleft()
+            if event.key is not None:
+                if pending.get(event.key) is not event:  # replaced by a newer coalesced event, further back
+                    continue
+                del pending[event.key]
+
+            drained += 1
+            yield event
+
     def __len__(self):
-        return self.events.qsize()
+        return len(self.events)
 
     def __iter__(self):
-        while not self.events.empty():
-            yield self.events.get()
+        return self.drain()
 
 
 events = EventManager()
@@ -142,9 +265,21 @@ class Conf:
     # unchangable after start
     max_fps = 60  # maximum number of ticks (frames) per second. NOTE: this is unlikely to ever be actually hit due to slowness in the system
 
+    # simulation
+    fixed_timestep = None  # seconds, if set update is executed with this dt as many times as needed to keep up with real time, see panther.alpha for interpolating draw
+    max_update_steps = 5  # maximum number of fixed timestep updates per tick, any more time is dropped so a slow machine can't fall ever further behind
+
     # non-window-bound
+    profile = False  # record how long each phase of each frame takes in panther.profiler.profiler
+    profile_overlay = False  # draw the profiler's timings on the screen, needs profile
     clear_every_frame = True
+    max_events_per_frame = None  # maximum number of queued events handled each tick, the rest wait for the next one
+    event_time_budget = None  # seconds per tick to spend handling queued events, the rest wait for the next tick
+    retained_mode = False  # reuse last frame's instructions instead of rebuilding the canvas, needs clear_every_frame
     differentiate_between_touches_and_clicks = False
+    max_pointer_points = None  # only keep the newest points of each pointer's path, None to keep every point
+    pointer_min_distance = 0  # drop drag points closer than this to the last point kept, to simplify pointer paths
+    asset_upload_bytes = 4 * 1024 * 1024  # bytes of images loaded by panther.assets uploaded to textures each tick
 
     def __init__(self):
         #Config.set('graphics', 'width', self.width)
@@ -210,6 +345,67 @@ _loop_thread = None
 _draw_queue = queue.Queue()  # contains: Drawable
 
 
+_accumulator = 0  # time not yet simulated by fixed timestep updates
+# with conf.fixed_timestep, how far (0 to 1) this frame is between the last update and the next one, so draw can
+# interpolate positions between them. Always 1 without a fixed timestep (draw shows the latest update)
+alpha = 1.0
+
+
+def _tick(dt):
+    """
+    run one frame: update (zero or more times, with conf.fixed_timestep), then draw
+    :param dt: float, seconds since the last frame
+    :return: None
+    """
+    global _accumulator, alpha
+
+    from panther import assets, graphics, key, pointer
+    from panther.profiler import profiler
+
+    profile = conf.profile
+    if profile:
+        start = time.perf_counter()
+
+    # publish the input handled since the last tick, update and draw only see this snapshot
+    key._swap()
+    pointer._swap()
+    assets.manager._update()  # images loaded in the background since the last tick
+
+    step = conf.fixed_timestep
+    if step:
+        _accumulator += dt
+        steps = 0
+        while _accumulator >= step and steps < conf.max_update_steps:
+            events.execute('update', step)
+            _accumulator -= step
+            steps += 1
+
+        _accumulator %= step  # drop whatever couldn't be caught up on
+        alpha = _accumulator / step
+    else:
+        _accumulator = 0
+        alpha = 1.0
+        events.execute('update', dt)
+
+    if profile:
+        updated = time.perf_counter()
+
+    graphics._begin_frame()  # clears the canvas, unless retained mode is on
+
+    if profile:
+        cleared = time.perf_counter()
+
+    events.execute('draw')
+    if profile and conf.profile_overlay:
+        profiler.draw_overlay()
+    graphics._end_frame()
+
+    if profile:
+        profiler.record(
+            start, updated - start, cleared - updated, time.perf_counter() - cleared, graphics._instructions_added
+        )
+
+
 def create_app():
     """
     this runs in a new thread
@@ -226,15 +422,9 @@ def create_app():
     def load_event(dt):
         events.execute('load')
 
-    def update_event(dt):
-        events.execute('update', dt)
-        if conf.clear_every_frame:
-            canvas.clear()
-        events.execute('draw')
-
     Clock.schedule_once(load_event)
 
-    update_event = Clock.schedule_interval(update_event, 1 / conf.max_fps)
+    update_event = Clock.schedule_interval(_tick, 1 / conf.max_fps)
     event_checker = Clock.schedule_interval(defaults.default_event_parse, 1/conf.max_fps)
 
 
@@ -0,0 +1,213 @@
+"""
+Loading images in the background, so a level's images can be streamed in without dropping frames. Images are decoded
+by Pillow on a pool of worker threads (or processes), then uploaded to textures on the main thread a few rows at a time
+each frame (see Conf.asset_upload_bytes), and put in panther.graphics.textures, where graphics.image() finds them:
+
+@panther.events.on('assets_ready')
+def start_level():
+    ...
+
+panther.assets.manager.load_manifest("levels/2.json")
+"""
+import json
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import panther
+from panther import graphics
+
+
+def _decode(src):
+    """
+    runs on a worker, Pillow releases the GIL while it decodes
+    :param src: string, location of the image
+    :return: tuple<int(width), int(height), bytearray(rgba, top row first)>
+    """
+    from PIL import Image
+
+    with Image.open(src) as im:
+        im = im.convert('RGBA')
+        return im.width, im.height, bytearray(im.tobytes())  # kivy can only blit slices of writable buffers
+
+
+class _Upload:
+    __slots__ = ('src', 'mipmap', 'width', 'height', 'pixels', 'error', 'texture', 'row')
+
+    def __init__(self, src, mipmap):
+        self.src = src
+        self.mipmap = mipmap
+        self.width = self.height = 0
+        self.pixels = None  # bytearray, rgba, top row first
+        self.error = None  # Exception, if the image couldn't be decoded
+        self.texture = None
+        self.row = 0  # rows uploaded so far
+
+
+class AssetManager:
+    """
+    Loads images in the background. Executes the 'asset_progress' event, passed (images loaded, images to load), each
+    time an image has been loaded, and the 'assets_ready' event once every image asked for has been
+    """
+    def __init__(self, workers=None, processes=False):
+        """
+        :param workers: int, number of images decoded at once, None for the executor's default
+        :param processes: bool, decode in worker processes instead of threads. Only worth it for large numbers of
+        images in formats Pillow holds the GIL while decoding
+        """
+        self.workers = workers
+        self.processes = processes
+
+        self.loaded = 0  # images loaded since the manager was last ready
+        self.total = 0  # images asked for since the manager was last ready
+
+        self._executor = None
+        self._queued = set()  # tuple<src, mipmap> of every image being loaded
+        self._decoded = deque()  # _Upload, appended to by the workers' callbacks (so thread-safe, like events.events)
+        self._uploading = None  # _Upload, the image being uploaded
+        self._waiting = False  # whether 'assets_ready' is yet to be executed for the images asked for
+
+    @property
+    def progress(self):
+        """
+        :return: float, 0 to 1, how much of what was asked for has been loaded
+        """
+        return self.loaded / self.total if self.total else 1.0
+
+    @property
+    def ready(self):
+        """
+        :return: bool, whether every image asked for has been loaded
+        """
+        return self.loaded == self.total
+
+    def load(self, *srcs, mipmap=False):
+        """
+        start loading images in the background. Images which are already loaded (or loading) are skipped
+        :param srcs: tuple<string>, locations of images, as they will be passed to graphics.image()
+        :param mipmap: bool
+        :return: int, the number of images which started loading
+        """
+        if self._executor is None:
+            executor = ProcessPoolExecutor if self.processes else ThreadPoolExecutor
+            self._executor = executor(self.workers)
+
+        started = 0
+        for src in srcs:
+            key = (src, mipmap)
+            if key in self._queued or key in graphics.textures:
+                continue
+
+            upload = _Upload(src, mipmap)
+            future = self._executor.submit(_decode, src)
+            future.add_done_callback(lambda done, upload=upload: self._done(upload, done))
+            self._queued.add(key)
+            started += 1
+
+        self.total += started
+        self._waiting = True  # even if everything was already loaded, so 'assets_ready' can always be waited for
+
+        return started
+
+    def load_manifest(self, path, mipmap=False):
+        """
+        start loading every image listed in a JSON manifest in the background
+        :param path: string, location of a JSON file, either a list of image locations or an object with an "images"
+        list (and optionally a "mipmap" list, of images to load with mipmaps)
+        :param mipmap: bool, default for images in a plain list
+        :return: int, the number of images which started loading
+        """
+        with open(path) as f:
+            manifest = json.load(f)
+
+        if isinstance(manifest, dict):
+            return self.load(*manifest.get("images", ()), mipmap=mipmap) + \
+                self.load(*manifest.get("mipmap", ()), mipmap=True)
+
+        return self.load(*manifest, mipmap=mipmap)
+
+    def shutdown(self):
+        """
+        stop the workers, images which haven't started decoding aren't loaded
+        :return: None
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _done(self, upload, future):
+        # called on a worker thread (or the main thread if the future had already finished)
+        if future.cancelled():
+            return
+
+        try:
+            upload.width, upload.height, upload.pixels = future.result()
+        except Exception as e:
+            upload.error = e
+
+        self._decoded.append(upload)
+
+    def _update(self):
+        """
+        called by panther every tick: uploads up to Conf.asset_upload_bytes of decoded images to textures
+        :return: None
+        """
+        if self._uploading is None and not self._decoded and not (self._waiting and self.ready):
+            return
+
+        budget = panther.conf.asset_upload_bytes
+        while True:
+            upload = self._uploading
+            if upload is None:
+                if not self._decoded:
+                    break
+                upload = self._uploading = self._decoded.popleft()
+
+            if upload.error is None:
+                if budget <= 0:
+                    break
+                budget -= self._upload_rows(upload, budget)
+                if upload.row < upload.height:
+                    break
+            else:
+                print(f"PANTHER WARNING: couldn't load {upload.src}: {upload.error}")
+
+            self._uploading = None
+            self._queued.discard((upload.src, upload.mipmap))
+            self.loaded += 1
+            panther.events.execute('asset_progress', self.loaded, self.total)
+
+        if self._waiting and self.ready:
+            self.loaded = self.total = 0
+            self._waiting = False
+            panther.events.execute('assets_ready')
+
+    @staticmethod
+    def _upload_rows(upload, budget):
+        """
+        upload as many rows of an image as fit in <budget> (at least one), putting it in the texture cache once it's
+        all uploaded
+        :param upload: _Upload
+        :param budget: int, bytes
+        :return: int, bytes uploaded
+        """
+        textures = graphics.textures
+        if upload.texture is None:
+            upload.texture = textures._create(upload.src, upload.width, upload.height, upload.mipmap)
+            upload.texture.flip_vertical()  # stored top row first, like the images kivy loads under the same key
+
+        row_bytes = upload.width * 4
+        start = upload.row
+        rows = min(upload.height - start, max(budget // row_bytes, 1))
+        end = start + rows
+
+        pixels = memoryview(upload.pixels)[start * row_bytes:end * row_bytes]
+        textures._blit(upload.texture, pixels, start, rows, end == upload.height)
+        upload.row = end
+
+        if end == upload.height:
+            textures.put((upload.src, upload.mipmap), upload.texture)
+            upload.pixels = None
+
+        return rows * row_bytes
+
+
+manager = AssetManager()  # used by panther's tick, load images with manager.load() or manager.load_manifest()
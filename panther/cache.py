@@ -0,0 +1,244 @@
+"""
+Size-bounded caches for things which are too expensive to recreate every frame (e.g. textures)
+"""
+from collections import OrderedDict
+from kivy.core.image import Image as CoreImage
+from kivy.core.text import Label as CoreLabel
+from kivy.graphics.texture import Texture
+
+_BYTES_PER_PIXEL = dict(
+    rgba=4,
+    bgra=4,
+    rgb=3,
+    bgr=3,
+    luminance_alpha=2,
+    luminance=1,
+    alpha=1
+)
+
+
+def texture_bytes(texture):
+    """
+    estimate how much memory a texture uses
+    :param texture: kivy.graphics.texture.Texture
+    :return: int, size in bytes
+    """
+    size = texture.width * texture.height * _BYTES_PER_PIXEL.get(texture.colorfmt, 4)
+
+    if texture.mipmap:
+        size = size * 4 // 3  # each mipmap level is a quarter of the size of the one before it
+
+    return size
+
+
+class LRUCache:
+    """
+    A least-recently-used cache with a budget in bytes.
+    When the budget is exceeded, the least recently used items are evicted until it fits again
+    """
+    def __init__(self, max_bytes, sizeof):
+        """
+        :param max_bytes: int, budget in bytes, can be changed at any time
+        :param sizeof: function(value) -> int, the size of a value in bytes
+        """
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._items = OrderedDict()  # key: tuple<value, int(size)>
+
+    def get(self, key, default=None):
+        """
+        get an item, marking it as recently used
+        :param key: hashable
+        :param default: any, returned (and counted as a miss) if <key> isn't cached
+        :return: any
+        """
+        try:
+            value = self._items[key][0]
+        except KeyError:
+            self.misses += 1
+            return default
+
+        self._items.move_to_end(key)
+        self.hits += 1
+
+        return value
+
+    def put(self, key, value):
+        """
+        add an item, evicting the least recently used items if the cache is over budget
+        :param key: hashable
+        :param value: any
+        :return: any, <value>
+        """
+        if key in self._items:
+            self.bytes -= self._items.pop(key)[1]
+
+        size = self.sizeof(value)
+        self._items[key] = (value, size)
+        self.bytes += size
+
+        self._trim()
+
+        return value
+
+    def evict(self, key):
+        """
+        remove an item from the cache
+        :param key: hashable
+        :return: bool, whether the item was cached
+        """
+        try:
+            self.bytes -= self._items.pop(key)[1]
+        except KeyError:
+            return False
+
+        self.evictions += 1
+
+        return True
+
+    def clear(self):
+        """
+        remove everything from the cache
+        :return: None
+        """
+        self.evictions += len(self._items)
+        self._items.clear()
+        self.bytes = 0
+
+    def stats(self):
+        """
+        get the cache's counters, useful for choosing max_bytes
+        :return: dict<str, int>
+        """
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            items=len(self._items),
+            bytes=self.bytes,
+            max_bytes=self.max_bytes
+        )
+
+    def _trim(self):
+        # always keep the newest item, even if it's bigger than the whole budget
+        while self.bytes > self.max_bytes and len(self._items) > 1:
+            self.bytes -= self._items.popitem(last=False)[1][1]
+            self.evictions += 1
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+
+class TextureCache(LRUCache):
+    """
+    Process-wide cache of image textures, keyed by path and load options
+    """
+    def __init__(self, max_bytes):
+        super().__init__(max_bytes, texture_bytes)
+
+    def texture(self, src, mipmap=False):
+        """
+        get the texture of the image at <src>, loading it if it isn't cached
+        :param src: string, location of image to load
+        :param mipmap: bool
+        :return: kivy.graphics.texture.Texture
+        """
+        key = (src, mipmap)
+
+        texture = self.get(key)
+        if texture is None:
+            texture = self.put(key, self._load(src, mipmap))
+
+        return texture
+
+    def preload(self, *srcs, mipmap=False):
+        """
+        load images into the cache ahead of time, so the first frame which draws them doesn't have to
+        :param srcs: tuple<string>, locations of images to load
+        :param mipmap: bool
+        :return: None
+        """
+        for src in srcs:
+            if (src, mipmap) not in self:
+                self.put((src, mipmap), self._load(src, mipmap))
+
+    def evict_image(self, src, mipmap=None):
+        """
+        remove the image at <src> from the cache, e.g. after the file has changed
+        :param src: string, location of the image
+        :param mipmap: bool, None to remove it whether or not it was loaded with mipmaps
+        :return: bool, whether the image was cached
+        """
+        if mipmap is not None:
+            return self.evict((src, mipmap))
+
+        evicted = self.evict((src, False))
+        return self.evict((src, True)) or evicted
+
+    @staticmethod
+    def _load(src, mipmap):
+        # nocache: kivy's own image cache would hold a second, unbudgeted, copy
+        return CoreImage(src, mipmap=mipmap, nocache=True).texture
+
+    @staticmethod
+    def _create(src, width, height, mipmap):
+        # an empty texture for an image decoded somewhere else (see panther.assets), filled in by _blit()
+        return Texture.create(size=(width, height), colorfmt='rgba', mipmap=mipmap)
+
+    @staticmethod
+    def _blit(texture, pixels, y, rows, last, x=0, width=None):
+        """
+        upload some rows of an image to a texture from _create()
+        :param texture: kivy.graphics.texture.Texture
+        :param pixels: writable bytes-like, rgba, in the order the texture stores its rows (bottom row first, unless it
+        has been flipped with flip_vertical())
+        :param y: int, the first row
+        :param rows: int, number of rows
+        :param last: bool, whether these are the last rows of the image, when the mipmaps are made
+        :param x: int, the first column
+        :param width: int, number of columns, None for the texture's width
+        :return: None
+        """
+        texture.blit_buffer(
+            pixels, size=(texture.width if width is None else width, rows), colorfmt='rgba', pos=(x, y),
+            bufferfmt='ubyte', mipmap_generation=last and texture.mipmap
+        )
+
+
+class LabelCache(LRUCache):
+    """
+    Cache of rendered text, keyed by the text and its panther.graphics.TextStyle
+    """
+    def __init__(self, max_bytes):
+        super().__init__(max_bytes, texture_bytes)
+
+    def texture(self, text, style):
+        """
+        get the texture of <text> rendered in <style>, rendering it if it isn't cached
+        :param text: string
+        :param style: panther.graphics.TextStyle
+        :return: kivy.graphics.texture.Texture
+        """
+        key = (text, style)
+
+        texture = self.get(key)
+        if texture is None:
+            texture = self.put(key, self._render(text, style))
+
+        return texture
+
+    @staticmethod
+    def _render(text, style):
+        label = CoreLabel(text, **style.style)
+        label.refresh()
+
+        return label.texture
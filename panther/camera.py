@@ -0,0 +1,131 @@
+"""
+Cameras: scroll, zoom and rotate the world with one matrix per frame, optionally drawing into a clipped part of the
+screen (e.g. for split screen or a minimap). While a camera is in use, graphics calls for shapes which are outside
+what it can see are skipped before any instruction is made
+"""
+from math import cos, sin, radians
+import numpy as np
+from kivy.graphics import MatrixInstruction, PopMatrix, PushMatrix, ScissorPop, ScissorPush
+from kivy.graphics.transformation import Matrix
+import panther
+from panther import graphics
+
+
+class _CameraMatrix(MatrixInstruction):
+    """
+    MatrixInstruction ignores a matrix passed to it when it's made, so it can't be made by graphics._instruction()
+    """
+    def __init__(self, matrix=None, **kwargs):
+        super().__init__(**kwargs)
+        if matrix is not None:
+            self.matrix = matrix
+
+
+class Camera:
+    """
+    Draw the world through a camera by drawing inside a with block, anything drawn outside it (e.g. a HUD) isn't moved:
+
+    camera = Camera(zoom=2)
+
+    @panther.events.on('draw')
+    def draw():
+        camera.x, camera.y = player_x, player_y
+        with camera:
+            graphics.rectangle(...)
+    """
+    def __init__(self, x=0, y=0, zoom=1, rotation=0, viewport=None):
+        """
+        :param x: number, x co-ord of the point of the world shown at the centre of the viewport
+        :param y: number, y co-ord of the point of the world shown at the centre of the viewport
+        :param zoom: number, how many times bigger the world is drawn
+        :param rotation: number, degrees the camera is turned anticlockwise (the world appears turned clockwise)
+        :param viewport: tuple<x, y, width, height>, the part of the screen to draw in, anything drawn outside it is
+        clipped off. None for the whole canvas
+        """
+        self.x, self.y = x, y
+        self.zoom = zoom
+        self.rotation = rotation
+        self.viewport = viewport
+
+    def screen_rect(self):
+        """
+        :return: tuple<x, y, width, height>, the part of the screen the camera draws in
+        """
+        if self.viewport is not None:
+            return self.viewport
+
+        x, y = panther.canvas.pos
+        width, height = panther.canvas.size
+        return x, y, width, height
+
+    def matrix(self):
+        """
+        :return: numpy.ndarray<float64>, shape (3, 3), transforms world co-ords to screen co-ords
+        """
+        x, y, width, height = self.screen_rect()
+        angle = radians(-self.rotation)
+        c, s = cos(angle) * self.zoom, sin(angle) * self.zoom
+
+        # move the camera's position to the origin, scale and rotate about it, then move it to the viewport's centre
+        return np.array((
+            (c, -s, x + width / 2 - c * self.x + s * self.y),
+            (s, c, y + height / 2 - s * self.x - c * self.y),
+            (0, 0, 1)
+        ))
+
+    def world_to_screen(self, x, y):
+        """
+        :param x: number, x co-ord in the world
+        :param y: number, y co-ord in the world
+        :return: tuple<x, y>, screen co-ords
+        """
+        screen = self.matrix() @ (x, y, 1)
+        return float(screen[0]), float(screen[1])
+
+    def screen_to_world(self, x, y):
+        """
+        e.g. to find what a pointer is over
+        :param x: number, x co-ord on the screen
+        :param y: number, y co-ord on the screen
+        :return: tuple<x, y>, world co-ords
+        """
+        world = np.linalg.inv(self.matrix()) @ (x, y, 1)
+        return float(world[0]), float(world[1])
+
+    def visible_rect(self):
+        """
+        :return: tuple<x, y, width, height>, the smallest rectangle of the world containing everything the camera sees
+        """
+        x, y, width, height = self.screen_rect()
+        corners = np.linalg.inv(self.matrix()) @ np.array((
+            (x, x + width, x + width, x),
+            (y, y, y + height, y + height),
+            (1, 1, 1, 1)
+        ))
+        (x0, y0), (x1, y1) = corners[:2].min(axis=1), corners[:2].max(axis=1)
+
+        return float(x0), float(y0), float(x1 - x0), float(y1 - y0)
+
+    def __enter__(self):
+        if self.viewport is not None:
+            x, y, width, height = (int(v) for v in self.viewport)
+            graphics._instruction(ScissorPush, x=x, y=y, width=width, height=height)
+
+        (a, b, tx), (c, d, ty), _ = self.matrix()
+        matrix = Matrix()
+        matrix.set(flat=[a, c, 0, 0, b, d, 0, 0, 0, 0, 1, 0, tx, ty, 0, 1])  # column major
+
+        graphics._instruction(PushMatrix)
+        graphics._instruction(_CameraMatrix, matrix=matrix)
+
+        x, y, width, height = self.visible_rect()
+        graphics._push_view((x, y, x + width, y + height), self.zoom)
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        graphics._pop_view()
+        graphics._instruction(PopMatrix)
+
+        if self.viewport is not None:
+            graphics._instruction(ScissorPop)
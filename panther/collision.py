@@ -0,0 +1,403 @@
+"""
+Collision detection for many shapes at once: a broadphase over a uniform grid of the shapes' bounding boxes finds the
+pairs which might be touching, then a batch narrowphase checks those pairs exactly. Shapes match what
+panther.graphics draws: rectangles (bottom left corner, width, height), circles and ellipses (centre, size) and
+convex polygons (points)
+"""
+from math import pi
+import numpy as np
+
+RECTANGLE = 0
+CIRCLE = 1
+POLYGON = 2
+
+_ELLIPSE_SEGMENTS = 24  # ellipses which aren't circles are collided as polygons with this many sides
+_MAX_CELLS = 64  # shapes covering more grid cells than this are checked against every shape instead
+_CELL_ROW = 1 << 32  # grid cells are numbered x * _CELL_ROW + y
+
+
+def _overlap(a, b):
+    # whether bounding boxes (min x, min y, max x, max y) overlap
+    return (a[..., 0] <= b[..., 2]) & (b[..., 0] <= a[..., 2]) & (a[..., 1] <= b[..., 3]) & (b[..., 1] <= a[..., 3])
+
+
+def rectangles_overlap(ax, ay, aw, ah, bx, by, bw, bh):
+    """
+    :params: array-like<number>, the bottom left corners, widths and heights of pairs of rectangles
+    :return: numpy.ndarray<bool>, whether each pair overlaps
+    """
+    return (ax <= bx + bw) & (bx <= ax + aw) & (ay <= by + bh) & (by <= ay + ah)
+
+
+def circles_overlap(ax, ay, ar, bx, by, br):
+    """
+    :params: array-like<number>, the centres and radii of pairs of circles
+    :return: numpy.ndarray<bool>, whether each pair overlaps
+    """
+    dx = np.subtract(ax, bx)
+    dy = np.subtract(ay, by)
+    r = np.add(ar, br)
+
+    return dx * dx + dy * dy <= r * r
+
+
+def rectangle_circle_overlap(x, y, w, h, cx, cy, r):
+    """
+    :params: array-like<number>, the bottom left corners, widths and heights of rectangles, and the centres and radii
+    of the circles paired with them
+    :return: numpy.ndarray<bool>, whether each pair overlaps
+    """
+    dx = cx - np.clip(cx, x, np.add(x, w))  # from the closest point of the rectangle to the centre
+    dy = cy - np.clip(cy, y, np.add(y, h))
+
+    return dx * dx + dy * dy <= np.multiply(r, r)
+
+
+def polygons_overlap(a, b):
+    """
+    separating axis test of two convex polygons
+    :param a: numpy.ndarray, shape (n, 2), points of the first polygon, in order
+    :param b: numpy.ndarray, shape (m, 2), points of the second polygon, in order
+    :return: bool
+    """
+    for points in (a, b):
+        edges = np.roll(points, -1, axis=0) - points
+        axes = np.stack((-edges[:, 1], edges[:, 0]), axis=1)
+
+        proj_a = a @ axes.T
+        proj_b = b @ axes.T
+        if np.any((proj_a.max(axis=0) < proj_b.min(axis=0)) | (proj_b.max(axis=0) < proj_a.min(axis=0))):
+            return False
+
+    return True
+
+
+def polygon_circle_overlap(points, cx, cy, r):
+    """
+    separating axis test of a convex polygon and a circle
+    :param points: numpy.ndarray, shape (n, 2), points of the polygon, in order
+    :param cx: number, x co-ord of the circle's centre
+    :param cy: number, y co-ord of the circle's centre
+    :param r: number, radius of the circle
+    :return: bool
+    """
+    centre = np.array((cx, cy))
+    edges = np.roll(points, -1, axis=0) - points
+    closest = points[np.argmin(((points - centre) ** 2).sum(axis=1))]
+    axes = np.vstack((np.stack((-edges[:, 1], edges[:, 0]), axis=1), closest - centre))
+
+    lengths = np.hypot(axes[:, 0], axes[:, 1])
+    axes = axes[lengths > 0] / lengths[lengths > 0, None]
+
+    proj = points @ axes.T
+    proj_centre = axes @ centre
+
+    return not np.any((proj.max(axis=0) < proj_centre - r) | (proj_centre + r < proj.min(axis=0)))
+
+
+def _rectangle_points(x, y, w, h):
+    return np.array(((x, y), (x + w, y), (x + w, y + h), (x, y + h)), dtype=np.float64)
+
+
+class Colliders:
+    """
+    A set of shapes to detect collisions between, in a uniform grid (spatial hash). Each shape has an id which stays
+    the same until it's removed, moving shapes only updates their bounding boxes, and the grid's sort order from the
+    last call to pairs() is reused, so finding the pairs each tick is close to linear in the number of shapes.
+
+    colliders = Colliders()
+    ids = colliders.add_circles(xs, ys, 5)
+    colliders.move(ids, xs, ys)
+    a, b = colliders.collisions()
+    """
+    def __init__(self, capacity=1024, cell_size=None):
+        """
+        :param capacity: int, number of shapes to make room for up front, grows as needed
+        :param cell_size: number, size of the cells of the grid, None to use twice the median size of the shapes
+        """
+        self._kind = np.zeros(capacity, dtype=np.int8)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._bounds = np.zeros((capacity, 4), dtype=np.float64)  # min x, min y, max x, max y
+        self._size = np.zeros((capacity, 2), dtype=np.float64)  # width and height, for rectangles and circles
+        self._polygons = {}  # id: numpy.ndarray, points relative to the bottom left of the bounding box
+        self._free = []
+        self._next_id = 0
+
+        self.cell_size = cell_size
+        self._cell = 1.0  # cell size picked automatically when cell_size is None
+        self._entries = None  # tuple<owner, k, cell size, cells covered by each shape> of the grid from the last pairs()
+
+    def add_rectangles(self, xs, ys, widths, heights):
+        """
+        :param xs: array-like<number>, x co-ords of the bottom left corners
+        :param ys: array-like<number>, y co-ords of the bottom left corners
+        :param widths: array-like<number> or number
+        :param heights: array-like<number> or number
+        :return: numpy.ndarray<intp>, ids
+        """
+        ids = self._new(len(xs), RECTANGLE)
+        self._size[ids, 0] = widths
+        self._size[ids, 1] = heights
+        self.move(ids, xs, ys)
+
+        return ids
+
+    def add_circles(self, xs, ys, radii):
+        """
+        :param xs: array-like<number>, x co-ords of the centres
+        :param ys: array-like<number>, y co-ords of the centres
+        :param radii: array-like<number> or number
+        :return: numpy.ndarray<intp>, ids
+        """
+        ids = self._new(len(xs), CIRCLE)
+        self._size[ids] = np.multiply(radii, 2)[..., None]
+        self.move(ids, xs, ys)
+
+        return ids
+
+    def add_rectangle(self, x, y, width, height):
+        """
+        like panther.graphics.rectangle()
+        :return: int, id
+        """
+        return int(self.add_rectangles([x], [y], width, height)[0])
+
+    def add_circle(self, x, y, radius):
+        """
+        like panther.graphics.circle()
+        :return: int, id
+        """
+        return int(self.add_circles([x], [y], radius)[0])
+
+    def add_ellipse(self, x, y, size_x, size_y):
+        """
+        like panther.graphics.ellipse(), ellipses which aren't circles are collided as polygons
+        :return: int, id
+        """
+        if size_x == size_y:
+            return self.add_circle(x, y, size_x / 2)
+
+        angles = np.linspace(0, 2 * pi, _ELLIPSE_SEGMENTS, endpoint=False)
+        return self.add_polygon(*zip(x + np.cos(angles) * size_x / 2, y + np.sin(angles) * size_y / 2))
+
+    def add_polygon(self, *points):
+        """
+        like panther.graphics.polygon(), the polygon must be convex
+        :param points: tuple<tuple<x, y> >
+        :return: int, id
+        """
+        points = np.asarray(points, dtype=np.float64)
+        low = points.min(axis=0)
+
+        entity_id = int(self._new(1, POLYGON)[0])
+        self._polygons[entity_id] = points - low
+        self._size[entity_id] = points.max(axis=0) - low
+        self._set_bounds([entity_id], [low[0]], [low[1]])
+
+        return entity_id
+
+    def move(self, ids, xs, ys):
+        """
+        move shapes to new positions, in the same terms they were added in (the centre for circles, the bottom left
+        corner for rectangles and the bottom left of the bounding box for polygons)
+        :param ids: array-like<int>
+        :param xs: array-like<number>
+        :param ys: array-like<number>
+        :return: None
+        """
+        ids = np.asarray(ids, dtype=np.intp)
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+
+        circle = self._kind[ids] == CIRCLE
+        if circle.any():
+            radii = self._size[ids, 0] / 2
+            xs = np.where(circle, xs - radii, xs)
+            ys = np.where(circle, ys - radii, ys)
+
+        self._set_bounds(ids, xs, ys)
+
+    def remove(self, ids):
+        """
+        :param ids: int or array-like<int>, ids which have already been removed (or repeated) are ignored, so an id is
+        never handed out twice by later adds
+        :return: None
+        """
+        ids = np.unique(np.asarray(ids, dtype=np.intp))
+        ids = ids[self._alive[ids]]
+        self._alive[ids] = False
+        for entity_id in ids.tolist():
+            self._polygons.pop(entity_id, None)
+        self._free.extend(ids.tolist())
+
+    def bounds(self, ids):
+        """
+        :param ids: int or array-like<int>
+        :return: numpy.ndarray<float64>, min x, min y, max x, max y of each shape
+        """
+        return self._bounds[ids]
+
+    def pairs(self):
+        """
+        find every pair of shapes whose bounding boxes overlap
+        :return: tuple<numpy.ndarray<intp>, numpy.ndarray<intp> >, ids of the first and second shape of each pair
+        """
+        n = self._next_id
+        bounds = self._bounds[:n]
+        alive = self._alive[:n]
+
+        cell = self.cell_size or self._cell
+        low, counts = self._cells(bounds, alive, cell)
+        if self._entries is None or self._entries[2] != cell or not np.array_equal(self._entries[3], counts):
+            if not self.cell_size:
+                cell = self._cell = self._auto_cell_size(bounds, alive)
+                low, counts = self._cells(bounds, alive, cell)
+            self._entries = None
+        covered = counts.copy()
+        large = counts > _MAX_CELLS
+        counts[large] = 0  # large shapes aren't put in the grid, they're checked against every shape instead
+        wide = np.floor(bounds[:, 2] / cell).astype(np.int64) - low[:, 0] + 1
+
+        if self._entries is None:
+            # each shape has an entry for each cell its bounding box covers, the kth entry of a shape is the cell
+            # k % wide[shape] across and k // wide[shape] up from the shape's lowest cell
+            owner = np.repeat(np.arange(n), counts)
+            k = np.arange(len(owner)) - np.repeat(np.cumsum(counts) - counts, counts)
+        else:
+            # the same entries as last time, still in last time's order: when shapes have only moved a little, most
+            # are still sorted, and the stable sort (timsort) below is close to linear
+            owner, k = self._entries[:2]
+
+        keys = (low[owner, 0] + k % wide[owner]) * _CELL_ROW + low[owner, 1] + k // wide[owner]
+        order = np.argsort(keys, kind='stable')
+        owner, k, keys = owner[order], k[order], keys[order]
+        self._entries = (owner, k, cell, covered)
+
+        # every pair of entries in the same cell
+        entries = len(keys)
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if entries else np.empty(0, dtype=np.intp)
+        ends = np.r_[starts[1:], entries]
+        partners = np.repeat(ends, ends - starts) - np.arange(entries) - 1
+        first = np.repeat(np.arange(entries), partners)
+        second = first + 1 + np.arange(len(first)) - np.repeat(np.cumsum(partners) - partners, partners)
+        a, b = owner[first], owner[second]
+
+        # only keep each pair in one cell: the one with the bottom left corner of where the two overlap
+        ba, bb = bounds[a], bounds[b]
+        corner = np.floor(np.maximum(ba[:, :2], bb[:, :2]) / cell).astype(np.int64)
+        keep = _overlap(ba, bb) & (corner[:, 0] * _CELL_ROW + corner[:, 1] == keys[first])
+        a, b = [a[keep]], [b[keep]]
+
+        for i in np.flatnonzero(large & alive):
+            others = np.flatnonzero(alive & ((np.arange(n) > i) | ~large))
+            hit = others[_overlap(bounds[i], bounds[others])]
+            a.append(np.full(len(hit), i))
+            b.append(hit)
+
+        return np.concatenate(a).astype(np.intp), np.concatenate(b).astype(np.intp)
+
+    @staticmethod
+    def _cells(bounds, alive, cell):
+        low = np.floor(bounds[:, :2] / cell).astype(np.int64)
+        high = np.floor(bounds[:, 2:] / cell).astype(np.int64)
+        counts = (high - low + 1).prod(axis=1)
+        counts[~alive] = 0
+
+        return low, counts
+
+    @staticmethod
+    def _auto_cell_size(bounds, alive):
+        sizes = (bounds[alive, 2:] - bounds[alive, :2]).max(axis=1)
+        return max(float(np.median(sizes)) * 2, 1.0) if len(sizes) else 1.0
+
+    def collisions(self):
+        """
+        find every pair of shapes which are touching
+        :return: tuple<numpy.ndarray<intp>, numpy.ndarray<intp> >, ids of the first and second shape of each pair
+        """
+        a, b = self.pairs()
+
+        # order each pair so the first shape is the kind with the lower number
+        swap = self._kind[a] > self._kind[b]
+        a, b = np.where(swap, b, a), np.where(swap, a, b)
+        kind_a, kind_b = self._kind[a], self._kind[b]
+
+        hit = np.ones(len(a), dtype=bool)  # rectangle-rectangle pairs are hits when their bounds overlap
+
+        both = (kind_a == CIRCLE) & (kind_b == CIRCLE)
+        if both.any():
+            ca, cb = self._circles(a[both]), self._circles(b[both])
+            hit[both] = circles_overlap(*ca, *cb)
+
+        mixed = (kind_a == RECTANGLE) & (kind_b == CIRCLE)
+        if mixed.any():
+            bounds = self._bounds[a[mixed]]
+            hit[mixed] = rectangle_circle_overlap(
+                bounds[:, 0], bounds[:, 1], bounds[:, 2] - bounds[:, 0], bounds[:, 3] - bounds[:, 1],
+                *self._circles(b[mixed])
+            )
+
+        for i in np.flatnonzero(kind_b == POLYGON):
+            hit[i] = self._polygon_overlap(a[i], b[i])
+
+        return a[hit], b[hit]
+
+    def _circles(self, ids):
+        bounds = self._bounds[ids]
+        r = self._size[ids, 0] / 2
+
+        return bounds[:, 0] + r, bounds[:, 1] + r, r
+
+    def _points(self, entity_id):
+        x, y = self._bounds[entity_id, :2]
+        if self._kind[entity_id] == POLYGON:
+            return self._polygons[entity_id] + (x, y)
+
+        return _rectangle_points(x, y, *self._size[entity_id])
+
+    def _polygon_overlap(self, a, b):
+        if self._kind[a] == CIRCLE:
+            (cx,), (cy,), (r,) = self._circles([a])
+            return polygon_circle_overlap(self._points(b), cx, cy, r)
+
+        return polygons_overlap(self._points(a), self._points(b))
+
+    def _set_bounds(self, ids, xs, ys):
+        self._bounds[ids, 0] = xs
+        self._bounds[ids, 1] = ys
+        self._bounds[ids, 2] = self._bounds[ids, 0] + self._size[ids, 0]
+        self._bounds[ids, 3] = self._bounds[ids, 1] + self._size[ids, 1]
+
+    def _new(self, n, kind):
+        reused = min(n, len(self._free))
+        ids = np.empty(n, dtype=np.intp)
+        if reused:
+            ids[:reused] = self._free[-reused:]
+            del self._free[-reused:]
+        ids[reused:] = np.arange(self._next_id, self._next_id + n - reused)
+
+        self._next_id += n - reused
+        self._reserve(self._next_id)
+
+        self._kind[ids] = kind
+        self._alive[ids] = True
+
+        return ids
+
+    def _reserve(self, n):
+        capacity = len(self._kind)
+        if n <= capacity:
+            return
+
+        capacity = max(n, capacity * 2)
+        for name in ('_kind', '_alive', '_bounds', '_size'):
+            old = getattr(self, name)
+            grown = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            grown[:len(old)] = old
+            setattr(self, name, grown)
+
+    def __contains__(self, entity_id):
+        return 0 <= entity_id < self._next_id and bool(self._alive[entity_id])
+
+    def __len__(self):
+        return int(np.count_nonzero(self._alive))
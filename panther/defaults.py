@@ -1,6 +1,14 @@
+import time
+
+
 def default_event_parse(dt):
     import panther
-    for event in panther.events:
+
+    profile = panther.conf.profile
+    if profile:
+        start = time.perf_counter()
+
+    for event in panther.events.drain(panther.conf.max_events_per_frame, panther.conf.event_time_budget):
         if event.name == "quit":
             print("PANTHER: quitting...")
             event.auto_handle()  # execute the subscriber who wants to clean up their code before we exit
@@ -9,6 +17,10 @@ def default_event_parse(dt):
         event.auto_handle()
         #print(f"Handled event: {event}")
 
+    if profile:
+        from panther.profiler import profiler
+        profiler.events_handled(start, time.perf_counter() - start)
+
 
 def default_window_config_update(key, value):
     """
@@ -18,6 +30,9 @@ def default_window_config_update(key, value):
     """
     import panther
 
+    if panther._window is None:  # no window to update (yet), e.g. when running headless
+        return
+
     panther._window.apply_conf(key, value)
 
 
@@ -0,0 +1,323 @@
+"""
+Text drawn from a glyph atlas: each character of a font is rasterised once per size into a texture shared by every
+font, and strings are drawn as one Mesh of quads cut from it. Changing the text only rebuilds the vertices, where
+graphics.text() renders a new texture for every different string, so this is much faster for text which changes every
+frame (scores, timers, the profiler overlay). Draw it with graphics.glyph_text()
+"""
+import os
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+from kivy.core.text import Label as CoreLabel
+from panther import graphics
+from panther.cache import LRUCache
+
+_ATLAS_SIZE = 1024
+_PADDING = 1  # empty pixels around each glyph in the atlas, so filtering doesn't bleed its neighbours into it
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # so "panther/font/..." is found from anywhere
+
+
+class GlyphAtlas:
+    """
+    A texture which the glyphs of every font and size are packed into, in rows. When it's full it's emptied, and
+    glyphs are rasterised again as they're drawn
+    """
+    def __init__(self, size=_ATLAS_SIZE):
+        """
+        :param size: int, width and height of the texture
+        """
+        self.size = size
+        self.generation = 0  # changes whenever the atlas is emptied, fonts forget the glyphs they had in it
+        self.texture = None
+
+        self._textures = None  # the graphics.textures which made the texture, it's remade if that's replaced
+        self._x = self._y = self._row_height = 0
+
+    def clear(self):
+        """
+        forget every glyph
+        :return: None
+        """
+        self.generation += 1
+        self._x = self._y = self._row_height = 0
+
+    def check_texture(self):
+        """
+        make the texture if it hasn't been made by the current graphics.textures (e.g. when running headless)
+        :return: kivy.graphics.texture.Texture
+        """
+        if self._textures is not graphics.textures:
+            self._textures = graphics.textures
+            self.texture = self._textures._create("glyph atlas", self.size, self.size, False)
+            self.clear()
+
+        return self.texture
+
+    def add(self, mask):
+        """
+        copy a glyph into the atlas
+        :param mask: PIL.Image.Image, mode 'L', the glyph's coverage, with _PADDING empty pixels on every side
+        :return: tuple<u0, v0, u1, v1>, texture co-ords of the glyph (without its padding), or None if the atlas is full
+        """
+        texture = self.check_texture()
+        width, height = mask.size
+        if self._x + width > self.size:  # start a new row
+            self._x, self._y, self._row_height = 0, self._y + self._row_height, 0
+        if self._y + height > self.size or width > self.size:
+            return None
+
+        x, y = self._x, self._y
+        self._x += width
+        self._row_height = max(self._row_height, height)
+
+        pixels = np.full((height, width, 4), 255, dtype=np.uint8)  # white, so it's tinted by the current colour
+        pixels[:, :, 3] = np.asarray(mask)[::-1]  # textures start from the bottom row
+        self._textures._blit(texture, bytearray(pixels.tobytes()), y, height, False, x, width)
+
+        size = self.size
+        return (
+            (x + _PADDING) / size, (y + _PADDING) / size,
+            (x + width - _PADDING) / size, (y + height - _PADDING) / size
+        )
+
+
+atlas = GlyphAtlas()
+
+
+class Font:
+    """
+    A font at one size, with the metrics and atlas regions of every character drawn in it so far
+    """
+    def __init__(self, name, size):
+        """
+        :param name: string, location of a .ttf/.otf file (or the name of an installed font)
+        :param size: number, pixels per em
+        """
+        self.name = name
+        self.size = size
+
+        self._font = ImageFont.truetype(name, size)
+        self.ascent, self.descent = self._font.getmetrics()
+        self.line_height = self.ascent + self.descent
+
+        self._glyphs = {}  # char: tuple<advance, quad>, see glyph()
+        self._advances = {}  # char: float, for measuring without rasterising
+        self._kerning = {}  # tuple<char, char>: float, added to the advance of the first when followed by the second
+        self._label = None  # kivy.core.text.Label, measures kerning (Pillow's basic layout doesn't)
+        self._generation = atlas.generation
+
+    def glyph(self, char):
+        """
+        :param char: string, one character
+        :return: tuple<float(advance), tuple<float>(x, y, u, v of each corner, relative to the pen on the baseline, in
+        the order graphics._RECTANGLE_INDICES expects) or None for whitespace>
+        """
+        if self._generation != atlas.generation:
+            self._glyphs.clear()
+            self._generation = atlas.generation
+
+        try:
+            return self._glyphs[char]
+        except KeyError:
+            pass
+
+        x0, y0, x1, y1 = self._font.getbbox(char, anchor='ls')  # from the pen on the baseline, y down
+        quad = None
+        if x1 > x0 and y1 > y0:
+            mask = Image.new('L', (x1 - x0 + 2 * _PADDING, y1 - y0 + 2 * _PADDING), 0)
+            ImageDraw.Draw(mask).text((_PADDING - x0, _PADDING - y0), char, font=self._font, fill=255, anchor='ls')
+
+            region = atlas.add(mask)
+            if region is None:  # full, start again (other strings' glyphs are rasterised again as they're drawn)
+                atlas.clear()
+                self._glyphs.clear()
+                self._generation = atlas.generation
+                region = atlas.add(mask)
+                if region is None:
+                    raise ValueError(f"a glyph of {self.name} at size {self.size} doesn't fit in the glyph atlas")
+
+            u0, v0, u1, v1 = region
+            x0, y0, x1, y1 = x0, -y1, x1, -y0
+            quad = (x0, y0, u0, v0, x1, y0, u1, v0, x1, y1, u1, v1, x0, y1, u0, v1)
+
+        glyph = self._glyphs[char] = (self.advance(char), quad)
+        return glyph
+
+    def advance(self, char):
+        """
+        :param char: string, one character
+        :return: float, how far the pen moves after drawing <char>
+        """
+        try:
+            return self._advances[char]
+        except KeyError:
+            advance = self._advances[char] = self._font.getlength(char)
+            return advance
+
+    def kerning(self, first, second):
+        """
+        :param first: string, one character
+        :param second: string, the character after it
+        :return: float, pixels to move the pen between them (usually negative, e.g. "AV")
+        """
+        try:
+            return self._kerning[first, second]
+        except KeyError:
+            pass
+
+        if self._label is None:
+            self._label = CoreLabel(font_name=self.name, font_size=self.size)
+        extents = self._label.get_extents
+        kerning = self._kerning[first, second] = extents(first + second)[0] - extents(first)[0] - extents(second)[0]
+
+        return kerning
+
+    def measure(self, text, kerning=True):
+        """
+        :param text: string, one line
+        :param kerning: bool
+        :return: float, width of <text>
+        """
+        width = 0
+        previous = None
+        for char in text:
+            if kerning and previous is not None:
+                width += self.kerning(previous, char)
+            width += self.advance(char)
+            previous = char
+
+        return width
+
+
+_fonts = {}  # tuple<name, size>: Font
+
+
+def font(name, size):
+    """
+    :param name: string, location of a .ttf/.otf file, relative to the working directory or the directory panther is
+    in (like TextStyle's default), or the name of an installed font
+    :param size: number, pixels per em
+    :return: Font, made the first time each name and size is asked for
+    """
+    try:
+        return _fonts[name, size]
+    except KeyError:
+        pass
+
+    path = name
+    if not os.path.isfile(path) and os.path.isfile(os.path.join(_ROOT, name)):
+        path = os.path.join(_ROOT, name)
+
+    loaded = _fonts[name, size] = Font(path, size)
+    return loaded
+
+
+def _wrap(font, text, width, kerning):
+    """
+    :return: list<string>, the lines of <text>, broken between words so that each fits in <width> if possible
+    """
+    lines = []
+    space = font.advance(' ')
+
+    for paragraph in text.split('\n'):
+        if width is None:
+            lines.append(paragraph)
+            continue
+
+        line, line_width = [], 0
+        for word in paragraph.split(' '):
+            word_width = font.measure(word, kerning)
+            if line and line_width + space + word_width > width:
+                lines.append(' '.join(line))
+                line, line_width = [], 0
+
+            line_width += word_width + (space if line else 0)
+            line.append(word)
+        lines.append(' '.join(line))
+
+    return lines
+
+
+def layout(text, style):
+    """
+    place the glyphs of <text>, relative to the bottom left of the text
+    :param text: string
+    :param style: panther.graphics.TextStyle, font_name, font_size, text_size (wraps lines to its width, and aligns
+    them in it), halign, valign, line_height and font_kerning are used
+    :return: tuple<numpy.ndarray<float32>(shape (glyphs, 4, 4), x, y, u, v of each corner of each glyph), width,
+    height>
+    """
+    glyph_font = font(style.font_name, style.font_size)
+    box_width, box_height = style.text_size or (None, None)
+    kerning = style.font_kerning
+    kern, glyph = glyph_font.kerning, glyph_font.glyph
+
+    lines = text.split('\n') if box_width is None else _wrap(glyph_font, text, box_width, kerning)
+    quads, pens, rows, widths = [], [], [], []
+    for row, line in enumerate(lines):
+        pen = 0
+        previous = None
+        for char in line:
+            if kerning and previous is not None:
+                pen += kern(previous, char)
+            advance, quad = glyph(char)
+            if quad is not None:
+                quads.append(quad)
+                pens.append(pen)
+                rows.append(row)
+            pen += advance
+            previous = char
+        widths.append(pen)
+
+    line_height = glyph_font.line_height * style.line_height
+    text_height = line_height * len(lines)
+    width = max(widths) if box_width is None else box_width
+    height = text_height if box_height is None else box_height
+    top = dict(top=height, middle=(height + text_height) / 2, center=(height + text_height) / 2).get(
+        style.valign, text_height
+    )
+
+    widths = np.array(widths, dtype=np.float32)
+    starts = dict(center=(width - widths) / 2, right=width - widths).get(style.halign, np.zeros_like(widths))
+    baselines = top - glyph_font.ascent - line_height * np.arange(len(lines), dtype=np.float32)
+
+    rows = np.array(rows, dtype=np.intp)
+    vertices = np.array(quads, dtype=np.float32).reshape(-1, 4, 4)
+    vertices[:, :, 0] += (np.array(pens, dtype=np.float32) + starts[rows])[:, None]
+    vertices[:, :, 1] += baselines[rows][:, None]
+
+    return vertices, width, height
+
+
+# tuple<text, TextStyle>: tuple<int(atlas generation), vertices, width, height>, so unchanged text isn't laid out again
+layouts = LRUCache(max_bytes=4 * 1024 * 1024, sizeof=lambda value: value[1].nbytes + 64)
+
+
+def draw(x, y, text, style):
+    """
+    see graphics.glyph_text()
+    """
+    texture = atlas.check_texture()
+
+    key = (text, style)
+    cached = layouts.get(key)
+    if cached is None or cached[0] != atlas.generation:
+        generation = atlas.generation
+        vertices, width, height = layout(text, style)
+        if atlas.generation != generation:  # the atlas filled up part way through, so the first glyphs have moved
+            vertices, width, height = layout(text, style)
+        cached = layouts.put(key, (atlas.generation, vertices, width, height))
+    _, vertices, width, height = cached
+
+    if not len(vertices) or not graphics._visible(x, y, x + width, y + height):
+        return
+
+    if style.color is None:  # tinted by the current colour
+        moved = vertices.copy()
+    else:
+        moved = np.empty(vertices.shape[:2] + (8,), dtype=np.float32)
+        moved[:, :, 0:4] = vertices
+        moved[:, :, 4:8] = tuple(style.color) + (1,) * (4 - len(style.color))
+    moved[:, :, 0] += x
+    moved[:, :, 1] += y
+
+    graphics._draw_vertices(moved, graphics._rectangle_batch_indices, len(graphics._RECTANGLE_INDICES), texture)
@@ -1,14 +1,18 @@
 """
 Graphics part, this communicates with the panther.canvas through a nice little API
 """
-from math import pi, sin, cos
+from math import pi, sin, cos, ceil, floor, radians, sqrt
+import numpy as np
 from kivy.graphics import *
 from kivy.utils import get_color_from_hex
 from kivy.core.image import Image as CoreImage
-from kivy.core.text import Label as CoreLabel
 import panther
+from panther.cache import TextureCache, LabelCache
 from panther.util import hex_to_rgb
 
+textures = TextureCache(max_bytes=64 * 1024 * 1024)  # images drawn by image(), see panther.cache.TextureCache
+labels = LabelCache(max_bytes=16 * 1024 * 1024)  # text rendered by text(), see panther.cache.LabelCache
+
 
 def _draw_graphic(obj):
     """
@@ -16,19 +20,373 @@ def _draw_graphic(obj):
     :param obj: kivy.graphics object
     :return: None
     """
+    global _instructions_added
+
     #panther._draw_queue.put(obj)
     try:
         panther.canvas.canvas.add(obj)
     except AttributeError:
         raise Exception("You may only call graphics functions from within the draw event")
 
+    _instructions_added += 1
+    _retained.stray = True
+
+
+_instructions_added = 0  # instructions added to the canvas this frame, see panther.profiler
+
+
+class _RetainedFrame:
+    """
+    Keeps the instructions drawn last frame, so that when panther.conf.retained_mode is on, the Nth graphics call of
+    this frame updates the Nth instruction of the last frame instead of allocating a new one
+    """
+    def __init__(self):
+        self.slots = []  # list<tuple<kivy.graphics instruction, frozenset<str>(property names), fmt> >
+        self.index = 0
+        self.active = False  # True between begin() and end(), i.e. during the draw event
+        self.changed = False  # whether the canvas has to be rebuilt at the end of this frame
+        # whether anything was added to (or cleared from) the canvas outside a recorded frame, e.g. by graphics calls
+        # made in the update event, which the next rebuild clears away like immediate mode would
+        self.stray = False
+
+    def begin(self):
+        """
+        start recording a new frame
+        :return: None
+        """
+        self.index = 0
+        self.changed = self.stray
+        self.active = True
+
+    def instruction(self, cls, props):
+        """
+        reuse the instruction in the current slot if it has the same shape as this call, otherwise replace it
+        :param cls: kivy.graphics instruction class
+        :param props: dict<str, any>, properties of the instruction
+        :return: kivy.graphics instruction
+        """
+        i = self.index
+        self.index = i + 1
+        fmt = props.pop('fmt', None)  # can only be set on creation
+
+        if i < len(self.slots):
+            inst, names, slot_fmt = self.slots[i]
+            if type(inst) is cls and slot_fmt == fmt and props.keys() == names:
+                for name, value in props.items():
+                    setattr(inst, name, value)
+                return inst
+
+            del self.slots[i:]  # the call sequence changed shape from here on
+
+        names = frozenset(props)
+        if fmt is not None:
+            props['fmt'] = fmt
+        inst = cls(**props)
+        self.slots.append((inst, names, fmt))
+        self.changed = True
+
+        return inst
+
+    def existing(self, inst):
+        """
+        keep an instruction which the caller made, and reuses between frames (e.g. a cached Mesh), in the current slot
+        :param inst: kivy.graphics instruction
+        :return: kivy.graphics instruction, <inst>
+        """
+        i = self.index
+        self.index = i + 1
+
+        if i < len(self.slots) and self.slots[i][0] is inst:
+            return inst
+
+        del self.slots[i:]
+        self.slots.append((inst, None, None))
+        self.changed = True
+
+        return inst
+
+    def restart(self):
+        """
+        drop everything recorded so far this frame, used by clear()
+        :return: None
+        """
+        self.index = 0
+        self.changed = True
+
+    def end(self):
+        """
+        finish the frame, rebuilding the canvas only if the call sequence changed shape
+        :return: None
+        """
+        self.active = False
+
+        if self.changed or self.index < len(self.slots):
+            del self.slots[self.index:]
+
+            panther.canvas.clear()
+            for inst, _, _ in self.slots:
+                _draw_graphic(inst)
+
+        self.stray = False
+
+    def reset(self):
+        """
+        forget every retained instruction
+        :return: None
+        """
+        self.slots.clear()
+        self.index = 0
+        self.active = False
+
+
+_retained = _RetainedFrame()
+
+
+# set by panther.headless, or while a layer is being rendered: graphics calls are passed to its record() method instead
+# of being drawn on the canvas
+_recorder = None
+
+
+def _instruction(cls, **props):
+    """
+    draw a kivy.graphics instruction of type <cls>, with <props> set on it.
+    In retained mode the instruction from the same position in the last frame is reused if possible
+    :param cls: kivy.graphics instruction class
+    :param props: dict<str, any>, keyword arguments for <cls>
+    :return: kivy.graphics instruction, or None when running headless
+    """
+    if _recorder is not None:
+        return _recorder.record(cls, props)
+
+    if _retained.active:
+        return _retained.instruction(cls, props)
+
+    pool = _pools.get(cls)
+    obj = cls(**props) if pool is None else pool.instruction(props)
+    _draw_graphic(obj)
+
+    return obj
+
+
+def _draw_instance(inst):
+    """
+    draw an instruction which the caller made, and keeps between frames (e.g. a cached Mesh)
+    :param inst: kivy.graphics instruction
+    :return: kivy.graphics instruction, <inst>
+    """
+    if _recorder is not None:
+        return _recorder.record(type(inst), {})
+
+    if _retained.active:
+        return _retained.existing(inst)
+
+    _draw_graphic(inst)
+
+    return inst
+
+
+# tuple<x0, y0, x1, y1>, the part of the world the current panther.camera.Camera can see, shapes entirely outside it
+# aren't drawn. None when nothing is culled (no camera, or inside rotate())
+_view = None
+_scale = 1  # how many pixels across one unit of the world is drawn, see _segments()
+_view_stack = []
+
+
+def _push_view(view, scale=None):
+    """
+    :param view: tuple<x0, y0, x1, y1> or None
+    :param scale: number, or None to keep the current scale
+    :return: None
+    """
+    global _view, _scale
+    _view_stack.append((_view, _scale))
+    _view = view
+    if scale is not None:
+        _scale = scale
+
+
+def _pop_view():
+    global _view, _scale
+    if _view_stack:
+        _view, _scale = _view_stack.pop()
+
+
+def _visible_rect():
+    """
+    :return: tuple<x, y, width, height>, the part of the world which can be seen
+    """
+    if _view is not None:
+        x0, y0, x1, y1 = _view
+        return x0, y0, x1 - x0, y1 - y0
+
+    width, height = panther.canvas.size
+    return 0, 0, width, height
+
+
+def _visible(x0, y0, x1, y1):
+    """
+    :return: bool, whether any of the rectangle from (x0, y0) to (x1, y1) can be seen
+    """
+    if _view is None:
+        return True
+
+    vx0, vy0, vx1, vy1 = _view
+    return x0 <= vx1 and x1 >= vx0 and y0 <= vy1 and y1 >= vy0
+
+
+def _visible_mask(x0, y0, x1, y1):
+    """
+    _visible() for many rectangles at once
+    :param x0: numpy.ndarray<float32>, left of each rectangle
+    :param y0: numpy.ndarray<float32>, bottom of each rectangle
+    :param x1: numpy.ndarray<float32>, right of each rectangle
+    :param y1: numpy.ndarray<float32>, top of each rectangle
+    :return: numpy.ndarray<bool>, or None if every rectangle can be seen
+    """
+    if _view is None:
+        return None
+
+    vx0, vy0, vx1, vy1 = _view
+    visible = (x0 <= vx1) & (x1 >= vx0) & (y0 <= vy1) & (y1 >= vy0)
+
+    return None if visible.all() else visible
+
+
+class _InstructionPool:
+    """
+    Instructions which are too expensive to create every frame in immediate mode (e.g. because they compile a shader),
+    the Nth one drawn each frame is reused once the canvas has been cleared
+    """
+    def __init__(self, cls):
+        self.cls = cls
+        self.items = []
+        self.index = 0
+
+    def instruction(self, props):
+        """
+        get the next instruction, with <props> set on it
+        :param props: dict<str, any>, properties of the instruction
+        :return: kivy.graphics instruction
+        """
+        if self.index < len(self.items):
+            inst = self.items[self.index]
+            for name, value in props.items():
+                setattr(inst, name, value)
+        else:
+            inst = self.cls(**props)
+            self.items.append(inst)
+
+        self.index += 1
+
+        return inst
+
+
+_COLOUR_MESH_FMT = [
+    (b'vPosition', 2, 'float'),
+    (b'vTexCoords0', 2, 'float'),
+    (b'vColor', 4, 'float')
+]
+
+_COLOUR_MESH_VS = """
+$HEADER$
+attribute vec4 vColor;
+
+void main (void) {
+  frag_color = vColor * vec4(1.0, 1.0, 1.0, opacity);
+  tex_coord0 = vTexCoords0;
+  gl_Position = projection_mat * modelview_mat * vec4(vPosition.xy, 0.0, 1.0);
+}
+"""
+
+
+class _ColourMesh(RenderContext):
+    """
+    A triangles Mesh with a colour per vertex (x, y, u, v, r, g, b, a), kivy's default shader only has one colour
+    """
+    def __init__(self, vertices, indices, texture=None):
+        super().__init__(use_parent_projection=True, use_parent_modelview=True, use_parent_frag_modelview=True)
+        self.shader.vs = _COLOUR_MESH_VS
+
+        self.mesh = Mesh(fmt=_COLOUR_MESH_FMT, vertices=vertices, indices=indices, texture=texture, mode='triangles')
+        self.add(self.mesh)
+
+    @property
+    def vertices(self):
+        return self.mesh.vertices
+
+    @vertices.setter
+    def vertices(self, vertices):
+        self.mesh.vertices = vertices
+
+    @property
+    def indices(self):
+        return self.mesh.indices
+
+    @indices.setter
+    def indices(self, indices):
+        self.mesh.indices = indices
+
+    @property
+    def texture(self):
+        return self.mesh.texture
+
+    @texture.setter
+    def texture(self, texture):
+        self.mesh.texture = texture
+
+
+_colour_meshes = _InstructionPool(_ColourMesh)
+_pools = {_ColourMesh: _colour_meshes}  # instruction class: _InstructionPool, for classes drawn from a pool
+
+
+def _begin_frame():
+    """
+    called by panther before the draw event
+    :return: None
+    """
+    global _instructions_added, _view, _scale
+    _instructions_added = 0
+    _view = None
+    _scale = 1
+    _view_stack.clear()
+
+    if panther.conf.retained_mode and panther.conf.clear_every_frame:
+        _retained.begin()
+    else:
+        if _retained.slots:
+            _retained.reset()
+
+        if panther.conf.clear_every_frame:
+            clear()
+
+
+def _end_frame():
+    """
+    called by panther after the draw event
+    :return: None
+    """
+    if _retained.active:
+        _retained.end()
+
+
+_clears = 0  # times the canvas has been cleared, so instructions kept between frames know when to be added again
+
 
 def clear():
     """
     clear the screen
     :return: None
     """
+    global _clears
+
     panther.canvas.clear()
+    _colour_meshes.index = 0
+    _clears += 1
+
+    if _retained.active:
+        _retained.restart()
+    else:
+        _retained.stray = True
 
 
 def rotate(x_origin, y_origin, degrees):
@@ -39,11 +397,13 @@ def rotate(x_origin, y_origin, degrees):
     :param degrees: number
     :return: None
     """
-    _draw_graphic(PushMatrix())
-    _draw_graphic(Rotate(
+    _instruction(PushMatrix)
+    _instruction(
+        Rotate,
         angle=degrees,
         origin=(x_origin, y_origin)
-    ))
+    )
+    _push_view(None)  # shapes are no longer where their co-ords say, so they can't be culled
 
 
 def unrotate():
@@ -51,7 +411,8 @@ def unrotate():
     resets the canvas' rotation
     :return: None
     """
-    _draw_graphic(PopMatrix())
+    _instruction(PopMatrix)
+    _pop_view()
 
 
 def set_colour(colour):
@@ -65,14 +426,14 @@ def set_colour(colour):
         if len(colour) == 4:
             rgb = [colour[c] / 255 for c in range(len(colour) - 1)]
 
-            _draw_graphic(Color(*rgb, colour[-1]))
+            _instruction(Color, rgba=(*rgb, colour[-1]))
         elif len(colour) == 3:
             rgb = [c / 255 for c in colour]
 
-            _draw_graphic(Color(*rgb, 1))
+            _instruction(Color, rgba=(*rgb, 1))
 
     elif isinstance(colour, str) and len(colour) == 6:
-        _draw_graphic(Color(*get_color_from_hex(colour)))
+        _instruction(Color, rgba=get_color_from_hex(colour))
     else:
         print(colour)
         raise ValueError("valid hex or rgb value must be present")
@@ -85,7 +446,7 @@ def set_background_color(colour):
     :return: None
     """
     set_colour(colour)
-    _draw_graphic(Rectangle(size=panther.canvas.size, pos=panther.canvas.pos))
+    _instruction(Rectangle, size=panther.canvas.size, pos=panther.canvas.pos)
 
 
 def rectangle(x, y, width, height):
@@ -97,10 +458,14 @@ def rectangle(x, y, width, height):
     :param height: int, height
     :return: None
     """
-    _draw_graphic(Rectangle(
+    if _view is not None and not _visible(min(x, x + width), min(y, y + height), max(x, x + width), max(y, y + height)):
+        return
+
+    _instruction(
+        Rectangle,
         pos=(x, y),
         size=(width, height)
-    ))
+    )
 
 
 def triangle(x, y):
@@ -113,22 +478,119 @@ def triangle(x, y):
     raise NotImplementedError()
 
 
+_MAX_MESH_INDICES = 65535  # kivy meshes use unsigned short indices
+
+_MIN_SEGMENTS = 8
+_MAX_SEGMENTS = 256
+_SEGMENT_TOLERANCE = 0.5  # pixels the straight edges of a round shape can be inside the curve they stand in for
+_SEGMENTS_PER_ROOT_PIXEL = pi / sqrt(2 * _SEGMENT_TOLERANCE) / 4  # quarter segments per sqrt(radius in pixels)
+
+
+class _UnitShape:
+    """
+    The corners of a regular polygon of radius 1 centred on (0, 0), made once for each number of segments and scaled
+    and moved to draw each round shape, so drawing one doesn't need any trigonometry
+    """
+    __slots__ = ('segments', 'corners', 'rim')
+
+    def __init__(self, segments):
+        angles = np.linspace(0, 2 * pi, segments, endpoint=False)
+        rim = np.stack((np.cos(angles), np.sin(angles)), axis=1).astype(np.float32)
+
+        self.segments = segments
+        # x, y, 1 of the centre, then of each corner, back round to the first, for a triangle_fan (see _fan())
+        self.corners = np.ones((segments + 2, 3), dtype=np.float32)
+        self.corners[0, 0:2] = 0
+        self.corners[1:-1, 0:2] = rim
+        self.corners[-1] = self.corners[1]
+        self.rim = np.concatenate((rim, rim))  # twice round, so the corners of any arc are one slice of it
+
+
+_unit_shapes = {}  # segments: _UnitShape
+_fan_indices = np.arange(_MAX_MESH_INDICES + 1, dtype=np.uint16)  # the first n are the indices of a fan of n vertices
+
+
+def _unit_shape(segments):
+    """
+    :param segments: int, number of straight edges
+    :return: _UnitShape
+    """
+    try:
+        return _unit_shapes[segments]
+    except KeyError:
+        shape = _unit_shapes[segments] = _UnitShape(segments)
+        return shape
+
+
+def _segments(radius):
+    """
+    choose how many straight edges to draw a round shape with, so that they're never more than _SEGMENT_TOLERANCE
+    pixels from the curve however big it's drawn (taking the camera's zoom into account)
+    :param radius: number, radius in world units
+    :return: int, a multiple of 4, so few unit shapes are made
+    """
+    # an edge of a circle of radius r with n edges is r * (1 - cos(pi / n)) ~= r * (pi / n) ** 2 / 2 from the curve
+    segments = 4 * ceil(_SEGMENTS_PER_ROOT_PIXEL * sqrt(abs(radius) * _scale))
+    if segments < _MIN_SEGMENTS:
+        return _MIN_SEGMENTS
+    return segments if segments < _MAX_SEGMENTS else _MAX_SEGMENTS
+
+
+def _arc_points(shape, angle_start, angle_end):
+    """
+    :param shape: _UnitShape
+    :param angle_start: number, degrees, 0 is up and angles go anticlockwise (like panther.utils.move_on_angle)
+    :param angle_end: number, degrees, less than 360 from <angle_start>
+    :return: numpy.ndarray<float32>, shape (n, 2), points along the unit circle from <angle_start> to <angle_end>: the
+    exact ends, with the corners of <shape> between them
+    """
+    start, end = sorted((angle_start, angle_end))
+    start, end = radians(start + 90), radians(end + 90)
+    step = 2 * pi / shape.segments
+
+    first = floor(start / step) + 1  # first corner after the start
+    count = max(ceil(end / step) - first, 0)  # corners before the end
+    first %= shape.segments
+
+    points = np.empty((count + 2, 2), dtype=np.float32)
+    points[0] = cos(start), sin(start)
+    points[1:-1] = shape.rim[first:first + count]
+    points[-1] = cos(end), sin(end)
+
+    return points
+
+
+def _fan(shape, x, y, radius_x, radius_y):
+    """
+    :return: numpy.ndarray<float32>, shape (segments + 2, 4), x, y, u, v of the corners of <shape> scaled and moved to
+    (x, y)
+    """
+    return shape.corners @ np.array((
+        (radius_x, 0, 0.5, 0),
+        (0, radius_y, 0, 0.5),
+        (x, y, 0.5, 0.5)
+    ), dtype=np.float32)
+
+
 def regular_polygon(radius, sides, x, y):
-    r = radius
-    a = 2 * pi / sides
-    vertices=[]
-    for i in range(sides):
-        vertices += [
-            x + cos(i * a) * r,
-            y + sin(i * a) * r,
-            cos(i * a),
-            sin(i * a),
-        ]
-    _draw_graphic(Mesh(
-        vertices=vertices,
-        indices=list(range(sides)),
+    """
+    draw a regular polygon, with a corner to the right of its centre
+    :param radius: number, distance from the centre to each corner
+    :param sides: int
+    :param x: number, x co-ord of the centre
+    :param y: number, y co-ord of the centre
+    :return: None
+    """
+    if not _visible(x - radius, y - radius, x + radius, y + radius):
+        return
+
+    shape = _unit_shape(sides)
+    _instruction(
+        Mesh,
+        vertices=_fan(shape, x, y, radius, radius).reshape(-1),
+        indices=_fan_indices[:len(shape.corners)],
         mode='triangle_fan'
-    ))
+    )
 
 
 def polygon(*points):
@@ -137,6 +599,11 @@ def polygon(*points):
     :param points: tuple<tuple<int(x), int(y)> >, each of the points in the polygon (in order)
     :return: None
     """
+    if _view is not None:
+        xs, ys = [point[0] for point in points], [point[1] for point in points]
+        if not _visible(min(xs), min(ys), max(xs), max(ys)):
+            return
+
     p = []
     a = 2 * pi / len(points) - 1
     indices = []
@@ -147,63 +614,388 @@ def polygon(*points):
         p.append(points[i][1])
         indices.append(i)
 
-    _draw_graphic(Mesh(
+    _instruction(
+        Mesh,
         vertices=p,
         indices=indices,
         mode="triangle_fan"
-    ))
+    )
 
 
-def ellipse(x, y, size_x, size_y, angle_start=0, angle_end=360):
+def ellipse(x, y, size_x, size_y, angle_start=0, angle_end=360, segments=None):
     """
-    draw an ellipse
-    :param x: int, x co-ord
-    :param y: int, y co-ord
+    draw an ellipse, or a sector of one
+    :param x: int, x co-ord of the centre
+    :param y: int, y co-ord of the centre
     :param size_x: int, size on the x axis
     :param size_y: int, size on the y axis
-    :param angle_start: int, angle to start drawing ellipse
-    :param angle_end: int, angle to end drawing ellipse
+    :param angle_start: int, degrees, angle to start drawing ellipse (0 is up and angles go anticlockwise, like
+    panther.utils.move_on_angle)
+    :param angle_end: int, degrees, angle to end drawing ellipse
+    :param segments: int, number of straight edges a whole ellipse would be made of, None to choose from its size
     :return: None
     """
-    _draw_graphic(Ellipse(
-        pos=(x - size_x / 2, y - size_y / 2),
-        size=(size_x, size_y)
-    ))
+    radius_x, radius_y = size_x / 2, size_y / 2
+    reach_x = radius_x if radius_x >= 0 else -radius_x
+    reach_y = radius_y if radius_y >= 0 else -radius_y
+    reach = reach_x if reach_x > reach_y else reach_y
+    if _view is not None and not _visible(x - reach, y - reach, x + reach, y + reach):
+        return
 
+    segments = segments or _segments(reach)
+    if angle_end - angle_start >= 360 or angle_start - angle_end >= 360:
+        # kivy builds a whole one itself, which is cheapest for a single call
+        _instruction(
+            Ellipse,
+            pos=(x - radius_x, y - radius_y),
+            size=(size_x, size_y),
+            segments=segments
+        )
+        return
 
-def circle(x, y, radius,angle_start=0, angle_end=360):
+    shape = _unit_shape(segments)
+    points = _arc_points(shape, angle_start, angle_end)
+    vertices = np.empty((len(points) + 1, 4), dtype=np.float32)
+    vertices[0] = (x, y, 0.5, 0.5)
+    vertices[1:, 0] = points[:, 0] * radius_x + x
+    vertices[1:, 1] = points[:, 1] * radius_y + y
+    vertices[1:, 2:4] = points / 2 + 0.5
+
+    _instruction(
+        Mesh,
+        vertices=vertices.reshape(-1),
+        indices=_fan_indices[:len(vertices)],
+        mode='triangle_fan'
+    )
+
+
+def circle(x, y, radius, angle_start=0, angle_end=360, segments=None):
     """
-    draw a circle
+    draw a circle, or a sector of one
     :param x: int, x co-ord
     :param y: int, y co-ord
     :param radius: int, radius of circle
+    :param angle_start: int, degrees, see ellipse()
+    :param angle_end: int, degrees
+    :param segments: int, number of straight edges a whole circle would be made of, None to choose from its size
+    :return: None
+    """
+    ellipse(x, y, radius * 2, radius * 2, angle_start, angle_end, segments)
+
+
+def sector(x, y, radius, angle_start, angle_end, segments=None):
+    """
+    draw a filled slice of a circle (like a slice of pie)
+    :param x: number, x co-ord of the centre
+    :param y: number, y co-ord of the centre
+    :param radius: number
+    :param angle_start: number, degrees, see ellipse()
+    :param angle_end: number, degrees
+    :param segments: int, number of straight edges a whole circle would be made of, None to choose from its size
+    :return: None
+    """
+    ellipse(x, y, radius * 2, radius * 2, angle_start, angle_end, segments)
+
+
+def arc(x, y, radius, angle_start, angle_end, width=1, segments=None):
+    """
+    draw part of the outline of a circle
+    :param x: number, x co-ord of the centre
+    :param y: number, y co-ord of the centre
+    :param radius: number
+    :param angle_start: number, degrees, see ellipse()
+    :param angle_end: number, degrees
+    :param width: number, width of the line
+    :param segments: int, number of straight edges a whole circle would be made of, None to choose from its size
     :return: None
     """
-    ellipse(x, y, radius * 2, radius * 2, angle_start, angle_end)
+    reach = abs(radius) + width
+    if not _visible(x - reach, y - reach, x + reach, y + reach):
+        return
+
+    shape = _unit_shape(segments or _segments(radius))
+    if abs(angle_end - angle_start) >= 360:
+        points = shape.rim[:shape.segments + 1]
+    else:
+        points = _arc_points(shape, angle_start, angle_end)
+
+    points = points * np.float32(radius)
+    points += np.array((x, y), dtype=np.float32)
+    _instruction(Line, points=points.reshape(-1).tolist(), width=width)
+
+
+def _batch_array(values, n):
+    """
+    :param values: array-like<number> or number, broadcast to <n> items
+    :param n: int, number of items
+    :return: numpy.ndarray<float32>, shape (n,)
+    """
+    return np.broadcast_to(np.asarray(values, dtype=np.float32), (n,))
+
+
+def _batch_colours(colours, n):
+    """
+    converts colours, in the format set_colour() takes tuples in, to an array of rgba floats
+    :param colours: array-like, shape (n, 3) or (n, 4) (or a single colour), red, green and blue 0-255, alpha 0-1
+    :param n: int, number of items
+    :return: numpy.ndarray<float32>, shape (n, 4)
+    """
+    colours = np.asarray(colours, dtype=np.float32)
+    if colours.shape[-1] not in (3, 4):
+        raise ValueError("colours must have 3 (rgb) or 4 (rgba) values each")
+
+    rgba = np.ones((n, 4), dtype=np.float32)
+    rgba[:, :3] = colours[..., :3] / 255
+    if colours.shape[-1] == 4:
+        rgba[:, 3] = colours[..., 3]
+
+    return rgba
+
+
+def _batch_indices(item_indices, vertices_per_item):
+    """
+    repeat the indices of one item for as many items as fit in one Mesh
+    :param item_indices: tuple<int>, triangle indices of one item
+    :param vertices_per_item: int
+    :return: numpy.ndarray<uint16>
+    """
+    capacity = min(_MAX_MESH_INDICES // len(item_indices), (_MAX_MESH_INDICES + 1) // vertices_per_item)
+    offsets = np.arange(capacity, dtype=np.uint32)[:, None] * vertices_per_item
+
+    return (np.asarray(item_indices, dtype=np.uint32) + offsets).astype(np.uint16).reshape(-1)
+
+
+def _draw_batch(positions, colours, indices, indices_per_item, tex_coords=None, texture=None):
+    """
+    draw the triangles of many items, using one Mesh for as many items as fit in it
+    :param positions: numpy.ndarray<float32>, shape (n, vertices per item, 2), vertex positions
+    :param colours: numpy.ndarray<float32>, shape (n, 4), or None to use the current colour (see set_colour())
+    :param indices: numpy.ndarray<uint16>, from _batch_indices()
+    :param indices_per_item: int
+    :param tex_coords: numpy.ndarray<float32>, shape (n, vertices per item, 2), or None if there's no texture
+    :param texture: kivy.graphics.texture.Texture
+    :return: None
+    """
+    n, vertices_per_item = positions.shape[:2]
+
+    stride = 4 if colours is None else 8  # x, y, u, v (, r, g, b, a)
+    vertices = np.zeros((n, vertices_per_item, stride), dtype=np.float32)
+    vertices[:, :, 0:2] = positions
+    if tex_coords is not None:
+        vertices[:, :, 2:4] = tex_coords
+    if colours is not None:
+        vertices[:, :, 4:8] = colours[:, None, :]
+
+    _draw_vertices(vertices, indices, indices_per_item, texture)
+
+
+def _draw_vertices(vertices, indices, indices_per_item, texture=None):
+    """
+    draw items whose vertices have already been built, using one Mesh for as many items as fit in it
+    :param vertices: numpy.ndarray<float32>, shape (n, vertices per item, 4 or 8), x, y, u, v (, r, g, b, a)
+    :param indices: numpy.ndarray<uint16>, from _batch_indices()
+    :param indices_per_item: int
+    :param texture: kivy.graphics.texture.Texture
+    :return: None
+    """
+    n = len(vertices)
+    capacity = len(indices) // indices_per_item
+
+    for start in range(0, n, capacity):
+        count = min(capacity, n - start)
+        props = dict(
+            vertices=vertices[start:start + count].reshape(-1),
+            indices=indices[:count * indices_per_item],
+            texture=texture
+        )
+
+        if vertices.shape[2] == 4:
+            _instruction(Mesh, mode='triangles', **props)
+        else:
+            _instruction(_ColourMesh, **props)
+
+
+_RECTANGLE_INDICES = (0, 1, 2, 2, 3, 0)
+_rectangle_batch_indices = _batch_indices(_RECTANGLE_INDICES, 4)
+_circle_batch_indices = {}  # segments: tuple<tuple<int>(indices of one circle), numpy.ndarray<uint16> >
+
+
+def rectangles(xs, ys, widths, heights, colours=None):
+    """
+    draw many rectangles at once, with their bottom left corners at <xs>, <ys>.
+    Much faster than calling rectangle() for each of them, as they are all drawn by one Mesh
+    :param xs: array-like<number>, x co-ords
+    :param ys: array-like<number>, y co-ords
+    :param widths: array-like<number> or number, widths
+    :param heights: array-like<number> or number, heights
+    :param colours: array-like, shape (n, 3) or (n, 4), colour of each rectangle in the format set_colour() takes
+    tuples in, or None to use the current colour
+    :return: None
+    """
+    x0 = np.asarray(xs, dtype=np.float32)
+    n = len(x0)
+    if n == 0:
+        return
+
+    y0 = _batch_array(ys, n)
+    x1 = x0 + _batch_array(widths, n)
+    y1 = y0 + _batch_array(heights, n)
+    colours = None if colours is None else _batch_colours(colours, n)
+
+    visible = _visible_mask(np.minimum(x0, x1), np.minimum(y0, y1), np.maximum(x0, x1), np.maximum(y0, y1))
+    if visible is not None:
+        x0, y0, x1, y1 = x0[visible], y0[visible], x1[visible], y1[visible]
+        colours = None if colours is None else colours[visible]
+        n = len(x0)
+        if n == 0:
+            return
+
+    positions = np.empty((n, 4, 2), dtype=np.float32)
+    positions[:, 0, 0] = x0
+    positions[:, 0, 1] = y0
+    positions[:, 1, 0] = x1
+    positions[:, 1, 1] = y0
+    positions[:, 2, 0] = x1
+    positions[:, 2, 1] = y1
+    positions[:, 3, 0] = x0
+    positions[:, 3, 1] = y1
+
+    _draw_batch(
+        positions,
+        colours,
+        _rectangle_batch_indices,
+        len(_RECTANGLE_INDICES)
+    )
+
+
+def circles(xs, ys, radii, colours=None, segments=None):
+    """
+    draw many circles at once, centred at <xs>, <ys>.
+    Much faster than calling circle() for each of them, as they are all drawn by one Mesh
+    :param xs: array-like<number>, x co-ords
+    :param ys: array-like<number>, y co-ords
+    :param radii: array-like<number> or number, radii
+    :param colours: array-like, shape (n, 3) or (n, 4), colour of each circle in the format set_colour() takes
+    tuples in, or None to use the current colour
+    :param segments: int, number of straight edges each circle is made of, None to choose from the biggest circle
+    :return: None
+    """
+    xs = np.asarray(xs, dtype=np.float32)
+    n = len(xs)
+    if n == 0:
+        return
+
+    ys = _batch_array(ys, n)
+    radii = _batch_array(radii, n)
+    colours = None if colours is None else _batch_colours(colours, n)
+
+    reach = np.abs(radii)
+    visible = _visible_mask(xs - reach, ys - reach, xs + reach, ys + reach)
+    if visible is not None:
+        xs, ys, radii, reach = xs[visible], ys[visible], radii[visible], reach[visible]
+        colours = None if colours is None else colours[visible]
+        n = len(xs)
+        if n == 0:
+            return
+
+    segments = segments or _segments(float(reach.max()))
+    try:
+        item_indices, indices = _circle_batch_indices[segments]
+    except KeyError:
+        # a fan of triangles from the centre (vertex 0) to each pair of neighbouring vertices on the edge
+        item_indices = tuple(
+            i for s in range(segments) for i in (0, s + 1, (s + 1) % segments + 1)
+        )
+        indices = _batch_indices(item_indices, segments + 1)
+        _circle_batch_indices[segments] = (item_indices, indices)
+
+    rim = _unit_shape(segments).rim[:segments]
+    radii = radii[:, None]
+
+    positions = np.empty((n, segments + 1, 2), dtype=np.float32)
+    positions[:, :, 0] = xs[:, None]
+    positions[:, :, 1] = ys[:, None]
+    positions[:, 1:, 0] += radii * rim[:, 0]
+    positions[:, 1:, 1] += radii * rim[:, 1]
+
+    _draw_batch(
+        positions,
+        colours,
+        indices,
+        len(item_indices)
+    )
 
 
 def line(*args, **kwargs):
-    _draw_graphic(Line(*args, **kwargs))
+    """
+    draw a line
+    :param args: positional arguments for kivy.graphics.Line
+    :param kwargs: keyword arguments for kivy.graphics.Line, e.g. points
+    :return: None
+    """
+    if args:  # only keyword arguments can be set on a reused instruction
+        _draw_instance(Line(*args, **kwargs))
+        return
 
+    _instruction(Line, **kwargs)
 
-def image(x, y, height, width, src):
+
+def trail(pointer, width=1):
+    """
+    draw the path of a pointer as a line. The Line is kept on the pointer, and each frame only the points added since
+    the last frame are appended to it, instead of a new Line being made from the whole path
+    :param pointer: panther.pointer.Pointer
+    :param width: number, width of the line
+    :return: None
     """
-    draw image at <src>
+    if _recorder is not None or _retained.active:
+        _instruction(Line, points=pointer.path, width=width)
+        return
+
+    # list<kivy.graphics.Line, int(pointer.added when it was last drawn), int(_clears when it was added to the canvas)>
+    trail = pointer.trail
+    if trail is None:
+        trail = pointer.trail = [Line(points=list(pointer.path), width=width), pointer.added, None]
+    else:
+        obj, added, _ = trail
+        new = pointer.added - added
+        if new:
+            points = obj.points
+            points.extend(pointer.path[-2 * new:])
+            excess = len(points) - len(pointer.path)
+            if excess > 0:  # points dropped by the pointer's max_points
+                del points[:excess]
+            obj.flag_data_update()
+            trail[1] = pointer.added
+
+        if obj.width != width:
+            obj.width = width
+
+    if trail[2] != _clears:  # still on the canvas if it hasn't been cleared (e.g. clear_every_frame is off)
+        _draw_graphic(trail[0])
+        trail[2] = _clears
+
+
+def image(x, y, height, width, src, mipmap=False):
+    """
+    draw image at <src>, the image is only loaded the first time it is drawn (see graphics.textures)
     :param x: int, x co-ord
     :param y: int, y co-ord
     :param height: int, height
     :param width: int, width
     :param src: string, location of image to load
+    :param mipmap: bool, whether to generate mipmaps for the image
     :return: None
     """
-    im = CoreImage(src)
-    #print(im.texture)
+    if _view is not None and not _visible(min(x, x + width), min(y, y + height), max(x, x + width), max(y, y + height)):
+        return
 
-    _draw_graphic(Rectangle(
-        texture=im.texture,
+    _instruction(
+        Rectangle,
+        texture=textures.texture(src, mipmap),
         pos=(x, y),
         size=(width, height)
-    ))
+    )
 
 
 def tiling_image(x, y, width, height, src):
@@ -219,7 +1011,377 @@ def tiling_image(x, y, width, height, src):
               tex_coords=(0, 0, nx, 0, nx, ny, 0, ny))
 
 
+class _FboRecorder:
+    """
+    Adds the graphics calls made while a layer is rendered to its Fbo, instead of the canvas
+    """
+    def __init__(self, fbo):
+        self.fbo = fbo
+
+    def record(self, cls, props):
+        obj = cls(**props)
+        self.fbo.add(obj)
+
+        return obj
+
+
+class _Layer:
+    """
+    Static content rendered once into an offscreen Fbo, see layer()
+    """
+    def __init__(self):
+        self.fbo = None
+        self.valid = False
+        self.size = None
+
+    @property
+    def texture(self):
+        return None if self.fbo is None else self.fbo.texture
+
+    def render(self, draw, size):
+        """
+        render the layer by calling <draw>, with every graphics call it makes going into the Fbo
+        :param draw: function()
+        :param size: tuple<int(width), int(height)>
+        :return: None
+        """
+        global _recorder
+
+        self.valid = True
+        self.size = size
+
+        _push_view(None, 1)  # the layer's co-ords aren't the world's, so a camera mustn't cull them
+        try:
+            if _recorder is not None and not isinstance(_recorder, _FboRecorder):  # headless, nothing to render into
+                draw()
+                return
+
+            if self.fbo is None or tuple(self.fbo.size) != size:
+                self.fbo = Fbo(size=size)
+
+            self.fbo.clear()
+            self.fbo.add(ClearColor(0, 0, 0, 0))
+            self.fbo.add(ClearBuffers())
+
+            outer = _recorder  # a layer drawn inside another one is rendered into its own Fbo too
+            _recorder = _FboRecorder(self.fbo)
+            try:
+                draw()
+            finally:
+                _recorder = outer
+        finally:
+            _pop_view()
+
+        self.fbo.draw()
+
+
+_layers = {}  # name: _Layer
+
+
+def layer(name, draw, x=0, y=0, width=None, height=None):
+    """
+    draw static content (e.g. backgrounds, tile floors) through a cached layer: the first time, or after
+    invalidate(<name>), <draw> is called to render the layer offscreen, otherwise the layer is drawn as one textured
+    Rectangle without calling <draw>. Like image(), the layer is tinted by the current colour (see set_colour())
+    :param name: string, identifies the layer
+    :param draw: function(), draws the layer's content using panther.graphics, co-ordinates are relative to the
+    bottom left corner of the layer
+    :param x: int, x co-ord
+    :param y: int, y co-ord
+    :param width: int, defaults to the width of the canvas
+    :param height: int, defaults to the height of the canvas
+    :return: None
+    """
+    if width is None or height is None:
+        canvas_width, canvas_height = panther.canvas.size
+        width = canvas_width if width is None else width
+        height = canvas_height if height is None else height
+
+    size = (int(width), int(height))
+
+    cached = _layers.get(name)
+    if cached is None:
+        cached = _layers[name] = _Layer()
+
+    if not cached.valid or cached.size != size:
+        cached.render(draw, size)
+
+    _instruction(
+        Rectangle,
+        texture=cached.texture,
+        pos=(x, y),
+        size=size
+    )
+
+
+def invalidate(name=None):
+    """
+    make a layer render its content again the next time it's drawn
+    :param name: string, the layer's name, None for every layer
+    :return: None
+    """
+    if name is None:
+        for cached in _layers.values():
+            cached.valid = False
+    elif name in _layers:
+        _layers[name].valid = False
+
+
+class Atlas:
+    """
+    Many small images packed into one texture, so they can all be drawn by one Mesh (see sprites()).
+    Packing is only done once, the packed image and the location of each image in it are cached on disk at <path>.png
+    and <path>.json, and reused for as long as none of the images change
+    """
+    extensions = ('.png', '.jpg', '.jpeg', '.bmp', '.gif')
+
+    def __init__(self, sources, path, padding=1, max_size=4096):
+        """
+        :param sources: string (a directory of images) or list<string> (locations of images to pack)
+        :param path: string, where to cache the atlas, without an extension
+        :param padding: int, pixels of space around each image, so they don't bleed into each other when scaled
+        :param max_size: int, maximum width and height of the atlas
+        """
+        import os
+
+        if isinstance(sources, str):
+            sources = [
+                os.path.join(sources, f) for f in sorted(os.listdir(sources))
+                if os.path.splitext(f)[1].lower() in self.extensions
+            ]
+
+        self.sources = list(sources)
+        if not self.sources:
+            raise ValueError("an Atlas needs at least one image to pack")
+        self.path = path
+        self.image = path + ".png"
+
+        self.names = []  # list<string>, the name of each region: its file name, without the extension
+        self.index = {}  # name: int, position in names
+        # numpy.ndarray<float32>, shape (n, 6): u, v of the bottom left and top right corners, width, height of each region
+        self.regions = None
+
+        meta = self._stamp(padding, max_size)
+        if not self._load_cache(meta):
+            self._pack(meta, padding, max_size)
+
+    @property
+    def texture(self):
+        """
+        :return: kivy.graphics.texture.Texture, the texture all the images are packed in
+        """
+        return textures.texture(self.image)
+
+    def indices(self, names):
+        """
+        get the region index of each name, for sprites()
+        :param names: iterable<string>
+        :return: numpy.ndarray<int>
+        """
+        return np.fromiter((self.index[name] for name in names), dtype=np.intp)
+
+    def _stamp(self, padding, max_size):
+        """
+        describes the sources, so a cached atlas can be checked against them
+        :return: dict
+        """
+        import os
+
+        return dict(
+            padding=padding,
+            max_size=max_size,
+            sources=[[src, os.path.getmtime(src), os.path.getsize(src)] for src in self.sources]
+        )
+
+    def _load_cache(self, meta):
+        """
+        load the cached atlas at <self.path>, if it was packed from the same sources
+        :return: bool, whether the cache could be used
+        """
+        import os, json
+
+        if not (os.path.isfile(self.path + ".json") and os.path.isfile(self.image)):
+            return False
+
+        with open(self.path + ".json") as f:
+            cached = json.load(f)
+
+        if cached["meta"] != meta:
+            return False
+
+        self._set_regions(cached["names"], cached["regions"])
+
+        return True
+
+    def _pack(self, meta, padding, max_size):
+        """
+        pack the sources into rows ('shelves'), tallest images first, and write the atlas and its cache file
+        :return: None
+        """
+        import os, json
+        from PIL import Image
+
+        images = [Image.open(src).convert("RGBA") for src in self.sources]
+        names = [os.path.splitext(os.path.basename(src))[0] for src in self.sources]
+        if len(set(names)) != len(names):
+            raise ValueError("images packed into an Atlas must have unique file names")
+
+        order = sorted(range(len(images)), key=lambda i: images[i].height, reverse=True)
+        area = sum((im.width + padding * 2) * (im.height + padding * 2) for im in images)
+
+        width = 64
+        while width * width < area or width < max(im.width for im in images) + padding * 2:
+            width *= 2
+
+        while True:
+            if width > max_size:
+                raise ValueError(f"images don't fit in an atlas of {max_size}x{max_size}")
+
+            placed = [None] * len(images)  # tuple<x, y(from the top)>
+            x = y = shelf_height = 0
+            for i in order:
+                w, h = images[i].width + padding * 2, images[i].height + padding * 2
+                if x + w > width:  # start a new shelf
+                    x, y, shelf_height = 0, y + shelf_height, 0
+
+                placed[i] = (x + padding, y + padding)
+                x += w
+                shelf_height = max(shelf_height, h)
+
+            height = y + shelf_height
+            if height <= width:
+                break
+
+            width *= 2
+
+        atlas = Image.new("RGBA", (width, width))
+        regions = []
+        for im, (x, y) in zip(images, placed):
+            atlas.paste(im, (x, y))
+            # kivy stores the top row of an image first, so v increases downwards, like y does in PIL
+            regions.append([
+                x / width,
+                (y + im.height) / width,
+                (x + im.width) / width,
+                y / width,
+                im.width,
+                im.height
+            ])
+
+        atlas.save(self.image)
+        textures.evict_image(self.image)  # an older version of the atlas may be cached
+        with open(self.path + ".json", 'w') as f:
+            json.dump(dict(meta=meta, names=names, regions=regions), f)
+
+        self._set_regions(names, regions)
+
+    def _set_regions(self, names, regions):
+        self.names = names
+        self.index = {name: i for i, name in enumerate(names)}
+        self.regions = np.array(regions, dtype=np.float32).reshape(-1, 6)
+
+
+def sprites(atlas, regions, xs, ys, angles=0, scales=1, tints=None):
+    """
+    draw many images from <atlas> at once, all of them are drawn by one Mesh
+    :param atlas: Atlas
+    :param regions: array-like<int> (from Atlas.indices()) or list<string>, which image of the atlas to draw for each
+    sprite
+    :param xs: array-like<number>, x co-ords of the bottom left corner of each (unrotated) sprite
+    :param ys: array-like<number>, y co-ords of the bottom left corner of each (unrotated) sprite
+    :param angles: array-like<number> or number, degrees to rotate each sprite around its centre (like rotate())
+    :param scales: array-like<number> or number, scale of each sprite, 1 draws it at the size of its image
+    :param tints: array-like, shape (n, 3) or (n, 4), colour to multiply each sprite by in the format set_colour()
+    takes tuples in, or None to use the current colour
+    :return: None
+    """
+    xs = np.asarray(xs, dtype=np.float32)
+    n = len(xs)
+    if n == 0:
+        return
+
+    if len(regions) and isinstance(regions[0], str):
+        regions = atlas.indices(regions)
+    u0, v0, u1, v1, widths, heights = atlas.regions[np.asarray(regions, dtype=np.intp)].T
+
+    scales = _batch_array(scales, n)
+    angles = _batch_array(angles, n)
+    tints = None if tints is None else _batch_colours(tints, n)
+    half_w = widths * scales / 2
+    half_h = heights * scales / 2
+    centre_x = xs + half_w
+    centre_y = _batch_array(ys, n) + half_h
+
+    reach = np.hypot(half_w, half_h)  # furthest any corner can be from the centre, whatever the angle
+    visible = _visible_mask(centre_x - reach, centre_y - reach, centre_x + reach, centre_y + reach)
+    if visible is not None:
+        u0, v0, u1, v1 = u0[visible], v0[visible], u1[visible], v1[visible]
+        half_w, half_h = half_w[visible], half_h[visible]
+        centre_x, centre_y, angles = centre_x[visible], centre_y[visible], angles[visible]
+        tints = None if tints is None else tints[visible]
+        n = len(centre_x)
+        if n == 0:
+            return
+
+    # the corners relative to the centre, in the same order as _RECTANGLE_INDICES expects
+    corners_x = np.stack((-half_w, half_w, half_w, -half_w), axis=1)
+    corners_y = np.stack((-half_h, -half_h, half_h, half_h), axis=1)
+
+    radians = np.radians(angles)[:, None]
+    cos_a, sin_a = np.cos(radians), np.sin(radians)
+
+    positions = np.empty((n, 4, 2), dtype=np.float32)
+    positions[:, :, 0] = centre_x[:, None] + corners_x * cos_a - corners_y * sin_a
+    positions[:, :, 1] = centre_y[:, None] + corners_x * sin_a + corners_y * cos_a
+
+    tex_coords = np.empty((n, 4, 2), dtype=np.float32)
+    tex_coords[:, :, 0] = np.stack((u0, u1, u1, u0), axis=1)
+    tex_coords[:, :, 1] = np.stack((v0, v0, v1, v1), axis=1)
+
+    _draw_batch(
+        positions,
+        tints,
+        _rectangle_batch_indices,
+        len(_RECTANGLE_INDICES),
+        tex_coords,
+        atlas.texture
+    )
+
+
+def entities(store, atlas=None):
+    """
+    draw every entity of a panther.utils.entities.EntityStore with one Mesh: as rectangles of their size and colour, or
+    if <atlas> is given, as their sprites tinted by their colour and scaled to their width
+    :param store: panther.utils.entities.EntityStore
+    :param atlas: Atlas
+    :return: None
+    """
+    if atlas is None:
+        rectangles(store.x, store.y, store.width, store.height, store.colour)
+    else:
+        sprite = store.sprite
+        sprites(atlas, sprite, store.x, store.y, scales=store.width / atlas.regions[sprite, 4], tints=store.colour)
+
+
+def _hashable(value):
+    """
+    turns lists (e.g. colours) into tuples so they can be used in a hash key
+    """
+    return tuple(value) if isinstance(value, list) else value
+
+
 class TextStyle:
+    """
+    How text() draws text. TextStyles are immutable (use replace() to get a modified copy), so they can be hashed
+    cheaply as part of the key of the rendered-label cache
+    """
+    __slots__ = (
+        'font_size', 'font_name', 'bold', 'italic', 'underline', 'strikethrough', 'halign', 'valign', 'shorten',
+        'text_size', 'mipmap', 'color', 'line_height', 'strip', 'strip_reflow', 'shorten_from', 'split_str',
+        'unicode_errors', 'font_hinting', 'font_kerning', 'font_blended', 'outline_width', 'outline_color',
+        '_key', '_hash'
+    )
+
     def __init__(
             self,
             font_size=12,
@@ -246,63 +1408,80 @@ class TextStyle:
             outline_width=None,
             outline_color=None
     ):
-        self.font_size = font_size
-        self.font_name = font_name
-        self.bold = bold
-        self.italic = italic
-        self.underline = underline
-        self.strikethrough = strikethrough
-        self.halign = halign
-        self.valign = valign
-        self.shorten = shorten
-        self.text_size = text_size
-        self.mipmap = mipmap
-        self.color = color
-        self.line_height = line_height
-        self.strip = strip
-        self.strip_reflow = strip_reflow
-        self.shorten_from = shorten_from
-        self.split_str = split_str
-        self.unicode_errors = unicode_errors
-        self.font_hinting = font_hinting
-        self.font_kerning = font_kerning
-        self.font_blended = font_blended
-        self.outline_width = outline_width
-        self.outline_color = outline_color
+        values = (
+            font_size, font_name, bold, italic, underline, strikethrough, halign, valign, shorten,
+            _hashable(text_size), mipmap, _hashable(color), line_height, strip, strip_reflow, shorten_from, split_str,
+            unicode_errors, font_hinting, font_kerning, font_blended, outline_width, _hashable(outline_color)
+        )
+
+        for name, value in zip(self.__slots__, values):
+            object.__setattr__(self, name, value)
+
+        object.__setattr__(self, '_key', values)
+        object.__setattr__(self, '_hash', hash(values))
+
+    def __setattr__(self, key, value):
+        raise AttributeError("TextStyle is immutable, use TextStyle.replace() to get a modified copy")
+
+    def __eq__(self, other):
+        return isinstance(other, TextStyle) and self._key == other._key
+
+    def __hash__(self):
+        return self._hash
+
+    def replace(self, **changes):
+        """
+        get a copy of this style with <changes> applied
+        :param changes: dict<string, any>, TextStyle fields
+        :return: TextStyle
+        """
+        style = self.style
+        style.update(changes)
+
+        return TextStyle(**style)
 
     @property
     def style(self):
-        return self.__dict__
+        """
+        :return: dict<string, any>, the fields as keyword arguments for kivy.core.text.Label
+        """
+        return dict(zip(self.__slots__, self._key))
 
 
 def text(x, y, text, style=TextStyle()):
     """
-    Draw text
+    Draw text, the rendered text is cached (see graphics.labels) so redrawing the same string is cheap
     :param x: int, x co-ord
     :param y: int, y co-ord
     :param text: string
+    :param style: TextStyle
     :return: None
     """
-    label = CoreLabel(
-        text,
-        **style.style
-    )
-
-    if label.texture is None:
-        label.refresh()
-
-    #import inspect
-    #import pprint
-    #pprint.pprint(inspect.getmembers(label))#, lambda a: not (inspect.isroutine(a))))
+    texture = labels.texture(text, style)
+    width, height = texture.size
+    if not _visible(x, y, x + width, y + height):
+        return
 
-    print(label.texture)
-
-    rect = Rectangle(
+    _instruction(
+        Rectangle,
         pos=(x, y),
-        texture=label.texture,
-        size=(label.texture.size[0], label.texture.size[1])
+        texture=texture,
+        size=texture.size
     )
 
-    print(rect)
 
-    _draw_graphic(rect)
+def glyph_text(x, y, text, style=TextStyle()):
+    """
+    Draw text from a glyph atlas (see panther.glyphs): each character is only rasterised the first time it's drawn in
+    a font and size, so text which changes every frame (e.g. a score) is much cheaper than with text(). Only the
+    font_name, font_size, text_size (to wrap and align in), halign, valign, line_height, font_kerning and color of
+    <style> are used
+    :param x: int, x co-ord
+    :param y: int, y co-ord
+    :param text: string
+    :param style: TextStyle
+    :return: None
+    """
+    from panther import glyphs
+
+    glyphs.draw(x, y, text, style)
@@ -0,0 +1,269 @@
+"""
+Run panther without a window: graphics calls are recorded into a command buffer instead of being drawn, and frames are
+stepped by a simulated clock as fast as possible. For tests and benchmarks on machines with no display or GPU
+"""
+import time
+from array import array
+from numbers import Real
+import numpy as np
+import panther
+from panther import defaults, graphics
+from panther.cache import TextureCache, LabelCache
+
+
+class HeadlessTexture:
+    """
+    Stands in for a kivy Texture when running headless, only its size is known
+    """
+    __slots__ = ('source', 'width', 'height', 'colorfmt', 'mipmap', 'tex_coords')
+
+    def __init__(self, source, width, height, mipmap=False, tex_coords=(0, 0, 1, 0, 1, 1, 0, 1)):
+        self.source = source
+        self.width = width
+        self.height = height
+        self.colorfmt = 'rgba'
+        self.mipmap = mipmap
+        self.tex_coords = tex_coords  # u, v of the bottom left, bottom right, top right and top left corners
+
+    @property
+    def size(self):
+        return self.width, self.height
+
+    def flip_vertical(self):
+        u0, v0, u1, v1, u2, v2, u3, v3 = self.tex_coords
+        self.tex_coords = (u0, v3, u1, v2, u2, v1, u3, v0)
+
+    def __repr__(self):
+        return f'<HeadlessTexture (source: {self.source}, size: {self.size})>'
+
+
+_FLIPPED = (0, 1, 1, 1, 1, 0, 0, 0)  # the tex_coords of images loaded by kivy, which stores their top row first
+
+
+class _HeadlessTextureCache(TextureCache):
+    @staticmethod
+    def _load(src, mipmap):
+        from PIL import Image
+
+        with Image.open(src) as im:  # only reads the header, the image isn't decoded
+            return HeadlessTexture(src, im.width, im.height, mipmap, _FLIPPED)
+
+    @staticmethod
+    def _create(src, width, height, mipmap):
+        return HeadlessTexture(src, width, height, mipmap)
+
+    @staticmethod
+    def _blit(texture, pixels, y, rows, last, x=0, width=None):
+        pass
+
+
+class _HeadlessLabelCache(LabelCache):
+    @staticmethod
+    def _render(text, style):
+        # no font is rasterised, so the size is only an estimate
+        lines = text.split("\n")
+        return HeadlessTexture(
+            text,
+            int(max(len(line) for line in lines) * style.font_size / 2),
+            int(len(lines) * style.font_size * style.line_height)
+        )
+
+
+class CommandBuffer:
+    """
+    Graphics calls recorded as rows of float32s: an opcode (see names) followed by up to 8 parameters. The parameters
+    are the instruction's keyword arguments, in the order panther.graphics passed them, flattened: numbers as they are,
+    pairs and colours (sequences of at most 4 items) item by item, longer sequences (points, vertices, indices) as
+    their length, and anything else (textures, mesh modes) as an index into objects
+    """
+    width = 9
+
+    def __init__(self):
+        self.data = array('f')
+        self.opcodes = {}  # instruction class: int
+        self.names = []  # name of the instruction class of each opcode
+        self.objects = []  # objects referenced by this frame's commands
+        self._object_ids = {}  # id(object): index in objects
+
+    def record(self, cls, props):
+        """
+        record a graphics call, see panther.graphics._instruction
+        :param cls: kivy.graphics instruction class
+        :param props: dict<str, any>, keyword arguments for <cls>
+        :return: None
+        """
+        op = self.opcodes.get(cls)
+        if op is None:
+            op = self.opcodes[cls] = len(self.names)
+            self.names.append(cls.__name__)
+
+        row = [op]
+        for value in props.values():
+            kind = type(value)  # checked first, isinstance() against the Real ABC is slow
+            if kind is float or kind is int:
+                row.append(value)
+            elif kind is tuple and len(value) <= 4:
+                row.extend(value)
+            elif value is None:
+                continue
+            elif isinstance(value, Real):
+                row.append(value)
+            elif isinstance(value, (tuple, list)) and len(value) <= 4:
+                row.extend(value)
+            elif isinstance(value, str) or not hasattr(value, '__len__'):
+                row.append(self._object(value))
+            else:
+                row.append(len(value))
+
+        del row[self.width:]
+        row.extend((0,) * (self.width - len(row)))
+        self.data.fromlist(row)
+
+    def _object(self, obj):
+        index = self._object_ids.get(id(obj))
+        if index is None:
+            index = self._object_ids[id(obj)] = len(self.objects)
+            self.objects.append(obj)
+
+        return index
+
+    def commands(self):
+        """
+        :return: numpy.ndarray<float32>, shape (len(self), CommandBuffer.width)
+        """
+        return np.frombuffer(self.data, dtype=np.float32).reshape(-1, self.width)
+
+    def count(self, name):
+        """
+        :param name: string, name of an instruction class, e.g. "Rectangle"
+        :return: int, number of commands of that class
+        """
+        try:
+            op = self.names.index(name)
+        except ValueError:
+            return 0
+
+        return int(np.count_nonzero(self.commands()[:, 0] == op))
+
+    def clear(self):
+        """
+        forget every command, like clearing the canvas
+        :return: None
+        """
+        del self.data[:]
+        self.objects.clear()
+        self._object_ids.clear()
+
+    def __len__(self):
+        return len(self.data) // self.width
+
+
+class HeadlessCanvas:
+    """
+    Stands in for panther.canvas (a _CanvasWidget) when running headless
+    """
+    def __init__(self, commands):
+        self.commands = commands
+        self.canvas = self  # panther.graphics adds instructions to panther.canvas.canvas
+        self.pos = (0, 0)
+
+    @property
+    def size(self):
+        return panther.conf.width, panther.conf.height
+
+    def clear(self):
+        self.commands.clear()
+
+    def add(self, obj):
+        self.commands.record(type(obj), {})
+
+
+class HeadlessApp:
+    """
+    Steps load/update/draw with a simulated clock, recording what is drawn into a CommandBuffer. Use as a context
+    manager, or call start() and stop():
+
+    with HeadlessApp() as app:
+        app.step(100)
+        assert app.commands.count("Rectangle") == 1
+    """
+    def __init__(self, dt=None):
+        """
+        :param dt: float, simulated seconds per frame, defaults to 1 / panther.conf.max_fps
+        """
+        self.dt = dt or 1 / panther.conf.max_fps
+        self.time = 0.0  # simulated seconds since start()
+        self.frames = 0
+        self.commands = CommandBuffer()  # what was drawn in the last frame
+        self.commands_recorded = 0  # over every frame
+
+        self._replaced = None
+
+    def start(self):
+        """
+        replace panther's canvas and texture loading with headless versions, then execute the load event
+        :return: None
+        """
+        self._replaced = (panther.canvas, graphics._recorder, graphics.textures, graphics.labels)
+
+        panther.canvas = HeadlessCanvas(self.commands)
+        graphics._recorder = self.commands
+        graphics.textures = _HeadlessTextureCache(graphics.textures.max_bytes)
+        graphics.labels = _HeadlessLabelCache(graphics.labels.max_bytes)
+
+        panther.events.execute('load')
+
+    def stop(self):
+        """
+        put back everything start() replaced
+        :return: None
+        """
+        panther.canvas, graphics._recorder, graphics.textures, graphics.labels = self._replaced
+
+    def step(self, frames=1):
+        """
+        handle queued events, then update and draw, <frames> times
+        :param frames: int
+        :return: None
+        """
+        for _ in range(frames):
+            defaults.default_event_parse(self.dt)
+
+            if panther.conf.clear_every_frame:
+                self.commands.clear()
+            recorded = len(self.commands)
+
+            panther._tick(self.dt)
+
+            self.commands_recorded += len(self.commands) - recorded
+            self.time += self.dt
+            self.frames += 1
+
+    def run(self, frames):
+        """
+        step <frames> frames as fast as possible, and measure how fast that was
+        :param frames: int
+        :return: dict<string, number>
+        """
+        recorded = self.commands_recorded
+        start = time.perf_counter()
+
+        self.step(frames)
+
+        seconds = time.perf_counter() - start
+        commands = self.commands_recorded - recorded
+
+        return dict(
+            frames=frames,
+            seconds=seconds,
+            frames_per_second=frames / seconds,
+            commands=commands,
+            commands_per_second=commands / seconds
+        )
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
@@ -1,40 +1,149 @@
 """
 Abstract away from the basic panther.events supplied event model for keypresses
 """
-from collections import defaultdict
 import panther
 
-_keys = defaultdict(bool)
+_KEYCODES = 512  # keycodes below this index the key state directly
+_SIZE = 1024  # larger keycodes are given one of the slots from _KEYCODES up to this, in the order they're first seen
+
+_slots = {}  # key name or keycode: int(index into the key state), learned from the key events
+_overflow = _KEYCODES  # next slot for a keycode >= _KEYCODES
+
+# back buffer, written by the event handlers
+_keys = bytearray(_SIZE)  # 1 for each key which is down
+_presses = bytearray(_SIZE)  # 1 for each key pressed since the last swap
+_releases = bytearray(_SIZE)  # 1 for each key released since the last swap
+
+# front buffer, read by update and draw
+_down = bytearray(_SIZE)  # the keys which were down at the start of this tick
+_pressed = bytearray(_SIZE)  # the keys pressed between the last tick and this one
+_released = bytearray(_SIZE)  # the keys released between the last tick and this one
+
+_NOTHING = bytes(_SIZE)
+
+_chords = {}  # string(e.g. "lctrl+c"): tuple<string(key names)>
+
+
+def _swap():
+    """
+    publish the back buffer, called once at the start of each tick (see panther._tick)
+    :return: None
+    """
+    _down[:] = _keys
+    _pressed[:] = _presses
+    _released[:] = _releases
+
+    _presses[:] = _NOTHING
+    _releases[:] = _NOTHING
+
+
+def _slot(keycode):
+    """
+    get the index of a key in the key state, giving it one if it hasn't got one yet
+    :param keycode: tuple<int(key unicode id), str(key name)>
+    :return: int, or None if every slot has been given out
+    """
+    global _overflow
+
+    code, name = keycode
+
+    slot = _slots.get(code)
+    if slot is None:
+        if 0 <= code < _KEYCODES:
+            slot = code
+        elif _overflow < _SIZE:
+            slot = _overflow
+            _overflow += 1
+        else:
+            print(f"PANTHER WARNING: no room for key {keycode}, it will be ignored")
+            return None
+
+        _slots[code] = slot
+
+    if name and name not in _slots:
+        _slots[name] = slot
+
+    return slot
 
 
 @panther.events.on("keydown")
 def _update_key_down(keyboard, keycode, text, modifiers):
     """
-    update the key in _keys to True
+    mark the key as down in _keys
     :param keyboard: Keyboard object
-    :param keycode: tuple<int(key unicode id), str(key name)> - we use the str key name since it's nicer
+    :param keycode: tuple<int(key unicode id), str(key name)>
     :param text:
     :param modifiers:
     :return: None
     """
-    _keys[keycode[1]] = True
+    slot = _slot(keycode)
+    if slot is not None:
+        _keys[slot] = 1
+        _presses[slot] = 1
 
 
 @panther.events.on("keyup")
 def _update_key_up(keyboard, keycode):
     """
-    update the key in _keys to False
+    mark the key as up in _keys
     :param keyboard: Keyboard object
-    :param keycode: tuple<int(key unicode id), str(key name)> - we use the str key name since it's nicer
+    :param keycode: tuple<int(key unicode id), str(key name)>
     :return: None
     """
-    _keys[keycode[1]] = False
+    slot = _slot(keycode)
+    if slot is not None:
+        _keys[slot] = 0
+        _releases[slot] = 1
 
 
 def down(keyname):
     """
-    whether or not <key> is currently pressed
-    :param keyname: string
+    whether or not <key> was pressed at the start of this tick
+    :param keyname: string, or int keycode
+    :return: bool
+    """
+    slot = _slots.get(keyname)
+    return slot is not None and _down[slot] == 1
+
+
+def pressed_this_frame(keyname):
+    """
+    whether or not <key> went down since the last tick (even if it has already been released again)
+    :param keyname: string, or int keycode
+    :return: bool
+    """
+    slot = _slots.get(keyname)
+    return slot is not None and _pressed[slot] == 1
+
+
+def released_this_frame(keyname):
+    """
+    whether or not <key> went up since the last tick
+    :param keyname: string, or int keycode
     :return: bool
     """
-    return _keys[keyname]
+    slot = _slots.get(keyname)
+    return slot is not None and _released[slot] == 1
+
+
+def chord(keys, pressed_this_frame=False):
+    """
+    whether or not every key in <keys> is down, e.g. chord("lctrl+s")
+    :param keys: string, key names joined by "+"
+    :param pressed_this_frame: bool, also require one of the keys to have gone down since the last tick, so the chord
+    is only true on the frame it's completed
+    :return: bool
+    """
+    names = _chords.get(keys)
+    if names is None:
+        names = _chords[keys] = tuple(keys.split("+"))
+
+    completed = not pressed_this_frame
+    for name in names:
+        slot = _slots.get(name)
+        if slot is None or not _down[slot]:
+            return False
+        if _pressed[slot]:
+            completed = True
+
+    return completed
@@ -0,0 +1,175 @@
+"""
+Particle effects: every particle of an emitter is spawned, moved, aged and culled with NumPy array operations, and all
+of them are drawn by one Mesh (or one per 10922 particles) built in buffers which are reused every frame
+"""
+import numpy as np
+from panther import graphics
+
+_COLOUR_STEPS = 256  # colour_over_life is looked up in a table with this many steps
+
+
+def _range(value):
+    """
+    :param value: number, or tuple<min, max>
+    :return: tuple<min, max>
+    """
+    try:
+        low, high = value
+    except TypeError:
+        low = high = value
+
+    return float(low), float(high)
+
+
+class Emitter:
+    """
+    Spawns particles at (x, y), call update() from the update event and draw() from the draw event:
+
+    sparks = Emitter(250, 200, rate=500, speed=(50, 150), spread=30, colour_over_life=((255, 200, 0), (255, 0, 0, 0)))
+    """
+    def __init__(self, x, y, rate=100, lifetime=1, speed=100, angle=0, spread=360, gravity=(0, 0), size=4,
+                 colour_over_life=((255, 255, 255, 1), (255, 255, 255, 0)), image=None, max_particles=10000,
+                 seed=None):
+        """
+        :param x: number, x co-ord particles are spawned at
+        :param y: number, y co-ord particles are spawned at
+        :param rate: number, particles spawned per second
+        :param lifetime: number or tuple<min, max>, seconds each particle lives for
+        :param speed: number or tuple<min, max>, initial speed of each particle
+        :param angle: number, degrees, the direction particles are sent in (0 is up, like panther.utils.move_on_angle)
+        :param spread: number, degrees, particles are sent in directions up to half of this either side of <angle>
+        :param gravity: tuple<x, y>, acceleration of every particle
+        :param size: number, width and height of each particle
+        :param colour_over_life: tuple<colour>, colours (in the format set_colour() takes tuples in) each particle
+        fades through, evenly spaced over its life
+        :param image: string, location of an image to draw each particle with, None for squares
+        :param max_particles: int, particles alive at once, no more are spawned until some have died
+        :param seed: int, seed for the random number generator
+        """
+        self.x, self.y = x, y
+        self.rate = rate
+        self.lifetime = lifetime
+        self.speed = speed
+        self.angle = angle
+        self.spread = spread
+        self.gravity = gravity
+        self.size = size
+        self.image = image
+        self.emitting = True
+
+        self.colour_over_life = colour_over_life
+        self.max_particles = max_particles
+        self.count = 0  # particles alive, they are the first <count> of each array
+
+        self.positions = np.zeros((max_particles, 2), dtype=np.float32)
+        self.velocities = np.zeros((max_particles, 2), dtype=np.float32)
+        self.ages = np.zeros(max_particles, dtype=np.float32)
+        self.lifetimes = np.ones(max_particles, dtype=np.float32)
+
+        self._vertices = np.zeros((max_particles, 4, 8), dtype=np.float32)  # x, y, u, v, r, g, b, a of each corner
+        self._texture = None  # the texture whose tex_coords are in _vertices
+        self._to_spawn = 0.0
+        self._random = np.random.default_rng(seed)
+
+    @property
+    def colour_over_life(self):
+        return self._colour_stops
+
+    @colour_over_life.setter
+    def colour_over_life(self, colours):
+        self._colour_stops = colours
+        rgba = [tuple(colour) + (1,) * (4 - len(colour)) for colour in colours]  # rgb colours are opaque
+        stops = graphics._batch_colours(rgba, len(rgba))
+        steps = np.linspace(0, 1, _COLOUR_STEPS)
+        self._colours = np.stack(
+            [np.interp(steps, np.linspace(0, 1, len(stops)), stops[:, channel]) for channel in range(4)], axis=1
+        ).astype(np.float32)
+
+    def emit(self, n):
+        """
+        spawn <n> particles now (as many as there's room for)
+        :param n: int
+        :return: int, the number spawned
+        """
+        start = self.count
+        n = min(int(n), self.max_particles - start)
+        if n <= 0:
+            return 0
+        new = slice(start, start + n)
+        random = self._random
+
+        half_spread = self.spread / 2
+        angles = np.radians(self.angle + 90 + random.uniform(-half_spread, half_spread, n))
+        speeds = random.uniform(*_range(self.speed), n)
+
+        self.positions[new] = (self.x, self.y)
+        self.velocities[new, 0] = np.cos(angles) * speeds
+        self.velocities[new, 1] = np.sin(angles) * speeds
+        self.ages[new] = 0
+        self.lifetimes[new] = random.uniform(*_range(self.lifetime), n)
+        self.count += n
+
+        return n
+
+    def update(self, dt):
+        """
+        spawn, move, age and cull the particles
+        :param dt: float, seconds since the last update
+        :return: None
+        """
+        n = self.count
+        if n:
+            velocities = self.velocities[:n]
+            velocities += np.multiply(self.gravity, dt, dtype=np.float32)
+            self.positions[:n] += velocities * dt
+            ages = self.ages[:n]
+            ages += dt
+
+            alive = ages < self.lifetimes[:n]
+            if not alive.all():
+                self.count = count = int(np.count_nonzero(alive))
+                for array in (self.positions, self.velocities, self.ages, self.lifetimes):
+                    array[:count] = array[:n][alive]
+
+        if self.emitting:
+            self._to_spawn += self.rate * dt
+            spawn = int(self._to_spawn)
+            self._to_spawn -= spawn
+            self.emit(spawn)
+
+    def draw(self):
+        """
+        draw every live particle
+        :return: None
+        """
+        n = self.count
+        if not n:
+            return
+
+        vertices = self._vertices[:n]
+        half = self.size / 2
+        x, y = self.positions[:n, 0, None], self.positions[:n, 1, None]
+        np.add(x, (-half, half, half, -half), out=vertices[:, :, 0])
+        np.add(y, (-half, -half, half, half), out=vertices[:, :, 1])
+
+        steps = (self.ages[:n] / self.lifetimes[:n] * (_COLOUR_STEPS - 1)).astype(np.intp)
+        vertices[:, :, 4:8] = self._colours[np.minimum(steps, _COLOUR_STEPS - 1), None, :]
+
+        texture = None if self.image is None else graphics.textures.texture(self.image)
+        if texture is not self._texture:
+            # in the corner order of kivy's tex_coords, which images loaded by kivy have flipped vertically, and
+            # regions of a texture have inside it
+            self._vertices[:, :, 2:4] = 0 if texture is None else np.reshape(texture.tex_coords, (4, 2))
+            self._texture = texture
+        graphics._draw_vertices(vertices, graphics._rectangle_batch_indices, len(graphics._RECTANGLE_INDICES), texture)
+
+    def clear(self):
+        """
+        kill every particle
+        :return: None
+        """
+        self.count = 0
+        self._to_spawn = 0.0
+
+    def __len__(self):
+        return self.count
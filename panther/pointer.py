@@ -1,35 +1,282 @@
 """
 higher-level pointer events API
 """
-import threading
+import warnings
+from array import array
+from math import floor
 import panther
 
 
-_pointers = {}
+class PointerSnapshot:
+    """
+    The pointers as they were at the start of a tick, which is what update and draw read. The event handlers only
+    write to the back buffer, which is published as a new snapshot once per tick (see _swap), so which pointers a
+    snapshot holds never changes while it is being read and no locks are needed.
+    The Pointer objects themselves are NOT copied, they're shared with the back buffer so their paths don't have to be
+    copied every tick: the event handlers (which run on the main thread, between ticks) keep adding drags to their
+    path and marking them expired. Within a tick they don't change, but a Pointer kept from an earlier tick shows its
+    latest state, copy what you need from it (e.g. list(pointer.path)) to keep the state it had
+    """
+    __slots__ = ('loc', 'clicks', 'touches', 'pointers', 'expired')
+
+    def __init__(self, loc=(0, 0), clicks=(), touches=(), pointers=(), expired=()):
+        """
+        :param loc: tuple<x, y>, pointer location
+        :param clicks: tuple<Pointer>, pointers of type "click", in the order they went down
+        :param touches: tuple<Pointer>, pointers of type "touch", in the order they went down
+        :param pointers: tuple<Pointer>, every pointer, in the order they went down
+        :param expired: tuple<Pointer>, pointers which had been released
+        """
+        self.loc = loc
+        self.clicks = clicks
+        self.touches = touches
+        self.pointers = pointers
+        self.expired = expired
+
 
+# back buffer, only written by the event handlers
+_pointers = {}  # uid: Pointer
+_by_type = dict(click={}, touch={})  # type: dict<uid, Pointer>
 _pointer_loc = (0, 0)
-_pointer_loc_lock = threading.Lock()
+_changed = False  # whether pointers were added or expired since the last swap
+_remove_expired = set()  # types of pointer whose expired pointers are removed at the next swap
+
+snapshot = PointerSnapshot()  # front buffer, read by update and draw
+
+
+def _swap():
+    """
+    publish the back buffer as the new snapshot, called once at the start of each tick (see panther._tick)
+    :return: None
+    """
+    global snapshot, _changed
+
+    if _remove_expired:
+        for pointer in snapshot.expired:
+            if pointer.type in _remove_expired and _pointers.get(pointer.id) is pointer:
+                del _pointers[pointer.id]
+                del _by_type[pointer.type][pointer.id]
+                _changed = True
+        _remove_expired.clear()
+
+    if _changed:
+        clicks = tuple(_by_type["click"].values())
+        touches = tuple(_by_type["touch"].values())
+        pointers = tuple(_pointers.values())
+        snapshot = PointerSnapshot(
+            _pointer_loc, clicks, touches, pointers, tuple(pointer for pointer in pointers if pointer.expired)
+        )
+        _changed = False
+    elif _pointer_loc is not snapshot.loc:
+        snapshot = PointerSnapshot(_pointer_loc, snapshot.clicks, snapshot.touches, snapshot.pointers, snapshot.expired)
 
 
 def pointer_loc():
     """
-    get the current pointer loc
+    get the pointer loc at the start of this tick
     :return: tuple<x, y>
     """
-    with _pointer_loc_lock:
-        return _pointer_loc
+    return snapshot.loc
 
 
 class Pointer:
-    def __init__(self, uid, x, y, type="click"):
+    __slots__ = ('id', 'type', 'x', 'y', 'path', 'added', 'max_points', 'min_distance', 'expired', 'region', 'trail')
+
+    def __init__(self, uid, x, y, type="click", max_points=None, min_distance=0):
+        """
+        :param uid: int, id of the touch
+        :param x: number, x co-ord the pointer went down at
+        :param y: number, y co-ord the pointer went down at
+        :param type: string, "click" or "touch"
+        :param max_points: int, only the newest <max_points> points are kept, None to keep every point
+        :param min_distance: number, points closer than this to the last point kept are dropped
+        """
         self.id = uid
         self.type = type
         self.x, self.y = x, y
 
-        self.points = [(x, y)]
+        self.path = array('f', (x, y))  # flat: x, y, x, y, ... which can be passed straight to kivy.graphics.Line
+        self.added = 1  # number of points ever added, including those dropped by max_points
+        self.max_points = max_points
+        self.min_distance = min_distance
 
         self.expired = False
 
+        self.region = None  # id of the topmost region (see regions) under the pointer when it went down
+        self.trail = None  # list, see panther.graphics.trail
+
+    @property
+    def points(self):
+        """
+        DEPRECATED: use Pointer.path, which is kept flat instead of being rebuilt as a list of pairs on every access
+        :return: list<tuple<x, y> >, the points of the pointer's path
+        """
+        warnings.warn("Pointer.points is deprecated, use Pointer.path (flat: x, y, x, y, ...)", DeprecationWarning, 2)
+
+        path = self.path
+        return list(zip(path[0::2], path[1::2]))
+
+    def add_point(self, x, y):
+        """
+        add a point to the end of the pointer's path
+        :param x: number, x co-ord
+        :param y: number, y co-ord
+        :return: bool, whether the point was kept (see min_distance)
+        """
+        points = self.path
+
+        if self.min_distance and points:
+            dx, dy = x - points[-2], y - points[-1]
+            if dx * dx + dy * dy < self.min_distance * self.min_distance:
+                return False
+
+        points.append(x)
+        points.append(y)
+        self.added += 1
+
+        if self.max_points is not None and len(points) > 2 * self.max_points:
+            del points[:len(points) - 2 * self.max_points]
+
+        return True
+
+
+class _Region:
+    __slots__ = ('id', 'circle', 'x', 'y', 'width', 'height', 'z', 'order', 'cells')
+
+    def contains(self, x, y):
+        if self.circle:
+            r = self.width / 2
+            dx, dy = x - (self.x + r), y - (self.y + r)
+            return dx * dx + dy * dy <= r * r
+
+        return self.x <= x <= self.x + self.width and self.y <= y <= self.y + self.height
+
+
+class RegionIndex:
+    """
+    Rectangular and circular regions of the screen which can be hit by pointers, stored in a uniform grid so finding
+    the regions under a point only has to check the regions in one cell, however many regions there are.
+    Touches which hit a region trigger the regiondown, regionup and regiondrag events, with (region id, touch)
+    """
+    def __init__(self, cell_size=64):
+        """
+        :param cell_size: number, width and height of each grid cell, roughly the size of a typical region is best
+        """
+        self.cell_size = cell_size
+        self._regions = {}  # id: _Region
+        self._cells = {}  # tuple<int(x), int(y)>: list<_Region>
+        self._added = 0
+
+    def add_rectangle(self, region_id, x, y, width, height, z=0):
+        """
+        add a rectangular region (or move it, if <region_id> already exists)
+        :param region_id: hashable, returned by hit(), and passed to the region events
+        :param x: number, x co-ord of the bottom left corner
+        :param y: number, y co-ord of the bottom left corner
+        :param width: number
+        :param height: number
+        :param z: number, regions with a higher z are on top, for equal z, regions added later are on top
+        :return: None
+        """
+        self._add(region_id, False, x, y, width, height, z)
+
+    def add_circle(self, region_id, x, y, radius, z=0):
+        """
+        add a circular region (or move it, if <region_id> already exists)
+        :param region_id: hashable, returned by hit(), and passed to the region events
+        :param x: number, x co-ord of the centre
+        :param y: number, y co-ord of the centre
+        :param radius: number
+        :param z: number, regions with a higher z are on top, for equal z, regions added later are on top
+        :return: None
+        """
+        self._add(region_id, True, x - radius, y - radius, radius * 2, radius * 2, z)
+
+    def _add(self, region_id, circle, x, y, width, height, z):
+        self.remove(region_id)
+
+        region = _Region()
+        region.id = region_id
+        region.circle = circle
+        region.x, region.y, region.width, region.height = x, y, width, height
+        region.z = z
+        region.order = self._added
+        self._added += 1
+
+        size = self.cell_size
+        region.cells = [
+            (cx, cy)
+            for cx in range(floor(x / size), floor((x + width) / size) + 1)
+            for cy in range(floor(y / size), floor((y + height) / size) + 1)
+        ]
+        for cell in region.cells:
+            self._cells.setdefault(cell, []).append(region)
+
+        self._regions[region_id] = region
+
+    def remove(self, region_id):
+        """
+        remove a region
+        :param region_id: hashable
+        :return: bool, whether the region existed
+        """
+        region = self._regions.pop(region_id, None)
+        if region is None:
+            return False
+
+        for cell in region.cells:
+            in_cell = self._cells[cell]
+            in_cell.remove(region)
+            if not in_cell:
+                del self._cells[cell]
+
+        return True
+
+    def clear(self):
+        """
+        remove every region
+        :return: None
+        """
+        self._regions.clear()
+        self._cells.clear()
+
+    def hits(self, x, y):
+        """
+        get every region containing a point, topmost first
+        :param x: number, x co-ord
+        :param y: number, y co-ord
+        :return: list<hashable>, region ids
+        """
+        size = self.cell_size
+        candidates = self._cells.get((floor(x / size), floor(y / size)), ())
+        found = sorted((r for r in candidates if r.contains(x, y)), key=lambda r: (r.z, r.order), reverse=True)
+
+        return [region.id for region in found]
+
+    def hit(self, x, y):
+        """
+        get the topmost region containing a point
+        :param x: number, x co-ord
+        :param y: number, y co-ord
+        :return: hashable, the region's id, or None if no region contains the point
+        """
+        size = self.cell_size
+        top = None
+        for region in self._cells.get((floor(x / size), floor(y / size)), ()):
+            if (top is None or (region.z, region.order) > (top.z, top.order)) and region.contains(x, y):
+                top = region
+
+        return None if top is None else top.id
+
+    def __contains__(self, region_id):
+        return region_id in self._regions
+
+    def __len__(self):
+        return len(self._regions)
+
+
+regions = RegionIndex()
+
 
 @panther.events.on('mousepos')
 def mouse_pos(pos):
@@ -39,8 +286,7 @@ def mouse_pos(pos):
     :return: None
     """
     global _pointer_loc
-    with _pointer_loc_lock:
-        _pointer_loc = pos
+    _pointer_loc = pos
 
 
 @panther.events.on('touchdown')
@@ -49,22 +295,40 @@ def touch_down(touch):
     Add a new Pointer to the pointers
     :return: None
     """
-    print(f"touch: {touch.__dict__}")
-    _pointers[touch.uid] = Pointer(
+    global _changed
+
+    pointer = _pointers[touch.uid] = Pointer(
         touch.uid,
         touch.x,
         touch.y,
-        "click" if touch.device == "mouse" else "touch"
+        "click" if touch.device == "mouse" else "touch",
+        panther.conf.max_pointer_points,
+        panther.conf.pointer_min_distance
     )
+    _by_type[pointer.type][touch.uid] = pointer
+    _changed = True
+
+    if regions:
+        pointer.region = regions.hit(touch.x, touch.y)
+        if pointer.region is not None:
+            panther.events.execute('regiondown', pointer.region, touch)
 
 
 @panther.events.on('touchup')
 def touch_up(touch):
     """
-    remove the Pointer from the pointers
+    mark the Pointer as expired, it is removed once read with remove_expired
     :return: None
     """
+    global _changed
+
     _pointers[touch.uid].expired = True
+    _changed = True
+
+    if regions:
+        region = regions.hit(touch.x, touch.y)
+        if region is not None:
+            panther.events.execute('regionup', region, touch)
 
 
 @panther.events.on('touchdrag')
@@ -73,34 +337,50 @@ def touch_drag(touch):
     Add more points to the Pointer in pointers
     :return: None
     """
-    _pointers[touch.uid].points.append((touch.x, touch.y))
+    _pointers[touch.uid].add_point(touch.x, touch.y)
+
+    if regions:
+        region = regions.hit(touch.x, touch.y)
+        if region is not None:
+            panther.events.execute('regiondrag', region, touch)
 
 
 def clicks(remove_expired=True):
     """
-    returns a list of the clicks which have occurred
-    :return: list<Pointer>
+    returns the clicks which have occurred, as of the start of this tick, in the order they went down. When
+    conf.differentiate_between_touches_and_clicks is off this is every pointer. The Pointers are shared with the event
+    handlers, see PointerSnapshot
+    :param remove_expired: bool, whether to remove released clicks (from the next tick on), once they have been returned
+    :return: tuple<Pointer>
     """
-    for pointer in tuple(_pointers.keys()):
-        if panther.conf.differentiate_between_touches_and_clicks and _pointers[pointer].type == "click":
-            yield _pointers[pointer]
-        elif not panther.conf.differentiate_between_touches_and_clicks:
-            yield _pointers[pointer]
+    if not panther.conf.differentiate_between_touches_and_clicks:
+        return _all(remove_expired)
 
-        if _pointers[pointer].expired and remove_expired:
-            del _pointers[pointer]
+    if remove_expired:
+        _remove_expired.add("click")
+
+    return snapshot.clicks
 
 
 def touches(remove_expired=True):
     """
-    returns a list of the touches which have occurred
-    :return:
+    returns the touches which have occurred, as of the start of this tick, in the order they went down. When
+    conf.differentiate_between_touches_and_clicks is off this is every pointer. The Pointers are shared with the event
+    handlers, see PointerSnapshot
+    :param remove_expired: bool, whether to remove released touches (from the next tick on), once they have been returned
+    :return: tuple<Pointer>
     """
-    for pointer in tuple(_pointers.keys()):
-        if panther.conf.differentiate_between_touches_and_clicks and _pointers[pointer].type == "touch":
-            yield _pointers[pointer]
-        elif not panther.conf.differentiate_between_touches_and_clicks:
-            yield _pointers[pointer]
+    if not panther.conf.differentiate_between_touches_and_clicks:
+        return _all(remove_expired)
+
+    if remove_expired:
+        _remove_expired.add("touch")
+
+    return snapshot.touches
+
+
+def _all(remove_expired):
+    if remove_expired:
+        _remove_expired.update(_by_type)
 
-        if _pointers[pointer].expired and remove_expired:
-            _pointers.pop(pointer)
+    return snapshot.pointers
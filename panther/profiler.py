@@ -0,0 +1,185 @@
+"""
+Per-frame timings of panther's main loop, turned on by panther.conf.profile
+"""
+import json
+import numpy as np
+
+
+class FrameProfiler:
+    """
+    Records how long each phase of the last <capacity> frames took, in a ring buffer
+    """
+    fields = (
+        'start',  # perf_counter() when the update phase started
+        'events_start',  # perf_counter() when the event pump started
+        'events',  # seconds spent handling queued events (panther.defaults.default_event_parse)
+        'update',  # seconds spent in update
+        'clear',  # seconds spent clearing the canvas (or preparing it in retained mode)
+        'draw',  # seconds spent in draw
+        'instructions'  # number of instructions added to the canvas through panther.graphics
+    )
+    phases = ('events', 'update', 'clear', 'draw')
+
+    def __init__(self, capacity=600, overlay_interval=0.25):
+        """
+        :param capacity: int, number of frames to keep
+        :param overlay_interval: float, seconds between updates of the overlay's text, so drawing it doesn't change
+        (and cost) much itself
+        """
+        self.frames_recorded = 0
+        self.buffer = np.zeros((capacity, len(self.fields)), dtype=np.float64)
+        self.overlay_interval = overlay_interval
+
+        self._overlay_text = None
+        self._overlay_time = 0  # start of the frame the overlay's text was made from
+
+        self._events_start = 0
+        self._events = 0
+
+    def events_handled(self, start, duration):
+        """
+        called after the event pump has run, the time is added to the next frame recorded
+        :param start: float, perf_counter() when the pump started
+        :param duration: float, seconds
+        :return: None
+        """
+        if not self._events:
+            self._events_start = start
+        self._events += duration
+
+    def record(self, start, update, clear, draw, instructions):
+        """
+        record a frame
+        :param start: float, perf_counter() when the frame started
+        :param update: float, seconds
+        :param clear: float, seconds
+        :param draw: float, seconds
+        :param instructions: int
+        :return: None
+        """
+        self.buffer[self.frames_recorded % len(self.buffer)] = (
+            start, self._events_start or start, self._events, update, clear, draw, instructions
+        )
+        self.frames_recorded += 1
+
+        self._events_start = 0
+        self._events = 0
+
+    def frames(self):
+        """
+        get the recorded frames, oldest first
+        :return: numpy.ndarray<float64>, shape (frames, len(fields)), see FrameProfiler.fields
+        """
+        capacity = len(self.buffer)
+        if self.frames_recorded <= capacity:
+            return self.buffer[:self.frames_recorded]
+
+        return np.roll(self.buffer, -(self.frames_recorded % capacity), axis=0)
+
+    def column(self, field):
+        """
+        :param field: string, one of FrameProfiler.fields
+        :return: numpy.ndarray<float64>, the value of <field> for each recorded frame, oldest first
+        """
+        return self.frames()[:, self.fields.index(field)]
+
+    def summary(self, percentiles=(50, 90, 99)):
+        """
+        percentiles of each phase, the whole frame, and the number of instructions
+        :param percentiles: tuple<number>
+        :return: dict<string, dict<string, float> >, e.g. summary()['draw']['p99']
+        """
+        frames = self.frames()
+        if not len(frames):
+            return {}
+
+        columns = {phase: frames[:, self.fields.index(phase)] for phase in self.phases}
+        columns['frame'] = sum(columns.values())
+        columns['instructions'] = frames[:, self.fields.index('instructions')]
+
+        return {
+            name: dict(
+                mean=float(values.mean()),
+                max=float(values.max()),
+                **{f"p{p}": float(v) for p, v in zip(percentiles, np.percentile(values, percentiles))}
+            )
+            for name, values in columns.items()
+        }
+
+    def clear(self):
+        """
+        forget every recorded frame
+        :return: None
+        """
+        self.frames_recorded = 0
+        self._events_start = 0
+        self._events = 0
+        self._overlay_text = None
+
+    def export_json(self, path):
+        """
+        write the recorded frames and their summary to a JSON file
+        :param path: string
+        :return: None
+        """
+        with open(path, 'w') as f:
+            json.dump(dict(
+                fields=self.fields,
+                frames=self.frames().tolist(),
+                summary=self.summary()
+            ), f)
+
+    def export_chrome_trace(self, path):
+        """
+        write the recorded frames in the Chrome trace event format, which can be opened in chrome://tracing or Perfetto
+        :param path: string
+        :return: None
+        """
+        events = []
+        for start, events_start, *durations, instructions in self.frames():
+            events.append(self._trace_event('events', events_start, durations[0]))
+
+            ts = start
+            for phase, duration in zip(self.phases[1:], durations[1:]):
+                events.append(self._trace_event(phase, ts, duration))
+                ts += duration
+
+            events.append(dict(name='instructions', ph='C', ts=start * 1e6, pid=0, args=dict(added=instructions)))
+
+        with open(path, 'w') as f:
+            json.dump(dict(traceEvents=events, displayTimeUnit='ms'), f)
+
+    @staticmethod
+    def _trace_event(name, start, duration):
+        return dict(name=name, ph='X', ts=start * 1e6, dur=duration * 1e6, pid=0, tid=0)
+
+    def draw_overlay(self, x=5, y=5):
+        """
+        draw the last frame's timings, and the 99th percentile frame time, on the screen (call from draw). The text is
+        only remade every <overlay_interval> seconds, in between the same string is drawn again
+        :param x: int, x co-ord
+        :param y: int, y co-ord
+        :return: None
+        """
+        from panther import graphics
+
+        if not self.frames_recorded:
+            return
+
+        last = dict(zip(self.fields, self.buffer[(self.frames_recorded - 1) % len(self.buffer)]))
+        if self._overlay_text is None or abs(last['start'] - self._overlay_time) >= self.overlay_interval:
+            frame = sum(last[phase] for phase in self.phases)
+            p99 = np.percentile(sum(self.column(phase) for phase in self.phases), 99)
+
+            self._overlay_time = last['start']
+            self._overlay_text = " ".join(
+                [f"frame {frame * 1000:.1f}ms (p99 {p99 * 1000:.1f}ms)"] +
+                [f"{phase} {last[phase] * 1000:.1f}ms" for phase in self.phases] +
+                [f"instructions {int(last['instructions'])}"]
+            )
+
+        graphics.set_colour("FFFF00")
+        graphics.glyph_text(x, y, self._overlay_text)
+
+
+profiler = FrameProfiler()
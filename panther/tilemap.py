@@ -0,0 +1,176 @@
+"""
+Large tile maps, split into square chunks of tiles. Each chunk's vertices are built once, on a shared tileset (a
+panther.graphics.Atlas), and drawn as one Mesh, and only the chunks which can be seen are drawn
+"""
+from math import floor
+import numpy as np
+from kivy.graphics import Mesh
+from panther import graphics
+
+EMPTY = -1  # tile number of a space with no tile
+
+
+class _Chunk:
+    __slots__ = ('vertices', 'count', 'mesh')
+
+    def __init__(self, vertices, count):
+        self.vertices = vertices  # numpy.ndarray<float32>, x, y, u, v of each corner of each tile
+        self.count = count  # number of tiles which aren't EMPTY
+        self.mesh = None  # kivy.graphics.Mesh, made the first time the chunk is drawn
+
+
+class Tilemap:
+    """
+    A grid of tiles, where tiles[row, column] is the region of <tileset> drawn there. Row 0 is at the bottom, like the
+    rest of panther's co-ordinates:
+
+    level = Tilemap(np.load("level.npy"), Atlas("tiles", "cache/tiles"), 32)
+    level[3, 7] = level.tileset.index["grass"]  # only the chunk with this tile is rebuilt
+    level.draw()  # only the chunks which can be seen are drawn
+    """
+    def __init__(self, tiles, tileset, tile_size, x=0, y=0, chunk_size=32):
+        """
+        :param tiles: array-like<int>, shape (rows, columns), region of the tileset for each tile, or EMPTY
+        :param tileset: panther.graphics.Atlas
+        :param tile_size: number or tuple<width, height>, size each tile is drawn at
+        :param x: number, x co-ord of the bottom left corner of the map
+        :param y: number, y co-ord of the bottom left corner of the map
+        :param chunk_size: int, width and height of each chunk, in tiles
+        """
+        if chunk_size * chunk_size * len(graphics._RECTANGLE_INDICES) > graphics._MAX_MESH_INDICES:
+            raise ValueError("chunk_size is too big for each chunk to be drawn by one Mesh")
+
+        self.tiles = np.array(tiles, dtype=np.int32)
+        self.tileset = tileset
+        self.tile_width, self.tile_height = tile_size if isinstance(tile_size, tuple) else (tile_size, tile_size)
+        self.x, self.y = x, y
+        self.chunk_size = chunk_size
+
+        self._chunks = {}  # tuple<int(chunk row), int(chunk column)>: _Chunk
+
+    def __getitem__(self, position):
+        return self.tiles[position]
+
+    def __setitem__(self, position, tile):
+        """
+        change tiles, tilemap[row, column] = tile. Like a NumPy array, rows and columns can be negative, slices or
+        arrays of indices, and only the chunks of the tiles changed are rebuilt
+        :param position: tuple<int or slice(row), int or slice(column)>, or just the row
+        :param tile: int or array-like<int>, region of the tileset, or EMPTY
+        :return: None
+        """
+        row, column = position if isinstance(position, tuple) else (position, slice(None))
+        self.tiles[row, column] = tile
+
+        rows, columns = self.tiles.shape
+        size = self.chunk_size
+        if isinstance(row, (int, np.integer)) and isinstance(column, (int, np.integer)):
+            self._chunks.pop(((row % rows) // size, (column % columns) // size), None)
+            return
+
+        # the chunks of every row and column the index picks out, negative indices counted from the end
+        chunk_rows = np.unique(np.arange(rows)[row] // size).tolist()
+        chunk_columns = np.unique(np.arange(columns)[column] // size).tolist()
+        for chunk_row in chunk_rows:
+            for chunk_column in chunk_columns:
+                self._chunks.pop((chunk_row, chunk_column), None)
+
+    def set_tiles(self, row, column, tiles):
+        """
+        change a rectangle of tiles at once
+        :param row: int, row of the bottom left tile to change
+        :param column: int, column of the bottom left tile to change
+        :param tiles: array-like<int>, shape (rows, columns)
+        :return: None
+        """
+        tiles = np.asarray(tiles, dtype=np.int32)
+        rows, columns = tiles.shape
+        self.tiles[row:row + rows, column:column + columns] = tiles
+
+        size = self.chunk_size
+        for chunk_row in range(row // size, (row + rows - 1) // size + 1):
+            for chunk_column in range(column // size, (column + columns - 1) // size + 1):
+                self._chunks.pop((chunk_row, chunk_column), None)
+
+    def invalidate(self):
+        """
+        rebuild every chunk the next time it's drawn, e.g. after changing x, y or tile_size
+        :return: None
+        """
+        self._chunks.clear()
+
+    def chunks_visible(self, viewport=None):
+        """
+        :param viewport: tuple<x, y, width, height>, the part of the world to draw, defaults to what can be seen
+        :return: list<tuple<int(chunk row), int(chunk column)> >
+        """
+        vx, vy, vw, vh = graphics._visible_rect() if viewport is None else viewport
+        chunk_width = self.chunk_size * self.tile_width
+        chunk_height = self.chunk_size * self.tile_height
+        rows, columns = self.tiles.shape
+
+        first_row = max(floor((vy - self.y) / chunk_height), 0)
+        last_row = min(floor((vy + vh - self.y) / chunk_height), (rows - 1) // self.chunk_size)
+        first_column = max(floor((vx - self.x) / chunk_width), 0)
+        last_column = min(floor((vx + vw - self.x) / chunk_width), (columns - 1) // self.chunk_size)
+
+        return [
+            (chunk_row, chunk_column)
+            for chunk_row in range(first_row, last_row + 1)
+            for chunk_column in range(first_column, last_column + 1)
+        ]
+
+    def draw(self, viewport=None):
+        """
+        draw the chunks of the map which can be seen, tinted by the current colour (see graphics.set_colour())
+        :param viewport: tuple<x, y, width, height>, the part of the world to draw, defaults to what can be seen
+        :return: None
+        """
+        texture = self.tileset.texture
+
+        for key in self.chunks_visible(viewport):
+            chunk = self._chunks.get(key)
+            if chunk is None:
+                chunk = self._chunks[key] = self._build(*key)
+
+            if not chunk.count:
+                continue
+
+            if graphics._recorder is not None:  # headless, or inside a layer, so the Mesh can't be kept
+                graphics._instruction(
+                    Mesh, vertices=chunk.vertices, indices=self._indices(chunk), texture=texture, mode='triangles'
+                )
+                continue
+
+            if chunk.mesh is None or chunk.mesh.texture is not texture:
+                chunk.mesh = Mesh(
+                    vertices=chunk.vertices, indices=self._indices(chunk), texture=texture, mode='triangles'
+                )
+            graphics._draw_instance(chunk.mesh)
+
+    @staticmethod
+    def _indices(chunk):
+        return graphics._rectangle_batch_indices[:chunk.count * len(graphics._RECTANGLE_INDICES)]
+
+    def _build(self, chunk_row, chunk_column):
+        size = self.chunk_size
+        row0, column0 = chunk_row * size, chunk_column * size
+        tiles = self.tiles[row0:row0 + size, column0:column0 + size]
+
+        rows, columns = np.nonzero(tiles != EMPTY)
+        u0, v0, u1, v1 = self.tileset.regions[tiles[rows, columns]][:, :4].T
+
+        x0 = self.x + (columns + column0) * self.tile_width
+        y0 = self.y + (rows + row0) * self.tile_height
+        x1 = x0 + self.tile_width
+        y1 = y0 + self.tile_height
+
+        # corners in the same order as graphics._RECTANGLE_INDICES expects
+        vertices = np.stack((
+            np.stack((x0, y0, u0, v0), axis=1),
+            np.stack((x1, y0, u1, v0), axis=1),
+            np.stack((x1, y1, u1, v1), axis=1),
+            np.stack((x0, y1, u0, v1), axis=1)
+        ), axis=1).astype(np.float32).reshape(-1)
+
+        return _Chunk(vertices, len(rows))
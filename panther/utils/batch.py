@@ -0,0 +1,103 @@
+"""
+NumPy versions of the movement utilities in panther.utils, which move whole arrays of positions at once, in place.
+Angles are in degrees with the same convention as panther.utils.move_on_angle (0 is up, increasing anticlockwise).
+move_on_angle() rounds results down like the scalar version, pass floor=False to keep float positions. translate(),
+rotate() and scale() keep float positions by default, as rounding every call makes repeated transforms drift.
+Integer arrays can only be updated with floor=True, they can't hold the fractional results
+"""
+import numpy as np
+
+
+def _store(out, values, floor):
+    if floor:
+        np.floor(values, out=values)
+    elif out.dtype.kind in 'iub':
+        raise ValueError(f"{out.dtype} arrays would silently truncate the new positions, pass floor=True to round them "
+                         f"down or use float arrays")
+    out[...] = values
+
+    return out
+
+
+def move_on_angle(angles, xs, ys, to_move, floor=True):
+    """
+    move every (xs[i], ys[i]) <to_move> at <angles>, in place, like panther.utils.move_on_angle
+    :param angles: numpy.ndarray or number, degrees
+    :param xs: numpy.ndarray, x co-ords, updated in place
+    :param ys: numpy.ndarray, y co-ords, updated in place
+    :param to_move: numpy.ndarray or number, distance to move
+    :param floor: bool, whether to round the new positions down
+    :return: tuple<xs, ys>
+    """
+    angles = np.radians(np.add(angles, 90, dtype=np.float64))  # set 0 to mean up, like panther.utils.move_on_angle
+
+    # added to the positions rather than in place, as angles and to_move can be numbers broadcast over every position
+    x_moved = np.add(xs, np.cos(angles) * to_move, dtype=np.float64)
+    y_moved = np.add(ys, np.sin(angles) * to_move, dtype=np.float64)
+
+    return _store(xs, x_moved, floor), _store(ys, y_moved, floor)
+
+
+def translate(xs, ys, dx, dy, floor=False):
+    """
+    move every (xs[i], ys[i]) by (dx, dy), in place
+    :param xs: numpy.ndarray, x co-ords, updated in place
+    :param ys: numpy.ndarray, y co-ords, updated in place
+    :param dx: numpy.ndarray or number
+    :param dy: numpy.ndarray or number
+    :param floor: bool, whether to round the new positions down
+    :return: tuple<xs, ys>
+    """
+    return _store(xs, np.add(xs, dx, dtype=np.float64), floor), _store(ys, np.add(ys, dy, dtype=np.float64), floor)
+
+
+def rotate(xs, ys, angles, cx=0, cy=0, floor=False):
+    """
+    rotate every (xs[i], ys[i]) by <angles> about (cx, cy), in place.
+    Rotating the point <d> above the centre by a gives the same point as move_on_angle(a, cx, cy, d)
+    :param xs: numpy.ndarray, x co-ords, updated in place
+    :param ys: numpy.ndarray, y co-ords, updated in place
+    :param angles: numpy.ndarray or number, degrees
+    :param cx: numpy.ndarray or number, x co-ord of the centre of rotation
+    :param cy: numpy.ndarray or number, y co-ord of the centre of rotation
+    :param floor: bool, whether to round the new positions down
+    :return: tuple<xs, ys>
+    """
+    angles = np.radians(angles, dtype=np.float64)
+    cos, sin = np.cos(angles), np.sin(angles)
+
+    rel_x = np.subtract(xs, cx, dtype=np.float64)
+    rel_y = np.subtract(ys, cy, dtype=np.float64)
+
+    new_x = rel_x * cos
+    new_x -= rel_y * sin
+    new_x += cx
+
+    rel_x *= sin
+    rel_y *= cos
+    new_y = np.add(rel_x, rel_y, out=rel_x)
+    new_y += cy
+
+    return _store(xs, new_x, floor), _store(ys, new_y, floor)
+
+
+def scale(xs, ys, factors, cx=0, cy=0, floor=False):
+    """
+    scale every (xs[i], ys[i]) by <factors> away from (cx, cy), in place
+    :param xs: numpy.ndarray, x co-ords, updated in place
+    :param ys: numpy.ndarray, y co-ords, updated in place
+    :param factors: numpy.ndarray or number
+    :param cx: numpy.ndarray or number, x co-ord of the centre of scaling
+    :param cy: numpy.ndarray or number, y co-ord of the centre of scaling
+    :param floor: bool, whether to round the new positions down
+    :return: tuple<xs, ys>
+    """
+    new_x = np.subtract(xs, cx, dtype=np.float64)
+    new_x *= factors
+    new_x += cx
+
+    new_y = np.subtract(ys, cy, dtype=np.float64)
+    new_y *= factors
+    new_y += cy
+
+    return _store(xs, new_x, floor), _store(ys, new_y, floor)
@@ -0,0 +1,256 @@
+"""
+An entity store which keeps each component of every entity in one contiguous NumPy column (a structure of arrays),
+so thousands of entities can be updated with a few array operations instead of a Python loop over objects.
+Draw a store with panther.graphics.entities()
+"""
+import numpy as np
+
+# name: tuple<dtype, shape of each entity's value, default value>
+COMPONENTS = dict(
+    x=(np.float32, (), 0),  # position of the bottom left corner
+    y=(np.float32, (), 0),
+    vx=(np.float32, (), 0),  # velocity, per second, see EntityStore.step()
+    vy=(np.float32, (), 0),
+    width=(np.float32, (), 1),
+    height=(np.float32, (), 1),
+    colour=(np.float32, (4,), (255, 255, 255, 1)),  # red, green and blue 0-255, alpha 0-1, like graphics.set_colour()
+    sprite=(np.int32, (), 0)  # region of a panther.graphics.Atlas
+)
+
+
+class EntityStore:
+    """
+    Entities are rows of the component columns. Live entities are always packed into the first len(store) rows, so
+    the columns (e.g. store.x) can be used directly in array operations. Each entity keeps its id for as long as it
+    lives, even though destroying another entity can move its row, ids of destroyed entities are reused.
+
+    store = EntityStore()
+    ids = store.create_many(1000, vx=100)
+    store.step(dt)
+    store.destroy_where(store.x > 500)
+    """
+    def __init__(self, capacity=1024, components=None):
+        """
+        :param capacity: int, number of entities to make room for up front, the store grows as needed
+        :param components: dict<string, tuple<dtype, tuple(shape), default> >, extra components (see COMPONENTS)
+        """
+        self.components = dict(COMPONENTS, **(components or {}))
+
+        self._count = 0
+        self._columns = {
+            name: np.empty((capacity,) + shape, dtype=dtype) for name, (dtype, shape, _) in self.components.items()
+        }
+        self._ids = np.empty(capacity, dtype=np.int64)  # row: id
+        self._rows = np.full(capacity, -1, dtype=np.int64)  # id: row, -1 if the id isn't in use
+        self._free = []  # ids of destroyed entities, to be reused
+        self._next_id = 0
+
+    def __getattr__(self, name):
+        # the live part of a component column, e.g. store.x. Only valid until entities are created or destroyed
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        try:
+            return self._columns[name][:self._count]
+        except KeyError:
+            raise AttributeError(f"EntityStore has no component '{name}'") from None
+
+    def column(self, name):
+        """
+        get the values of a component for every live entity, in row order (see ids). Only valid until entities are
+        created or destroyed
+        :param name: string, component name
+        :return: numpy.ndarray, a view, changing it changes the entities
+        """
+        return self._columns[name][:self._count]
+
+    @property
+    def ids(self):
+        """
+        :return: numpy.ndarray<int64>, the id of the entity in each row
+        """
+        return self._ids[:self._count]
+
+    def rows(self, ids):
+        """
+        get the rows of entities, to index the columns with
+        :param ids: int or array-like<int>
+        :return: int or numpy.ndarray<int64>
+        """
+        return self._rows[ids]
+
+    def create(self, **values):
+        """
+        create an entity
+        :param values: initial component values, e.g. x=10, colour=(255, 0, 0), others are set to their defaults
+        :return: int, the entity's id
+        """
+        return int(self.create_many(1, **values)[0])
+
+    def create_many(self, n, **values):
+        """
+        create <n> entities
+        :param n: int
+        :param values: initial component values, each either one value for all of them or an array of <n> values
+        :return: numpy.ndarray<int64>, the new entities' ids
+        """
+        unknown = values.keys() - self.components.keys()
+        if unknown:
+            raise ValueError(f"unknown components: {', '.join(sorted(unknown))}")
+
+        start = self._count
+        self._reserve(start + n)
+
+        reused = min(n, len(self._free))
+        ids = np.empty(n, dtype=np.int64)
+        if reused:
+            ids[:reused] = self._free[-reused:]
+            del self._free[-reused:]
+        ids[reused:] = np.arange(self._next_id, self._next_id + n - reused)
+        self._next_id += n - reused
+        self._reserve_ids(self._next_id)
+
+        rows = slice(start, start + n)
+        for name, (_, _, default) in self.components.items():
+            self._assign(name, rows, values.get(name, default))
+        self._ids[rows] = ids
+        self._rows[ids] = np.arange(start, start + n)
+        self._count += n
+
+        return ids
+
+    def destroy(self, entity_id):
+        """
+        destroy an entity, the last row is moved into its place
+        :param entity_id: int
+        :return: None
+        """
+        row = self._row(entity_id)
+
+        last = self._count - 1
+        if row != last:
+            for column in self._columns.values():
+                column[row] = column[last]
+            moved = self._ids[last]
+            self._ids[row] = moved
+            self._rows[moved] = row
+
+        self._rows[entity_id] = -1
+        self._free.append(int(entity_id))
+        self._count = last
+
+    def destroy_where(self, mask):
+        """
+        destroy every entity whose row is True in <mask>, e.g. store.destroy_where(store.y < 0)
+        :param mask: numpy.ndarray<bool>, one value per live entity
+        :return: numpy.ndarray<int64>, ids of the destroyed entities
+        """
+        mask = np.asarray(mask, dtype=bool)
+        destroyed = self._ids[:self._count][mask]
+        if not len(destroyed):
+            return destroyed
+
+        keep = ~mask
+        count = int(np.count_nonzero(keep))
+        for column in self._columns.values():
+            column[:count] = column[:self._count][keep]
+        self._ids[:count] = self._ids[:self._count][keep]
+        self._rows[self._ids[:count]] = np.arange(count)
+
+        self._rows[destroyed] = -1
+        self._free.extend(destroyed.tolist())
+        self._count = count
+
+        return destroyed
+
+    def where(self, mask):
+        """
+        get the ids of every entity whose row is True in <mask>, e.g. store.where(store.x > 100)
+        :param mask: numpy.ndarray<bool>, one value per live entity
+        :return: numpy.ndarray<int64>
+        """
+        return self._ids[:self._count][mask]
+
+    def get(self, entity_id, name):
+        """
+        :param entity_id: int
+        :param name: string, component name
+        :return: the entity's value of the component
+        """
+        return self._columns[name][self._row(entity_id)]
+
+    def set(self, entity_id, **values):
+        """
+        set component values of an entity
+        :param entity_id: int
+        :param values: e.g. x=10, colour=(255, 0, 0)
+        :return: None
+        """
+        row = self._row(entity_id)
+        for name, value in values.items():
+            self._assign(name, row, value)
+
+    def step(self, dt):
+        """
+        move every entity by its velocity
+        :param dt: float, seconds
+        :return: None
+        """
+        n = self._count
+        x, y = self._columns['x'][:n], self._columns['y'][:n]
+        x += self._columns['vx'][:n] * dt
+        y += self._columns['vy'][:n] * dt
+
+    def clear(self):
+        """
+        destroy every entity, ids start from 0 again
+        :return: None
+        """
+        self._count = 0
+        self._rows[:] = -1
+        self._free.clear()
+        self._next_id = 0
+
+    def _assign(self, name, rows, value):
+        column = self._columns[name]
+        value = np.asarray(value)
+        if column.ndim == 2 and value.ndim and value.shape[-1] < column.shape[1]:
+            # e.g. rgb colours: the missing values (alpha) are taken from the default
+            column[rows] = self.components[name][2]
+            column[rows, :value.shape[-1]] = value
+        else:
+            column[rows] = value
+
+    def _row(self, entity_id):
+        row = self._rows[entity_id] if 0 <= entity_id < len(self._rows) else -1
+        if row < 0:
+            raise KeyError(f"no entity with id {entity_id}")
+
+        return row
+
+    def _reserve(self, n):
+        capacity = len(self._ids)
+        if n <= capacity:
+            return
+
+        capacity = max(n, capacity * 2)
+        for name, column in self._columns.items():
+            grown = np.empty((capacity,) + column.shape[1:], dtype=column.dtype)
+            grown[:self._count] = column[:self._count]
+            self._columns[name] = grown
+
+        ids = np.empty(capacity, dtype=np.int64)
+        ids[:self._count] = self._ids[:self._count]
+        self._ids = ids
+
+    def _reserve_ids(self, n):
+        if n > len(self._rows):
+            rows = np.full(max(n, len(self._rows) * 2), -1, dtype=np.int64)
+            rows[:len(self._rows)] = self._rows
+            self._rows = rows
+
+    def __contains__(self, entity_id):
+        return 0 <= entity_id < len(self._rows) and self._rows[entity_id] >= 0
+
+    def __len__(self):
+        return self._count
@@ -1,4 +1,4 @@
-from distutils.core import setup
+from setuptools import setup, find_packages
 
 setup(name='PantherUI',
       version="0.0.6",
@@ -6,9 +6,10 @@ setup(name='PantherUI',
       author='tfff1OFFICIAL',
       author_email='tfff1s.modpacks@gmail.com',
       url='https://github.com/tfff1OFFICIAL/PantherUI',
-      packages=['panther'],
+      packages=find_packages(include=('panther', 'panther.*')),
       requires=[
           'Pillow',
+          'numpy',
           'docutils',
           'pygments',
           'pypiwin32',
@@ -0,0 +1,116 @@
+import json
+import time
+
+
+def _images(tmp_path, n, size=(64, 64)):
+    from PIL import Image
+
+    srcs = []
+    for i in range(n):
+        src = str(tmp_path / f"{i}.png")
+        Image.new("RGB", size, (i, 0, 0)).save(src)
+        srcs.append(src)
+
+    return srcs
+
+
+def _step(app, manager):
+    app.step()
+    manager._update()  # panther's tick only updates panther.assets.manager
+
+
+def _wait(app, manager, frames=1000):
+    for _ in range(frames):
+        if manager.ready:
+            break
+        time.sleep(0.001)
+        _step(app, manager)
+    _step(app, manager)  # assets_ready is executed by the update after the last image loads
+
+
+def test_images_load_in_the_background_and_stream_in_over_frames(tmp_path):
+    import panther
+    from panther import graphics
+    from panther.assets import AssetManager
+    from panther.headless import HeadlessApp
+
+    srcs = _images(tmp_path, 4)
+    manifest = tmp_path / "level.json"
+    manifest.write_text(json.dumps(dict(images=srcs[:3], mipmap=srcs[3:])))
+
+    progress, ready = [], []
+    on_progress = lambda loaded, total: progress.append((loaded, total))
+    on_ready = lambda: ready.append(True)
+    panther.events.add('asset_progress', on_progress)
+    panther.events.add('assets_ready', on_ready)
+
+    manager = AssetManager(workers=2)
+    upload_bytes = panther.conf.asset_upload_bytes
+    panther.conf.silent_setattr('asset_upload_bytes', 64 * 4 * 16)  # a quarter of an image per frame
+    try:
+        with HeadlessApp() as app:
+            assert manager.load_manifest(str(manifest)) == 4
+            assert manager.load(srcs[0]) == 0  # already loading
+            _wait(app, manager)
+
+            assert [total for _, total in progress] == [4] * 4
+            assert [loaded for loaded, _ in progress] == [1, 2, 3, 4]
+            assert app.frames >= 16
+            assert ready == [True]
+            assert all((src, False) in graphics.textures for src in srcs[:3])
+            assert (srcs[3], True) in graphics.textures
+
+            assert manager.load(*srcs[:3]) == 0  # already loaded, but still ready next tick
+            _step(app, manager)
+            assert ready == [True, True]
+    finally:
+        panther.conf.silent_setattr('asset_upload_bytes', upload_bytes)
+        panther.events.off('asset_progress', on_progress)
+        panther.events.off('assets_ready', on_ready)
+        manager.shutdown()
+
+
+def test_images_which_fail_to_load_are_skipped(tmp_path, capsys):
+    from panther import graphics
+    from panther.assets import AssetManager
+    from panther.headless import HeadlessApp
+
+    src, = _images(tmp_path, 1)
+    manager = AssetManager()
+    try:
+        with HeadlessApp() as app:
+            manager.load(src, str(tmp_path / "missing.png"))
+            _wait(app, manager)
+
+            assert (src, False) in graphics.textures
+            assert manager.total == 0
+    finally:
+        manager.shutdown()
+
+    assert "missing.png" in capsys.readouterr().out
+
+
+def test_streamed_images_are_stored_like_the_ones_kivy_loads(tmp_path):
+    from PIL import Image
+    from panther import graphics
+    from panther.assets import AssetManager, _decode
+    from panther.headless import HeadlessApp
+
+    src = str(tmp_path / "top.png")
+    im = Image.new("RGBA", (2, 2), (0, 0, 255, 255))
+    im.putpixel((0, 0), (255, 0, 0, 255))  # the top left
+    im.save(src)
+
+    assert _decode(src)[2][:4] == bytearray((255, 0, 0, 255))  # top row first
+
+    manager = AssetManager()
+    try:
+        with HeadlessApp() as app:
+            manager.load(src)
+            _wait(app, manager)
+            streamed = graphics.textures.get((src, False))
+            loaded = graphics.textures._load(src, False)
+    finally:
+        manager.shutdown()
+
+    assert streamed.tex_coords == loaded.tex_coords
@@ -0,0 +1,27 @@
+import importlib.util
+import os
+
+_path = os.path.join(os.path.dirname(__file__), "..", "benchmarks", "run.py")
+_spec = importlib.util.spec_from_file_location("benchmarks_run", _path)
+bench = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(bench)
+
+
+def test_benchmarks_run_and_compare():
+    from panther import key, pointer
+
+    snapshot, pointers, down = pointer.snapshot, dict(pointer._pointers), key.down("a")
+    results = bench.run(repeats=1, scale=0.01)
+
+    assert pointer.snapshot is snapshot and pointer._pointers == pointers  # setup()'s pointers and keys are put back
+    assert key.down("a") == down
+
+    assert set(results) == set(bench.benchmarks)
+    assert all(result['ops_per_second'] > 0 for result in results.values())
+
+    slower = {name: dict(result, ops_per_second=result['ops_per_second'] * 2) for name, result in results.items()}
+    assert bench.compare(results, slower, tolerance=0.15) == list(results)
+    assert bench.compare(results, results, tolerance=0.15) == []
+
+    runs = [{"a": dict(ops_per_second=ops)} for ops in (5, 1, 3, 4)]
+    assert bench.median(runs)["a"]["ops_per_second"] == 3
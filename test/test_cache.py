@@ -0,0 +1,40 @@
+from panther.cache import LRUCache
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_bytes=10, sizeof=len)
+
+    cache.put("a", "aaaa")
+    cache.put("b", "bbbb")
+    cache.get("a")  # "b" is now the least recently used
+    cache.put("c", "cccc")
+
+    assert "a" in cache and "c" in cache
+    assert "b" not in cache
+    assert cache.bytes == 8
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lru_cache_counts_hits_and_misses():
+    cache = LRUCache(max_bytes=10, sizeof=len)
+
+    assert cache.get("a") is None
+    cache.put("a", "a")
+    assert cache.get("a") == "a"
+
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_texture_cache_evicts_by_key_or_by_image():
+    from panther.cache import TextureCache
+
+    cache = TextureCache(max_bytes=10)
+    cache.sizeof = lambda texture: 1
+    cache.put(("a.png", False), "a")
+    cache.put(("a.png", True), "a mipmapped")
+    cache.put(("b.png", False), "b")
+
+    assert cache.evict(("b.png", False))  # the same signature as every other LRUCache
+    assert cache.evict_image("a.png")
+    assert len(cache) == 0
+    assert not cache.evict_image("a.png", mipmap=True)
@@ -0,0 +1,72 @@
+import pytest
+
+
+def test_world_and_screen_co_ords_round_trip():
+    from panther.camera import Camera
+
+    camera = Camera(100, 50, zoom=2, rotation=90, viewport=(0, 0, 200, 100))
+
+    assert camera.world_to_screen(100, 50) == pytest.approx((100, 50))
+    assert camera.world_to_screen(110, 50) == pytest.approx((100, 30))  # turning the camera left turns the world right
+    assert camera.screen_to_world(*camera.world_to_screen(-7, 12)) == pytest.approx((-7, 12))
+
+    x, y, width, height = camera.visible_rect()
+    assert (x, y, width, height) == pytest.approx((75, 0, 50, 100))
+
+
+def test_shapes_outside_the_camera_are_not_drawn():
+    import numpy as np
+    import panther
+    from panther import graphics
+    from panther.camera import Camera
+    from panther.headless import HeadlessApp
+
+    camera = Camera(1000, 1000, zoom=4)  # sees (1000, 1000) +- a quarter of the canvas
+
+    with HeadlessApp() as app:
+        with camera:
+            graphics.rectangle(990, 1010, 5, 5)
+            graphics.rectangle(10, 10, 5, 5)
+            graphics.circle(0, 0, 20)
+            graphics.circle(1000 + panther.conf.width / 8 + 10, 1000, 20)  # just overlaps the right edge
+
+            graphics.rotate(0, 0, 180)
+            graphics.rectangle(-1000, -1000, 5, 5)  # rotated into view, so it mustn't be culled
+            graphics.unrotate()
+
+            graphics.rectangles(np.arange(0, 2000, 100), 1000, 10, 10, colours=(255, 0, 0))
+        graphics.rectangle(10, 10, 5, 5)  # outside the with block nothing is culled
+
+    assert app.commands.count("Rectangle") == 3
+    assert app.commands.count("Ellipse") == 1
+    assert app.commands.count("_CameraMatrix") == 1
+    assert app.commands.count("_ColourMesh") == 1
+    assert graphics._view is None
+
+
+def test_viewport_is_clipped():
+    from panther.camera import Camera
+    from panther.headless import HeadlessApp
+
+    with HeadlessApp() as app:
+        with Camera(viewport=(10, 10, 100, 100)):
+            pass
+
+    assert app.commands.count("ScissorPush") == 1
+    assert app.commands.count("ScissorPop") == 1
+
+
+def test_layers_drawn_inside_a_camera_are_not_culled(monkeypatch):
+    from panther import graphics
+    from panther.camera import Camera
+    from panther.headless import HeadlessApp
+
+    monkeypatch.setattr(graphics, '_layers', {})
+
+    with HeadlessApp() as app:
+        with Camera(5000, 5000):
+            # the layer is in view, its content is relative to the layer so it's nowhere near the camera
+            graphics.layer("test_background", lambda: graphics.rectangle(0, 0, 100, 100), 4950, 4950, 100, 100)
+            assert graphics._view is not None
+
+    assert app.commands.count("Rectangle") == 2  # the content, and the layer
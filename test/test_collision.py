@@ -0,0 +1,58 @@
+import numpy as np
+
+
+def test_pairs_match_brute_force():
+    from panther.collision import Colliders
+
+    rng = np.random.default_rng(1)
+    xs, ys = rng.uniform(0, 500, (2, 400))
+    sizes = rng.uniform(1, 30, 400)
+    sizes[:2] = 300  # too big for the grid
+
+    colliders = Colliders(capacity=16)
+    ids = colliders.add_rectangles(xs, ys, sizes, sizes)
+
+    for _ in range(3):  # moving keeps the pairs correct
+        xs += rng.uniform(-20, 20, 400)
+        colliders.move(ids, xs, ys)
+
+        a, b = colliders.pairs()
+        found = {frozenset(pair) for pair in zip(a.tolist(), b.tolist())}
+
+        overlap = (
+            (xs[:, None] <= xs[None, :] + sizes[None, :]) & (xs[None, :] <= xs[:, None] + sizes[:, None]) &
+            (ys[:, None] <= ys[None, :] + sizes[None, :]) & (ys[None, :] <= ys[:, None] + sizes[:, None])
+        )
+        i, j = np.nonzero(np.triu(overlap, 1))
+        assert found == {frozenset((ids[p], ids[q])) for p, q in zip(i.tolist(), j.tolist())}
+
+
+def test_collisions_check_the_exact_shapes():
+    from panther.collision import Colliders
+
+    colliders = Colliders()
+    box = colliders.add_rectangle(0, 0, 10, 10)
+    near_corner = colliders.add_circle(-3, 13, 3.5)  # bounding boxes overlap, the circle misses the corner
+    touching = colliders.add_circle(15, 5, 5.5)
+    triangle = colliders.add_polygon((20, 0), (30, 0), (20, 10))
+    ellipse = colliders.add_ellipse(29, 9, 4, 2)  # in the triangle's bounds, beyond its hypotenuse
+
+    hits = {frozenset(pair) for pair in zip(*(ids.tolist() for ids in colliders.collisions()))}
+    assert hits == {frozenset((box, touching)), frozenset((touching, triangle))}
+    assert frozenset((box, near_corner)) in {frozenset(p) for p in zip(*(i.tolist() for i in colliders.pairs()))}
+
+    colliders.remove(touching)
+    assert len(colliders) == 4 and touching not in colliders
+    assert not len(colliders.collisions()[0])
+    assert ellipse in colliders
+
+
+def test_removing_an_id_twice_frees_it_once():
+    from panther.collision import Colliders
+
+    colliders = Colliders()
+    first = colliders.add_rectangle(0, 0, 1, 1)
+    colliders.remove(first)
+    colliders.remove([first, first])
+
+    assert len({colliders.add_rectangle(0, 0, 1, 1), colliders.add_rectangle(5, 5, 1, 1)}) == 2
@@ -0,0 +1,41 @@
+def test_glyphs_are_rasterised_once_and_strings_drawn_as_one_mesh():
+    from panther import glyphs, graphics
+    from panther.headless import HeadlessApp, HeadlessTexture
+
+    style = graphics.TextStyle(font_size=20)
+
+    with HeadlessApp() as app:
+        graphics.glyph_text(10, 10, "score: 1234", style)
+        font = glyphs.font(style.font_name, style.font_size)
+        rasterised = dict(font._glyphs)
+
+        graphics.glyph_text(10, 10, "score: 4321", style)  # new text, but no new characters
+
+    assert font._glyphs == rasterised
+    assert app.commands.count("Mesh") == 2
+    assert app.commands.count("Rectangle") == 0
+    assert isinstance(glyphs.atlas.texture, HeadlessTexture)
+
+
+def test_layout_wraps_aligns_and_kerns():
+    from panther import glyphs, graphics
+    from panther.headless import HeadlessApp
+
+    style = graphics.TextStyle(font_size=20)
+    font = glyphs.font(style.font_name, style.font_size)
+
+    assert font.kerning("A", "V") < 0
+    assert font.measure("AV") < font.measure("AV", kerning=False)
+
+    with HeadlessApp():  # rasterising glyphs needs the atlas' texture
+        one_line, width, height = glyphs.layout("one two three", style)
+        wrapped, box_width, box_height = glyphs.layout("one two three", style.replace(text_size=(width * 0.7, None)))
+        left, _, _ = glyphs.layout("hi", style.replace(text_size=(200, 100)))
+        right, _, _ = glyphs.layout("hi", style.replace(text_size=(200, 100), halign='right', valign='top'))
+
+    assert box_width == width * 0.7
+    assert box_height == 2 * height
+    assert len(wrapped) == len(one_line)  # spaces have no quads, the one wrapped on isn't drawn either
+
+    assert right[:, :, 0].max() > 190 > left[:, :, 0].max()
+    assert right[:, :, 1].max() > 90 > left[:, :, 1].max()
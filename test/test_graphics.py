@@ -0,0 +1,183 @@
+import pytest
+from panther import graphics
+
+
+class _Instruction:
+    def __init__(self, **props):
+        for name, value in props.items():
+            setattr(self, name, value)
+
+
+class _OtherInstruction(_Instruction):
+    pass
+
+
+def test_retained_frame_reuses_instructions():
+    frame = graphics._RetainedFrame()
+
+    frame.begin()
+    first = frame.instruction(_Instruction, dict(pos=(0, 0), size=(1, 1)))
+    frame.active = False
+
+    frame.begin()
+    second = frame.instruction(_Instruction, dict(pos=(5, 5), size=(1, 1)))
+
+    assert second is first
+    assert second.pos == (5, 5)
+    assert not frame.changed
+
+
+def test_retained_frame_replaces_on_shape_change():
+    frame = graphics._RetainedFrame()
+
+    frame.begin()
+    first = frame.instruction(_Instruction, dict(pos=(0, 0)))
+    frame.instruction(_Instruction, dict(pos=(1, 1)))
+    frame.active = False
+
+    frame.begin()
+    replaced = frame.instruction(_OtherInstruction, dict(pos=(0, 0)))
+
+    assert replaced is not first
+    assert frame.changed
+    assert len(frame.slots) == 1
+
+
+def test_text_style_is_hashable_and_immutable():
+    style = graphics.TextStyle(font_size=20, color=[1, 0, 0, 1])
+
+    assert style == graphics.TextStyle(font_size=20, color=(1, 0, 0, 1))
+    assert hash(style) == hash(graphics.TextStyle(font_size=20, color=(1, 0, 0, 1)))
+    assert style.replace(bold=True) != style
+    assert style.replace(bold=True).font_size == 20
+
+    try:
+        style.font_size = 30
+    except AttributeError:
+        pass
+    else:
+        raise AssertionError("TextStyle should be immutable")
+
+
+def test_atlas_packs_images_and_reuses_the_cache(tmp_path):
+    from PIL import Image
+
+    sprites = tmp_path / "sprites"
+    sprites.mkdir()
+    Image.new("RGBA", (8, 8), (255, 0, 0, 255)).save(sprites / "red.png")
+    Image.new("RGBA", (16, 4), (0, 255, 0, 255)).save(sprites / "green.png")
+
+    atlas = graphics.Atlas(str(sprites), str(tmp_path / "atlas"))
+
+    assert atlas.names == ["green", "red"]
+    assert atlas.regions[atlas.index["red"]][4:].tolist() == [8, 8]
+    assert (tmp_path / "atlas.png").is_file()
+
+    cached = graphics.Atlas(str(sprites), str(tmp_path / "atlas"))
+    assert cached.regions.tolist() == atlas.regions.tolist()
+
+    empty = tmp_path / "empty"
+    empty.mkdir()
+    with pytest.raises(ValueError):
+        graphics.Atlas(str(empty), str(tmp_path / "empty_atlas"))
+
+
+def test_round_shapes_use_cached_unit_shapes():
+    import numpy as np
+
+    assert graphics._segments(1) == graphics._MIN_SEGMENTS
+    assert graphics._segments(100) % 4 == 0
+    assert graphics._segments(100) < graphics._segments(400) <= graphics._MAX_SEGMENTS
+    assert graphics._unit_shape(16) is graphics._unit_shape(16)
+
+    vertices = graphics._fan(graphics._unit_shape(4), 10, 20, 3, 2)
+    assert vertices[:, :2] == pytest.approx(np.array(((10, 20), (13, 20), (10, 22), (7, 20), (10, 18), (13, 20))))
+
+    # 0 is up and angles go anticlockwise: exact ends with the corners between them
+    points = graphics._arc_points(graphics._unit_shape(4), 0, 135)
+    assert points == pytest.approx(np.array(((0, 1), (-1, 0), (-0.5 ** 0.5, -0.5 ** 0.5))), abs=1e-6)
+    assert len(graphics._arc_points(graphics._unit_shape(8), -10, 340)) == 10  # short of a full turn
+
+
+def test_retained_mode_clears_instructions_drawn_outside_the_draw_event(monkeypatch):
+    import panther
+    from kivy.graphics import Canvas, Color
+
+    class _Canvas:
+        def __init__(self):
+            self.canvas = Canvas()
+
+        def clear(self):
+            self.canvas.clear()
+
+    monkeypatch.setattr(panther, 'canvas', _Canvas())
+    monkeypatch.setattr(panther.conf, 'retained_mode', True, raising=False)
+    monkeypatch.setattr(graphics, '_retained', graphics._RetainedFrame())
+
+    def frame(colour):
+        graphics._begin_frame()
+        graphics.set_colour(colour)
+        graphics._end_frame()
+
+    frame((255, 0, 0))
+    first = panther.canvas.canvas.children[0]
+    frame((0, 255, 0))
+
+    assert panther.canvas.canvas.children == [first]  # reused, with the new colour
+    assert isinstance(first, Color) and first.rgb == [0, 1, 0]
+
+    graphics.set_colour((0, 0, 255))  # e.g. from the update event
+    assert len(panther.canvas.canvas.children) == 2
+    frame((0, 255, 0))
+
+    assert panther.canvas.canvas.children == [first]
+
+
+class _Recorder:
+    """
+    stands in for graphics._recorder, keeping what each graphics call drew
+    """
+    def __init__(self):
+        self.calls = []
+
+    def record(self, cls, props):
+        self.calls.append((cls, props))
+
+
+def test_batches_are_drawn_by_one_mesh(monkeypatch):
+    import numpy as np
+
+    recorder = _Recorder()
+    monkeypatch.setattr(graphics, '_recorder', recorder)
+
+    graphics.rectangles([0, 10], [0, 20], 5, [1, 2], colours=[(255, 0, 0, 1), (0, 0, 255, 0.5)])
+    graphics.circles([0, 10, 20], 0, 2, segments=8)
+    graphics.rectangles([], [], 1, 1)
+
+    (rectangles, props), (circles, circle_props) = recorder.calls
+    assert rectangles is graphics._ColourMesh
+    vertices = props['vertices'].reshape(2, 4, 8)
+    assert vertices[1, :, :2].tolist() == [[10, 20], [15, 20], [15, 22], [10, 22]]
+    assert vertices[1, 0, 4:].tolist() == [0, 0, 1, 0.5]
+    assert len(props['indices']) == 2 * len(graphics._RECTANGLE_INDICES)
+
+    assert circles is graphics.Mesh  # no colours, so drawn in the current colour
+    vertices = circle_props['vertices'].reshape(3, 9, 4)
+    assert vertices[2, 0, :2].tolist() == [20, 0]
+    assert np.hypot(*(vertices[2, 1:, :2] - (20, 0)).T) == pytest.approx(np.full(8, 2))
+    assert len(circle_props['indices']) == 3 * 8 * 3
+
+    with pytest.raises(ValueError):
+        graphics.rectangles([0], [0], 1, 1, colours=[(1, 2)])
+
+
+def test_instruction_pool_reuses_instructions_once_cleared():
+    pool = graphics._InstructionPool(_Instruction)
+
+    first = pool.instruction(dict(vertices=[0]))
+    assert pool.instruction(dict(vertices=[1])) is not first
+
+    pool.index = 0  # the canvas was cleared
+    reused = pool.instruction(dict(vertices=[2]))
+    assert reused is first and reused.vertices == [2]
+    assert len(pool.items) == 2
@@ -0,0 +1,136 @@
+import os
+import panther
+from panther import graphics
+from panther.headless import HeadlessApp
+
+SMILEY = os.path.join(os.path.dirname(__file__), "..", "examples", "smiley.png")
+
+
+def test_headless_app_records_graphics_calls():
+    frames = []
+
+    def update(dt):
+        frames.append(dt)
+
+    def draw():
+        graphics.set_colour((255, 0, 0))
+        graphics.rectangle(10, 20, 30, 40)
+        graphics.circles([1, 2, 3], [1, 2, 3], 5)
+        graphics.image(0, 0, 10, 10, SMILEY)
+        graphics.text(0, 0, "score: 10")
+
+    panther.events.add('update', update)
+    panther.events.add('draw', draw)
+
+    try:
+        with HeadlessApp(dt=0.5) as app:
+            app.step(10)
+
+            assert frames == [0.5] * 10
+            assert app.time == 5
+            assert app.commands.count("Rectangle") == 3
+            assert app.commands.count("Mesh") == 1
+            assert app.commands.commands()[1].tolist()[1:] == [10, 20, 30, 40, 0, 0, 0, 0]
+            assert app.commands_recorded == 50
+    finally:
+        panther.events.off('update', update)
+        panther.events.off('draw', draw)
+
+    assert graphics._recorder is None
+
+
+def test_layers_only_render_when_invalidated():
+    rendered = []
+
+    def background():
+        rendered.append(True)
+        graphics.rectangle(0, 0, 10, 10)
+
+    def draw():
+        graphics.layer("test_background", background)
+
+    panther.events.add('draw', draw)
+
+    try:
+        with HeadlessApp() as app:
+            app.step(5)
+            assert len(rendered) == 1
+            assert app.commands.count("Rectangle") == 1  # just the layer
+
+            graphics.invalidate("test_background")
+            app.step(1)
+            assert len(rendered) == 2
+    finally:
+        panther.events.off('draw', draw)
+
+
+def test_entities_are_drawn_in_batches():
+    import numpy as np
+    from panther.utils.entities import EntityStore
+
+    store = EntityStore()
+    store.create_many(12000, x=np.arange(12000), width=4, height=4)
+
+    with HeadlessApp() as app:
+        graphics.entities(store)
+
+    assert app.commands.count("_ColourMesh") == 2  # 72000 indices, more than fit in one Mesh
+
+
+def test_nested_layers_render_into_their_own_fbo(monkeypatch):
+    class _Fake:
+        def __init__(self, *args, **props):
+            self.__dict__.update(props)
+
+    class _Fbo(_Fake):
+        def __init__(self, size):
+            self.size, self.children, self.texture, self.draws = size, [], object(), 0
+
+        def add(self, obj):
+            self.children.append(obj)
+
+        def clear(self):
+            self.children.clear()
+
+        def draw(self):
+            self.draws += 1
+
+    class _Canvas:
+        size = (100, 100)
+
+        def __init__(self):
+            self.canvas = _Fbo(self.size)
+
+        def clear(self):
+            self.canvas.clear()
+
+    for name, cls in dict(Fbo=_Fbo, ClearColor=_Fake, ClearBuffers=_Fake, Rectangle=_Fake).items():
+        monkeypatch.setattr(graphics, name, cls)
+    monkeypatch.setattr(graphics, '_layers', {})
+    monkeypatch.setattr(panther, 'canvas', _Canvas())
+
+    rendered = []
+
+    def inner():
+        rendered.append("inner")
+        graphics.rectangle(0, 0, 10, 10)
+
+    def outer():
+        rendered.append("outer")
+        graphics.layer("test_inner", inner, 20, 30, 10, 10)
+
+    for _ in range(2):
+        graphics.layer("test_outer", outer, 0, 0, 100, 100)
+
+    assert rendered == ["outer", "inner"]
+    outer_layer, inner_layer = graphics._layers["test_outer"], graphics._layers["test_inner"]
+
+    drawn = inner_layer.fbo.children[-1]
+    assert (drawn.pos, drawn.size) == ((0, 0), (10, 10))  # the content went into the inner layer's Fbo
+
+    placed = outer_layer.fbo.children[-1]  # which the outer layer draws at the inner layer's position
+    assert placed.texture is inner_layer.texture and placed.pos == (20, 30)
+    assert inner_layer.fbo.draws == outer_layer.fbo.draws == 1
+
+    assert [child.texture for child in panther.canvas.canvas.children] == [outer_layer.texture] * 2
+    assert graphics._recorder is None
@@ -0,0 +1,40 @@
+def _press(key, code, name):
+    key._update_key_down(None, (code, name), name, [])
+
+
+def _release(key, code, name):
+    key._update_key_up(None, (code, name))
+
+
+def test_key_edges_and_chords():
+    from panther import key
+
+    assert not key.down("never pressed")
+    assert "never pressed" not in key._slots
+
+    _press(key, 305, "rctrl")
+    _press(key, 115, "s")
+    key._swap()
+    assert key.down("rctrl") and key.down(115)
+    assert key.pressed_this_frame("s")
+    assert key.chord("rctrl+s") and key.chord("rctrl+s", pressed_this_frame=True)
+
+    key._swap()
+    assert key.down("s") and not key.pressed_this_frame("s")
+    assert key.chord("rctrl+s") and not key.chord("rctrl+s", pressed_this_frame=True)
+
+    _release(key, 115, "s")
+    key._swap()
+    assert not key.down("s") and key.released_this_frame("s")
+    assert not key.chord("rctrl+s")
+
+    _press(key, 1073741906, "")  # keycodes too large to index directly get their own slot
+    _press(key, 115, "s")
+    _release(key, 115, "s")  # a tap between two ticks is still seen
+    key._swap()
+    assert key.down(1073741906)
+    assert key.pressed_this_frame("s") and not key.down("s")
+
+    _release(key, 305, "rctrl")
+    _release(key, 1073741906, "")
+    key._swap()
@@ -1,2 +1,130 @@
 def test_answer():
-    assert 4==5
\ No newline at end of file
+    assert 4==5
+
+def test_events_have_multiple_prioritised_subscribers():
+    import panther
+
+    calls = []
+
+    def first(x):
+        calls.append(("first", x))
+
+    def second(x):
+        calls.append(("second", x))
+
+    panther.events.add("test_event", second)
+    panther.events.add("test_event", first, priority=1)
+    panther.events.execute("test_event", 1)
+
+    assert calls == [("first", 1), ("second", 1)]
+
+    assert panther.events.off("test_event", first)
+    assert not panther.events.off("test_event", first)
+    panther.events.execute("test_event", 2)
+
+    assert calls[-1] == ("second", 2)
+    panther.events.off("test_event", second)
+
+
+def test_coalesced_events_keep_only_the_latest():
+    import panther
+
+    panther.events.events.clear()  # e.g. window_config_update events queued on import
+    seen = []
+    panther.events.add("test_coalesced", seen.append)
+    panther.events.coalesce("test_coalesced")
+
+    for i in range(5):
+        panther.events.trigger("test_coalesced", i)
+
+    for event in panther.events:
+        event.auto_handle()
+
+    assert seen == [4]
+
+    panther.events.coalesce("test_coalesced", enabled=False)
+    panther.events.off("test_coalesced", seen.append)
+
+
+def test_coalesced_events_are_handled_after_the_events_before_them():
+    import panther
+
+    panther.events.events.clear()
+    seen = []
+    coalesced = lambda i: seen.append(("coalesced", i))
+    other = lambda i: seen.append(("other", i))
+    panther.events.add("test_coalesced_order", coalesced)
+    panther.events.add("test_other", other)
+    panther.events.coalesce("test_coalesced_order")
+
+    panther.events.trigger("test_coalesced_order", 1)
+    panther.events.trigger("test_other", 2)
+    panther.events.trigger("test_coalesced_order", 3)
+    panther.events.trigger("test_other", 4)
+
+    for event in panther.events.drain(max_events=2):  # the replaced event doesn't count towards the budget
+        event.auto_handle()
+    for event in panther.events:
+        event.auto_handle()
+
+    assert seen == [("other", 2), ("coalesced", 3), ("other", 4)]
+
+    panther.events.coalesce("test_coalesced_order", enabled=False)
+    panther.events.off("test_coalesced_order", coalesced)
+    panther.events.off("test_other", other)
+
+
+def test_drain_leaves_events_over_budget_queued():
+    import panther
+
+    panther.events.events.clear()
+    seen = []
+    panther.events.add("test_budget", seen.append)
+
+    for i in range(5):
+        panther.events.trigger("test_budget", i)
+
+    for event in panther.events.drain(max_events=2):
+        event.auto_handle()
+
+    assert seen == [0, 1]
+    assert len(panther.events) == 3
+
+    for event in panther.events:
+        event.auto_handle()
+
+    assert seen == [0, 1, 2, 3, 4]
+    panther.events.off("test_budget", seen.append)
+
+
+def test_fixed_timestep_catches_up_and_publishes_alpha(monkeypatch):
+    import panther
+    from panther.headless import HeadlessApp
+
+    updates, alphas = [], []
+    update = updates.append
+    draw = lambda: alphas.append(panther.alpha)  # draw handlers still take no arguments
+    panther.events.add('update', update)
+    panther.events.add('draw', draw)
+    monkeypatch.setattr(panther.conf, 'fixed_timestep', 0.125, raising=False)
+    monkeypatch.setattr(panther.conf, 'max_update_steps', 3, raising=False)
+    monkeypatch.setattr(panther, '_accumulator', 0)
+
+    try:
+        with HeadlessApp(dt=0.3125) as app:
+            app.step(2)  # 0.3125 is two updates with half of one left over, then 0.375 is three
+            assert updates == [0.125] * 5
+            assert alphas == [0.5, 0.0]
+
+            app.dt = 1  # eight updates behind, only max_update_steps are run and the rest is dropped
+            app.step()
+            assert len(updates) == 8
+            assert alphas[-1] == 0
+    finally:
+        panther.events.off('update', update)
+        panther.events.off('draw', draw)
+
+    monkeypatch.setattr(panther.conf, 'fixed_timestep', None, raising=False)
+    with HeadlessApp() as app:
+        app.step()
+    assert panther.alpha == 1
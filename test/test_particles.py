@@ -0,0 +1,58 @@
+def test_emitter_spawns_ages_and_culls_particles():
+    from panther.particles import Emitter
+
+    emitter = Emitter(100, 100, rate=100, lifetime=0.5, speed=10, spread=0, gravity=(0, -100), max_particles=30, seed=1)
+
+    emitter.update(0.1)
+    assert len(emitter) == 10
+    assert (emitter.positions[:10] == (100, 100)).all()
+
+    emitter.update(0.1)
+    assert len(emitter) == 20
+    assert (emitter.velocities[:10, 1] < emitter.velocities[10:20, 1]).all()  # gravity
+
+    emitter.update(0.2)  # only room for 10 more
+    assert len(emitter) == 30
+
+    emitter.emitting = False
+    emitter.update(0.25)  # the first 10 are 0.55 seconds old
+    assert len(emitter) == 20
+
+    emitter.update(1)
+    assert len(emitter) == 0
+
+
+def test_particles_are_drawn_as_one_mesh():
+    from panther import graphics
+    from panther.headless import HeadlessApp
+    from panther.particles import Emitter
+
+    emitter = Emitter(100, 100, rate=5000, lifetime=10, max_particles=5000, seed=1)
+    emitter.update(1)
+
+    with HeadlessApp() as app:
+        emitter.draw()
+
+    assert app.commands.count("_ColourMesh") == 1
+    assert len(app.commands) == 1
+
+
+def test_particle_images_use_the_textures_tex_coords():
+    import os
+    from panther.headless import HeadlessApp
+    from panther.particles import Emitter
+
+    smiley = os.path.join(os.path.dirname(__file__), "..", "examples", "smiley.png")
+    emitter = Emitter(100, 100, rate=10, image=smiley, max_particles=10, seed=1)
+    emitter.update(1)
+
+    with HeadlessApp():
+        emitter.draw()
+        # images loaded by kivy are stored top row first, so their tex_coords are flipped
+        assert emitter._vertices[0, :, 2:4].tolist() == [[0, 1], [1, 1], [1, 0], [0, 0]]
+
+        emitter.image = None  # back to plain squares
+        emitter.draw()
+
+    assert emitter._texture is None
+    assert not emitter._vertices[:, :, 2:4].any()
@@ -0,0 +1,164 @@
+import pytest
+from types import SimpleNamespace
+
+
+def _reset(pointer):
+    pointer._pointers.clear()
+    for pointers in pointer._by_type.values():
+        pointers.clear()
+    pointer._changed = True
+    pointer._swap()
+
+
+def test_regions_hit_the_topmost_region():
+    from panther.pointer import RegionIndex
+
+    regions = RegionIndex(cell_size=50)
+    regions.add_rectangle("background", 0, 0, 400, 400)
+    regions.add_rectangle("button", 100, 100, 80, 30, z=1)
+    regions.add_circle("knob", 300, 300, 20, z=1)
+
+    assert regions.hit(110, 110) == "button"
+    assert regions.hits(110, 110) == ["button", "background"]
+    assert regions.hit(300, 315) == "knob"
+    assert regions.hit(318, 318) == "background"  # inside the knob's bounding box, outside the circle
+    assert regions.hit(500, 500) is None
+
+    regions.add_rectangle("button", 200, 0, 10, 10, z=1)  # moved
+    assert regions.hit(110, 110) == "background"
+    assert regions.hit(205, 5) == "button"
+
+    assert regions.remove("background")
+    assert not regions.remove("background")
+    assert regions.hit(110, 110) is None
+    assert len(regions) == 2
+
+
+def test_touches_trigger_region_events():
+    import panther
+    from panther import pointer
+
+    hits = []
+
+    def region_down(region, touch):
+        hits.append((region, touch.uid))
+
+    pointer.regions.add_rectangle("button", 10, 10, 20, 20)
+    panther.events.add('regiondown', region_down)
+    try:
+        pointer.touch_down(SimpleNamespace(uid=1, x=15, y=15, device="mouse"))
+        pointer.touch_down(SimpleNamespace(uid=2, x=50, y=50, device="mouse"))
+    finally:
+        panther.events.off('regiondown', region_down)
+        pointer.regions.clear()
+        _reset(pointer)
+
+    assert hits == [("button", 1)]
+
+
+def test_pointer_paths_are_capped_and_simplified():
+    from panther.pointer import Pointer
+
+    capped = Pointer(1, 0, 0, max_points=3)
+    for i in range(1, 10):
+        capped.add_point(i, i)
+
+    assert list(capped.path) == [7, 7, 8, 8, 9, 9]
+    assert capped.added == 10
+
+    simplified = Pointer(2, 0, 0, min_distance=5)
+    assert not simplified.add_point(3, 0)
+    assert simplified.add_point(6, 0)
+    assert list(simplified.path) == [0, 0, 6, 0]
+
+    empty = Pointer(3, 0, 0, max_points=0, min_distance=5)
+    assert empty.add_point(10, 10) and not empty.path  # kept, then dropped by max_points
+    assert empty.add_point(11, 11)  # nothing left to be too close to
+
+    with pytest.deprecated_call():
+        assert simplified.points == [(0, 0), (6, 0)]  # the old list of pairs, for code which hasn't moved to path
+
+
+def test_trails_are_added_to_the_canvas_once_per_clear(monkeypatch):
+    import panther
+    from panther import graphics
+    from panther.pointer import Pointer
+
+    class _Line:
+        def __init__(self, points, width):
+            self.points, self.width = points, width
+
+        def flag_data_update(self):
+            pass
+
+    class _Canvas:
+        def __init__(self):
+            self.canvas = self
+            self.children = []
+
+        def add(self, obj):
+            self.children.append(obj)
+
+        def clear(self):
+            self.children.clear()
+
+    monkeypatch.setattr(graphics, 'Line', _Line)
+    monkeypatch.setattr(panther, 'canvas', _Canvas())
+
+    drawn = Pointer(1, 0, 0)
+    graphics.trail(drawn)
+    drawn.add_point(5, 5)
+    graphics.trail(drawn)  # the canvas wasn't cleared (clear_every_frame is off), so it's still on it
+
+    assert panther.canvas.children == [drawn.trail[0]]
+    assert drawn.trail[0].points == [0, 0, 5, 5]
+
+    graphics.clear()
+    graphics.trail(drawn)
+    assert panther.canvas.children == [drawn.trail[0]]
+
+
+def test_update_reads_a_snapshot_swapped_once_per_tick():
+    import panther
+    from panther import key, pointer
+
+    key._update_key_up(None, (97, "a"))
+    key._swap()
+    _reset(pointer)
+
+    panther.conf.differentiate_between_touches_and_clicks = True
+    try:
+        pointer.touch_down(SimpleNamespace(uid=1, x=0, y=0, device="mouse"))
+        key._update_key_down(None, (97, "a"), "a", [])
+        assert pointer.clicks() == () and not key.down("a")  # not until the next tick
+
+        key._swap()
+        pointer._swap()
+        assert [p.id for p in pointer.clicks()] == [1] and pointer.touches() == ()
+        assert key.down("a")
+
+        pointer.touch_up(SimpleNamespace(uid=1, x=0, y=0))
+        pointer._swap()
+        assert pointer.clicks()[0].expired  # released clicks are returned once more, then removed
+
+        pointer._swap()
+        assert pointer.clicks() == ()
+    finally:
+        panther.conf.differentiate_between_touches_and_clicks = False
+        key._update_key_up(None, (97, "a"))
+        key._swap()
+        _reset(pointer)
+
+
+def test_pointers_are_returned_in_the_order_they_went_down():
+    from panther import pointer
+
+    _reset(pointer)
+    try:
+        for uid, device in ((1, "touch"), (2, "mouse"), (3, "touch")):
+            pointer.touch_down(SimpleNamespace(uid=uid, x=0, y=0, device=device))
+        pointer._swap()
+
+        assert [p.id for p in pointer.clicks(remove_expired=False)] == [1, 2, 3]
+    finally:
+        _reset(pointer)
@@ -0,0 +1,39 @@
+import json
+from panther.profiler import FrameProfiler
+
+
+def test_profiler_ring_buffer_keeps_the_latest_frames():
+    profiler = FrameProfiler(capacity=3)
+
+    for i in range(5):
+        profiler.events_handled(i, 0.001)
+        profiler.record(i, 0.002, 0.0, 0.003 * i, i)
+
+    assert profiler.column('instructions').tolist() == [2, 3, 4]
+    assert profiler.summary()['frame']['max'] == 0.001 + 0.002 + 0.003 * 4
+
+
+def test_profiler_exports_chrome_trace(tmp_path):
+    profiler = FrameProfiler()
+    profiler.record(1.0, 0.002, 0.001, 0.003, 10)
+
+    profiler.export_chrome_trace(str(tmp_path / "trace.json"))
+    with open(tmp_path / "trace.json") as f:
+        trace = json.load(f)
+
+    assert [e['name'] for e in trace['traceEvents']] == ['events', 'update', 'clear', 'draw', 'instructions']
+
+
+def test_profiler_overlay_text_only_changes_every_interval():
+    from panther.headless import HeadlessApp
+
+    profiler = FrameProfiler(overlay_interval=0.25)
+
+    texts = []
+    with HeadlessApp():
+        for i in range(10):
+            profiler.record(i * 0.1, 0.002, 0.001, 0.003 * i, i)
+            profiler.draw_overlay()
+            texts.append(profiler._overlay_text)
+
+    assert len(set(texts)) == 4  # frames starting at 0, 0.3, 0.6 and 0.9s
@@ -0,0 +1,69 @@
+import numpy as np
+
+
+def _tileset(tmp_path):
+    from PIL import Image
+    from panther import graphics
+
+    tiles = tmp_path / "tiles"
+    tiles.mkdir()
+    Image.new("RGBA", (8, 8), (0, 255, 0, 255)).save(tiles / "grass.png")
+    Image.new("RGBA", (8, 8), (0, 0, 255, 255)).save(tiles / "water.png")
+
+    return graphics.Atlas(str(tiles), str(tmp_path / "tileset"))
+
+
+def test_only_visible_chunks_are_drawn(tmp_path):
+    from panther.headless import HeadlessApp
+    from panther.tilemap import Tilemap, EMPTY
+
+    tiles = np.zeros((1000, 1000), dtype=np.int32)
+    tiles[40:, :] = EMPTY
+    level = Tilemap(tiles, _tileset(tmp_path), 16, chunk_size=32)
+
+    with HeadlessApp() as app:
+        level.draw(viewport=(0, 0, 500, 400))  # inside the first chunk of 512x512 pixels
+
+    assert level.chunks_visible((0, 0, 500, 400)) == [(0, 0)]
+    assert level.chunks_visible((500, 500, 100, 100)) == [(0, 0), (0, 1), (1, 0), (1, 1)]
+    assert app.commands.count("Mesh") == 1
+    assert len(level._chunks) == 1
+
+
+def test_editing_a_tile_rebuilds_only_its_chunk(tmp_path):
+    from panther.headless import HeadlessApp
+    from panther.tilemap import Tilemap
+
+    level = Tilemap(np.zeros((64, 64), dtype=np.int32), _tileset(tmp_path), 8, chunk_size=32)
+
+    with HeadlessApp():
+        level.draw(viewport=(0, 0, 512, 512))
+        chunks = dict(level._chunks)
+
+        level[40, 3] = 1
+        level.draw(viewport=(0, 0, 512, 512))
+
+    rebuilt = [key for key in chunks if level._chunks[key] is not chunks[key]]
+    assert rebuilt == [(1, 0)]
+    assert level[40, 3] == 1
+
+
+def test_negative_and_sliced_edits_rebuild_the_right_chunks(tmp_path):
+    from panther.headless import HeadlessApp
+    from panther.tilemap import Tilemap
+
+    level = Tilemap(np.zeros((64, 64), dtype=np.int32), _tileset(tmp_path), 8, chunk_size=32)
+
+    def rebuilt(edit):
+        with HeadlessApp():
+            level.draw(viewport=(0, 0, 512, 512))
+            chunks = dict(level._chunks)
+            edit()
+            level.draw(viewport=(0, 0, 512, 512))
+
+        return sorted(key for key in chunks if level._chunks[key] is not chunks[key])
+
+    assert rebuilt(lambda: level.__setitem__((-1, -1), 1)) == [(1, 1)]
+    assert rebuilt(lambda: level.__setitem__((slice(30, 34), 5), 1)) == [(0, 0), (1, 0)]
+    assert rebuilt(lambda: level.__setitem__(-40, 1)) == [(0, 0), (0, 1)]  # a whole row
+    assert level[63, 63] == 1 and level[31, 5] == 1 and (level[24] == 1).all()
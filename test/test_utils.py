@@ -0,0 +1,70 @@
+import pytest
+import numpy as np
+
+
+def test_batch_move_on_angle_matches_the_scalar_version():
+    from panther.utils import move_on_angle
+    from panther.utils import batch
+
+    angles = np.array([0, 45, 90, 135, 180, 270, 359, 12.5])
+    xs = np.arange(8, dtype=np.float64) * 10
+    ys = np.arange(8, dtype=np.float64) * -3
+    to_move = np.linspace(1, 50, 8)
+
+    expected = [move_on_angle(a, x, y, d) for a, x, y, d in zip(angles, xs, ys, to_move)]
+    batch.move_on_angle(angles, xs, ys, to_move)
+
+    assert list(zip(xs, ys)) == expected
+
+    batch.move_on_angle(30, xs, ys, 10)  # one angle and distance for every position
+    assert list(zip(xs, ys)) == [move_on_angle(30, x, y, 10) for x, y in expected]
+
+
+def test_batch_transforms_in_place():
+    from panther.utils import move_on_angle
+    from panther.utils import batch
+
+    xs = np.array([0.0, 10.0])
+    ys = np.array([10.0, 0.0])
+    batch.rotate(xs, ys, 90)  # float positions are kept by default
+    np.testing.assert_allclose(xs, [-10, 0], atol=1e-9)
+    np.testing.assert_allclose(ys, [0, 10], atol=1e-9)
+
+    # same convention as move_on_angle: rotating the point <d> above the centre
+    x, y = np.array([5.0]), np.array([7.0 + 20])
+    batch.rotate(x, y, 30, 5, 7, floor=True)
+    assert (x[0], y[0]) == move_on_angle(30, 5, 7, 20)
+
+    xs = np.array([1, 2, 3])  # int arrays are updated in place too, when rounding down
+    ys = np.array([1, 1, 1])
+    batch.scale(xs, ys, 2.5, cx=1, floor=True)
+    batch.translate(xs, ys, 1, -1, floor=True)
+    assert xs.tolist() == [2, 4, 7] and ys.tolist() == [1, 1, 1]
+
+    with pytest.raises(ValueError):  # rather than truncating towards zero
+        batch.translate(xs, ys, 0.5, 0.5)
+
+
+def test_entity_store_keeps_ids_stable_and_rows_packed():
+    from panther.utils.entities import EntityStore
+
+    store = EntityStore(capacity=2)
+    a = store.create(x=1, colour=(255, 0, 0))
+    b, c, d = store.create_many(3, x=[2, 3, 4], vx=10)
+    assert len(store) == 4  # grown past the initial capacity
+    assert store.get(a, 'colour').tolist() == [255, 0, 0, 1]
+
+    store.destroy(a)
+    assert a not in store and store.get(d, 'x') == 4
+    assert sorted(store.x.tolist()) == [2, 3, 4]
+
+    store.step(0.5)
+    assert store.get(b, 'x') == 7
+
+    destroyed = store.destroy_where(store.x > 7)
+    assert sorted(destroyed.tolist()) == sorted([c, d])
+    assert store.ids.tolist() == [b] and store.rows(b) == 0
+
+    e = store.create(x=100)
+    assert e in (a, c, d)  # destroyed ids are reused
+    assert store.where(store.x > 50).tolist() == [e]